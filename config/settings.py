@@ -21,6 +21,28 @@ class AppSettings:
     LARGE_CHORD_IMAGE_SIZE = (300, 300)
     SCROLL_AREA_HEIGHT = 60
 
+    # Кэш обработанных песен (HTML и список аккордов)
+    SONG_CACHE_SIZE = 32
+    SONG_CACHE_DIR = os.path.join(PROJECT_ROOT, "data", "song_cache")  # None - только в памяти
+
+    # Большие файлы песен выводятся блоками по мере обработки
+    SONG_STREAM_THRESHOLD = 256 * 1024  # байт
+    SONG_STREAM_BLOCK_LINES = 200
+
+    # Хранилище песен и аккордов: 'postgres' - сервер, 'sqlite' - локальная база (работа без сети)
+    STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'postgres')
+    LOCAL_DB_PATH = os.getenv('LOCAL_DB_PATH', os.path.join(PROJECT_ROOT, "data", "guitar_chords.sqlite3"))
+
+    # Профиль запуска (main.py --profile-startup): бюджет этапов и одного импорта, мс
+    STARTUP_PROFILE_PATH = os.path.join(PROJECT_ROOT, "data", "startup_profile.json")
+    STARTUP_PHASE_BUDGETS_MS = {
+        'imports': 3000,
+        'create_app': 2000,
+        'show': 1000,
+        'total': 6000,
+    }
+    STARTUP_MODULE_BUDGET_MS = 500  # собственное время импорта одного модуля
+
 class DatabaseConfig:
     # Конфигурация базы данных
     TABLE_SONGS = "songs"
@@ -0,0 +1,39 @@
+# config/settings_chord_render.py
+
+
+class ChordRenderSettings:
+    """Настройки отрисовки аккорда для ChordRenderer (по умолчанию - страница песен).
+
+    None означает, что значение из данных аккорда не меняется.
+    """
+
+    # 🔧 НАСТРОЙКИ ОБВОДКИ
+    OUTLINE_NOTE_WIDTH = 2  # Толщина обводки нот
+    OUTLINE_BARRE_WIDTH = 2  # Толщина обводки баре
+    OUTLINE_FRET_WIDTH = None  # Толщина обводки ладов
+    OUTLINE_OPEN_NOTE_WIDTH = None  # Толщина обводки открытых струн
+
+    OUTLINE_COLOR = [0, 0, 0]  # Цвет обводки [R, G, B]
+
+    # 🎨 СТИЛИ ЭЛЕМЕНТОВ
+    BARRE_STYLE = 'orange_gradient'  # Стиль баре, если в данных стиль не задан
+    NOTE_STYLE = None  # Стиль нот
+    NOTE_TEXT_COLOR = None  # Цвет текста нот [R, G, B]
+    FRET_STYLE = None  # Стиль ладов
+    FRET_TEXT_COLOR = None  # Цвет текста ладов [R, G, B]
+
+    # 📏 НАСТРОЙКИ МАСШТАБИРОВАНИЯ
+    MIN_NOTE_RADIUS = 0  # Минимальный радиус ноты после масштабирования
+
+    # 🔧 АДАПТИВНЫЙ ТЕКСТ
+    ADAPTIVE_TEXT_ENABLED = False  # Уменьшать радиус нот с длинными символами
+    LONG_SYMBOL_RADIUS_REDUCTION = 2  # На сколько уменьшать радиус для длинных символов (C#, Bb и т.д.)
+
+
+class ChordsPageRenderSettings(ChordRenderSettings):
+    """Настройки отрисовки для страницы аккордов"""
+
+    NOTE_STYLE = 'red_3d'
+    NOTE_TEXT_COLOR = [255, 255, 255]
+    FRET_STYLE = 'default'
+    FRET_TEXT_COLOR = [0, 0, 0]
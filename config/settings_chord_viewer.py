@@ -1,9 +1,11 @@
 # config/settings_chord_viewer.py
 from PyQt5.QtGui import QColor
 
+from config.settings_chord_render import ChordRenderSettings
 
-class ChordViewerSettings:
-    """Настройки для окна просмотра аккордов"""
+
+class ChordViewerSettings(ChordRenderSettings):
+    """Настройки для окна просмотра аккордов (в том числе отрисовки через ChordRenderer)"""
 
     # 🔧 НАСТРОЙКИ ОБВОДКИ И РАЗМЕРОВ
     OUTLINE_NOTE_WIDTH = 2  # Толщина обводки нот
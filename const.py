@@ -35,6 +35,8 @@ KEYBOARD_CALL = ['',' ','next_page_let_','prev_page_let_','prev_page_','up_let_'
 load_dotenv()
 GENERAL_ADMIN = int(os.getenv('GENERAL_ADMIN'))
 DBNAME, USER, PASSWORD, HOST = os.getenv('DBNAME'), os.getenv('USER'), os.getenv('PASSWORD'),os.getenv('HOST')
+DB_POOL_MIN, DB_POOL_MAX = int(os.getenv('DB_POOL_MIN', 1)), int(os.getenv('DB_POOL_MAX', 10))
+EVENT_BUFFER_SIZE, EVENT_FLUSH_INTERVAL = int(os.getenv('EVENT_BUFFER_SIZE', 500)), float(os.getenv('EVENT_FLUSH_INTERVAL', 5))
 MAIN_DIRECTORY = os.getenv('MAIN_SONGS_DIRECTORY')
 SENDER_LINK = os.getenv('SENDER_LINK')
 SENDER_TITLE = os.getenv('SENDER_TITLE')
@@ -1,48 +1,78 @@
 # core/chord_manager.py
-import os
 import base64
-import tempfile
 import json
-from typing import Dict, List, Optional, Any
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
-from PyQt5.QtCore import QByteArray, QBuffer, QIODevice, Qt
+from PyQt5.QtCore import QByteArray, QBuffer, QIODevice
+from PyQt5.QtGui import QImage, QPixmap
 from PyQt5.QtMultimedia import QMediaContent, QMediaPlayer
 
-# Импортируем конвертированные данные
-try:
-    from data.chords_config import CHORDS_DATA, RAM_DATA, NOTE_DATA
-    from data.template import TEMPLATE_DATA
-    from data.template_guitar import GUITAR_IMAGE_DATA
-    from data.chord_sounds import SOUNDS_DATA
-
-    print("✅ Все модули данных успешно загружены")
-except ImportError as e:
-    print(f"❌ Ошибка импорта модулей данных: {e}")
-    # Создаем заглушки для избежания ошибок
-    CHORDS_DATA = []
-    RAM_DATA = []
-    NOTE_DATA = []
-    TEMPLATE_DATA = {}
-    GUITAR_IMAGE_DATA = ""
-    SOUNDS_DATA = {}
+from utils.chord_bundle import (ChordBundle, BUNDLE_FILENAME, TABLE_CHORDS, TABLE_RAM, TABLE_NOTE,
+                                TABLE_TEMPLATE, IMAGE_GUITAR)
+
+CHORDS_BUNDLE_PATH = Path(__file__).resolve().parent.parent / "data" / BUNDLE_FILENAME
+
+# Бинарный пакет (tools/chord_converter.py --bundle) имеет приоритет над Python модулями:
+# таблицы читаются через marshal, изображение и звуки - memoryview поверх mmap без base64
+CHORDS_BUNDLE = None
+if CHORDS_BUNDLE_PATH.exists():
+    try:
+        CHORDS_BUNDLE = ChordBundle(CHORDS_BUNDLE_PATH)
+        CHORDS_DATA = CHORDS_BUNDLE.load_table(TABLE_CHORDS, [])
+        RAM_DATA = CHORDS_BUNDLE.load_table(TABLE_RAM, [])
+        NOTE_DATA = CHORDS_BUNDLE.load_table(TABLE_NOTE, [])
+        TEMPLATE_DATA = CHORDS_BUNDLE.load_table(TABLE_TEMPLATE, {})
+        GUITAR_IMAGE_DATA = CHORDS_BUNDLE.get_bytes(IMAGE_GUITAR) or b""
+        SOUNDS_DATA = CHORDS_BUNDLE.load_sounds()
+
+        print(f"✅ Данные аккордов загружены из пакета: {CHORDS_BUNDLE_PATH}")
+    except Exception as e:
+        print(f"❌ Ошибка загрузки пакета аккордов {CHORDS_BUNDLE_PATH}: {e}")
+        CHORDS_BUNDLE = None
+
+if CHORDS_BUNDLE is None:
+    # Импортируем конвертированные данные
+    try:
+        from data.chords_config import CHORDS_DATA, RAM_DATA, NOTE_DATA
+        from data.template import TEMPLATE_DATA
+        from data.template_guitar import GUITAR_IMAGE_DATA
+        from data.chord_sounds import SOUNDS_DATA
+
+        print("✅ Все модули данных успешно загружены")
+    except ImportError as e:
+        print(f"❌ Ошибка импорта модулей данных: {e}")
+        # Создаем заглушки для избежания ошибок
+        CHORDS_DATA = []
+        RAM_DATA = []
+        NOTE_DATA = []
+        TEMPLATE_DATA = {}
+        GUITAR_IMAGE_DATA = ""
+        SOUNDS_DATA = {}
+
+
+def _resource_bytes(data) -> bytes:
+    """Байты ресурса: base64 строка из Python модуля или сырые данные из пакета"""
+    if isinstance(data, str):
+        return base64.b64decode(data.strip())
+    return bytes(data)
 
 
 class ChordSoundPlayer:
-    """Класс для воспроизведения звуков аккордов с кэшированием временных файлов"""
+    """Класс для воспроизведения звуков аккордов из памяти без временных файлов"""
 
-    # Словарь для кэширования путей к временным файлам
+    # Кэш декодированных звуков: ключ звука -> QByteArray
     _sound_cache = {}
-    _temp_dir = None
+    # Активные буферы плееров (QMediaPlayer читает из них во время воспроизведения).
+    # Ключ - сам плеер: запись исчезает вместе с ним, id() нового плеера не совпадет со старым
+    _active_buffers = weakref.WeakKeyDictionary()
 
     @staticmethod
     def initialize():
         """Инициализация звукового плеера"""
-        try:
-            # Создаем временную директорию для звуков
-            ChordSoundPlayer._temp_dir = tempfile.mkdtemp(prefix="guitar_chords_sounds_")
-            print(f"✅ Создана временная директория для звуков: {ChordSoundPlayer._temp_dir}")
-        except Exception as e:
-            print(f"❌ Ошибка инициализации звукового плеера: {e}")
+        ChordSoundPlayer._sound_cache.clear()
+        ChordSoundPlayer._active_buffers.clear()
 
     @staticmethod
     def play_chord_sound(player: QMediaPlayer, chord_name: str, variant: int = 1) -> bool:
@@ -76,78 +106,75 @@ class ChordSoundPlayer:
             return False
 
     @staticmethod
-    def _play_cached_sound(player: QMediaPlayer, base64_data: str, sound_key: str) -> bool:
-        """Воспроизведение звука с кэшированием временного файла"""
+    def _play_cached_sound(player: QMediaPlayer, sound_data, sound_key: str) -> bool:
+        """Воспроизведение звука с кэшированием данных в памяти"""
         try:
-            # Проверяем кэш
-            if sound_key in ChordSoundPlayer._sound_cache:
-                sound_path = ChordSoundPlayer._sound_cache[sound_key]
-                if os.path.exists(sound_path):
-                    print(f"🔊 Используем кэшированный файл для: {sound_key}")
-                    return ChordSoundPlayer._play_from_file(player, sound_path, sound_key)
-                else:
-                    # Файл был удален, удаляем из кэша
-                    del ChordSoundPlayer._sound_cache[sound_key]
-
-            # Создаем временный файл
-            sound_path = ChordSoundPlayer._create_temp_sound_file(base64_data, sound_key)
-            if not sound_path:
-                return False
-
-            # Сохраняем в кэш
-            ChordSoundPlayer._sound_cache[sound_key] = sound_path
+            sound_bytes = ChordSoundPlayer._sound_cache.get(sound_key)
+            if sound_bytes is None:
+                sound_bytes = ChordSoundPlayer._load_sound_bytes(sound_data, sound_key)
+                if sound_bytes is None:
+                    return False
+
+                # Сохраняем в кэш
+                ChordSoundPlayer._sound_cache[sound_key] = sound_bytes
+            else:
+                print(f"🔊 Используем кэшированный звук для: {sound_key}")
 
             # Воспроизводим
-            return ChordSoundPlayer._play_from_file(player, sound_path, sound_key)
+            return ChordSoundPlayer._play_from_memory(player, sound_bytes, sound_key)
 
         except Exception as e:
             print(f"❌ Ошибка воспроизведения кэшированного звука {sound_key}: {e}")
             return False
 
     @staticmethod
-    def _create_temp_sound_file(base64_data: str, sound_key: str) -> Optional[str]:
-        """Создание временного звукового файла"""
+    def _load_sound_bytes(sound_data, sound_key: str) -> Optional[QByteArray]:
+        """Подготовка звуковых данных для воспроизведения из памяти"""
         try:
-            if not ChordSoundPlayer._temp_dir:
-                ChordSoundPlayer.initialize()
-
-            # Декодируем base64
-            sound_bytes = base64.b64decode(base64_data.strip())
+            # Декодируем base64 (данные из пакета уже в сыром виде)
+            sound_bytes = _resource_bytes(sound_data)
             if len(sound_bytes) == 0:
                 print(f"⚠️ Пустой звук после декодирования для {sound_key}")
                 return None
 
-            # Создаем путь к файлу
-            sound_path = os.path.join(ChordSoundPlayer._temp_dir, f"{sound_key}.mp3")
-
-            # Записываем данные в файл
-            with open(sound_path, 'wb') as f:
-                f.write(sound_bytes)
-
-            print(f"✅ Создан временный файл: {sound_key} ({len(sound_bytes)} байт)")
-            return sound_path
+            print(f"✅ Звук загружен в память: {sound_key} ({len(sound_bytes)} байт)")
+            return QByteArray(sound_bytes)
 
         except Exception as e:
-            print(f"❌ Ошибка создания временного файла для {sound_key}: {e}")
+            print(f"❌ Ошибка загрузки звука {sound_key}: {e}")
             return None
 
     @staticmethod
-    def _play_from_file(player: QMediaPlayer, sound_path: str, sound_key: str) -> bool:
-        """Воспроизведение звука из файла"""
+    def _play_from_memory(player: QMediaPlayer, sound_bytes: QByteArray, sound_key: str) -> bool:
+        """Воспроизведение звука из буфера в памяти"""
         try:
-            # Создаем медиа-контент из файла
             from PyQt5.QtCore import QUrl
-            media_content = QMediaContent(QUrl.fromLocalFile(sound_path))
 
-            # Устанавливаем медиа и воспроизводим
-            player.setMedia(media_content)
+            # Буфер читает кэшированный QByteArray напрямую, без копирования.
+            # Буфер - дочерний объект плеера и удаляется вместе с ним
+            sound_buffer = QBuffer(player)
+            sound_buffer.setData(sound_bytes)
+            if not sound_buffer.open(QIODevice.ReadOnly):
+                print(f"❌ Не удалось открыть буфер звука {sound_key}")
+                return False
+
+            # URL нужен плееру только для определения формата данных
+            player.setMedia(QMediaContent(QUrl(f"{sound_key}.mp3")), sound_buffer)
+
+            # Предыдущий буфер этого плеера больше не используется
+            previous_buffer = ChordSoundPlayer._active_buffers.get(player)
+            ChordSoundPlayer._active_buffers[player] = sound_buffer
+            if previous_buffer is not None:
+                previous_buffer.close()
+                previous_buffer.deleteLater()
+
             player.play()
 
             print(f"🔊 Воспроизведение: {sound_key}")
             return True
 
         except Exception as e:
-            print(f"❌ Ошибка воспроизведения файла {sound_key}: {e}")
+            print(f"❌ Ошибка воспроизведения звука {sound_key}: {e}")
             return False
 
     @staticmethod
@@ -179,20 +206,17 @@ class ChordSoundPlayer:
 
     @staticmethod
     def cleanup():
-        """Очистка временных файлов"""
+        """Очистка звуковых буферов"""
         try:
-            # Удаляем временные файлы
-            if ChordSoundPlayer._temp_dir and os.path.exists(ChordSoundPlayer._temp_dir):
-                import shutil
-                shutil.rmtree(ChordSoundPlayer._temp_dir)
-                print(f"✅ Удалена временная директория звуков: {ChordSoundPlayer._temp_dir}")
+            for sound_buffer in list(ChordSoundPlayer._active_buffers.values()):
+                sound_buffer.close()
 
             # Очищаем кэш
+            ChordSoundPlayer._active_buffers.clear()
             ChordSoundPlayer._sound_cache.clear()
-            ChordSoundPlayer._temp_dir = None
 
         except Exception as e:
-            print(f"❌ Ошибка очистки временных звуковых файлов: {e}")
+            print(f"❌ Ошибка очистки звуковых буферов: {e}")
 
 
 class ChordManager:
@@ -200,7 +224,22 @@ class ChordManager:
 
     _initialized = False
     _chords_cache = {}
-    _template_image_path = None
+
+    # Изображение грифа декодируется один раз и хранится в памяти
+    _template_image: Optional[QImage] = None
+    _template_pixmap: Optional[QPixmap] = None
+    _template_crops: Dict[str, QPixmap] = {}
+
+    # Ленивый режим: в _chords_cache хранятся только индексы записей CHORDS_DATA,
+    # варианты собираются при первом обращении и хранятся в LRU кэше
+    LAZY_VARIANTS = True
+    VARIANTS_CACHE_SIZE = 64
+    _variants_cache: "OrderedDict[str, List[Dict]]" = OrderedDict()
+
+    # Индексы для быстрого поиска (строятся один раз в initialize)
+    _note_index: Dict[Tuple[str, str], str] = {}
+    _fn_index: Dict[str, str] = {}
+    _ram_index: Dict[str, List] = {}
 
     @classmethod
     def initialize(cls):
@@ -211,12 +250,12 @@ class ChordManager:
         try:
             print("🎵 Инициализация менеджера аккордов...")
 
+            # Строим индексы NOTE/RAM для поиска элементов за O(1)
+            cls._build_lookup_indexes()
+
             # Создаем структуру аккордов из Excel данных
             cls._build_chords_cache()
 
-            # Создаем временные файлы для ресурсов
-            cls._create_temp_resources()
-
             cls._initialized = True
             print(f"✅ Менеджер аккордов инициализирован. Загружено {len(cls._chords_cache)} аккордов")
 
@@ -225,14 +264,53 @@ class ChordManager:
             import traceback
             traceback.print_exc()
 
+    @classmethod
+    def _build_lookup_indexes(cls):
+        """Построение индексов NOTE_DATA и RAM_DATA: (поле, значение) -> ID элемента, FN -> FN_ELEM, RAM -> LAD"""
+        note_index = {}
+        fn_index = {}
+        ram_index = {}
+
+        for note_record in NOTE_DATA:
+            for field, record_value in note_record.items():
+                if record_value is None or field.endswith("_ELEM"):
+                    continue
+
+                element_id = note_record.get(f"{field}_ELEM")
+
+                if isinstance(record_value, list):
+                    values = [str(item) for item in record_value if item is not None]
+                else:
+                    values = [str(record_value)]
+
+                # Первое совпадение имеет приоритет, как и при линейном поиске
+                for value in values:
+                    note_index.setdefault((field, value), element_id)
+
+            # FN -> FN_ELEM: учитываем только элементы, существующие в шаблоне
+            record_fn = note_record.get("FN")
+            if record_fn is not None:
+                element_id = note_record.get("FN_ELEM")
+                if element_id and element_id in TEMPLATE_DATA.get("notes", {}):
+                    fn_index.setdefault(str(record_fn), element_id)
+
+        for ram_record in RAM_DATA:
+            ram_index.setdefault(ram_record["RAM"], ram_record.get("LAD", []))
+
+        cls._note_index = note_index
+        cls._fn_index = fn_index
+        cls._ram_index = ram_index
+
+        print(f"✅ Построены индексы: NOTE={len(note_index)}, FN={len(fn_index)}, RAM={len(ram_index)}")
+
     @classmethod
     def _build_chords_cache(cls):
         """Создание кэша аккордов из Excel данных"""
         cls._chords_cache = {}  # Очищаем кэш
+        cls._variants_cache.clear()
 
-        for chord_record in CHORDS_DATA:
+        for record_index, chord_record in enumerate(CHORDS_DATA):
             chord_name = chord_record["CHORD"]
-            variant = chord_record["VARIANT"]
 
             # Нормализуем имя аккорда (обрабатываем варианты типа "B | H")
             normalized_names = cls._normalize_chord_name(chord_name)
@@ -243,8 +321,15 @@ class ChordManager:
                         'name': name,
                         'caption': chord_record["CAPTION"],
                         'type': chord_record["TYPE"],
-                        'variants': []
+                        'record_indexes': []
                     }
+                    if not cls.LAZY_VARIANTS:
+                        cls._chords_cache[name]['variants'] = []
+
+                cls._chords_cache[name]['record_indexes'].append(record_index)
+                if cls.LAZY_VARIANTS:
+                    # Варианты будут собраны при первом обращении
+                    continue
 
                 # Создаем вариант аккорда
                 variant_data = cls._create_variant_data(chord_record)
@@ -253,6 +338,26 @@ class ChordManager:
                     cls._chords_cache[name]['variants'].append(variant_data)
                     cls._chords_cache[name]['variants'].sort(key=lambda x: x['variant_number'])
 
+    @classmethod
+    def _get_chord_variants_cached(cls, name: str) -> List[Dict]:
+        """Получение вариантов аккорда из LRU кэша со сборкой при первом обращении"""
+        if name in cls._variants_cache:
+            cls._variants_cache.move_to_end(name)
+            return cls._variants_cache[name]
+
+        variants = []
+        for record_index in cls._chords_cache[name]['record_indexes']:
+            variant_data = cls._create_variant_data(CHORDS_DATA[record_index])
+            if variant_data:
+                variants.append(variant_data)
+        variants.sort(key=lambda x: x['variant_number'])
+
+        cls._variants_cache[name] = variants
+        while len(cls._variants_cache) > cls.VARIANTS_CACHE_SIZE:
+            cls._variants_cache.popitem(last=False)
+
+        return variants
+
     @classmethod
     def _normalize_chord_name(cls, chord_name: str) -> List[str]:
         """Нормализация имени аккорда (обработка вариантов типа 'B | H')"""
@@ -403,28 +508,27 @@ class ChordManager:
         frets = []
 
         try:
-            # Ищем RAM в данных
-            for ram_record in RAM_DATA:
-                if ram_record["RAM"] == ram_code:
-                    lad_numbers = ram_record.get("LAD", [])
-                    print(f"  🎻 Найдены лады для {ram_code}: {lad_numbers}")
-
-                    for lad_num in lad_numbers:
-                        # Ищем элемент лада в шаблонах
-                        lad_id = f"{lad_num}LAD"
-                        if lad_id in TEMPLATE_DATA.get("frets", {}):
-                            fret_data = TEMPLATE_DATA["frets"][lad_id].copy()
-                            frets.append({
-                                'type': 'fret',
-                                'element_id': lad_id,
-                                'data': fret_data
-                            })
-                            print(f"    ✅ Добавлен лад {lad_num}")
-                        else:
-                            print(f"    ⚠️  Лад {lad_id} не найден в шаблонах")
-                    break
-            else:
+            # Ищем RAM в индексе
+            if ram_code not in cls._ram_index:
                 print(f"    ❌ RAM код {ram_code} не найден в RAM_DATA")
+                return frets
+
+            lad_numbers = cls._ram_index[ram_code] or []
+            print(f"  🎻 Найдены лады для {ram_code}: {lad_numbers}")
+
+            for lad_num in lad_numbers:
+                # Ищем элемент лада в шаблонах
+                lad_id = f"{lad_num}LAD"
+                if lad_id in TEMPLATE_DATA.get("frets", {}):
+                    fret_data = TEMPLATE_DATA["frets"][lad_id].copy()
+                    frets.append({
+                        'type': 'fret',
+                        'element_id': lad_id,
+                        'data': fret_data
+                    })
+                    print(f"    ✅ Добавлен лад {lad_num}")
+                else:
+                    print(f"    ⚠️  Лад {lad_id} не найден в шаблонах")
 
         except Exception as e:
             print(f"❌ Ошибка получения ладов для {ram_code}: {e}")
@@ -466,20 +570,16 @@ class ChordManager:
     def _get_element_by_fn_code(cls, fn_code: str) -> Optional[Dict]:
         """Получение элемента отрисовки по FN коду"""
         try:
-            # Ищем в NOTE_DATA по полю FN
-            for note_record in NOTE_DATA:
-                if note_record.get("FN") is not None:
-                    record_fn = str(note_record.get("FN"))
-                    if record_fn == fn_code:
-                        element_id = note_record.get("FN_ELEM")
-                        if element_id and element_id in TEMPLATE_DATA.get("notes", {}):
-                            element_data = TEMPLATE_DATA["notes"][element_id].copy()
-                            # Сохраняем оригинальные настройки отображения
-                            return {
-                                'type': 'note',
-                                'element_id': element_id,
-                                'data': element_data
-                            }
+            # Ищем в индексе FN -> FN_ELEM
+            element_id = cls._fn_index.get(fn_code)
+            if element_id:
+                element_data = TEMPLATE_DATA["notes"][element_id].copy()
+                # Сохраняем оригинальные настройки отображения
+                return {
+                    'type': 'note',
+                    'element_id': element_id,
+                    'data': element_data
+                }
             print(f"    ⚠️  Элемент не найден для FN кода: {fn_code}")
         except Exception as e:
             print(f"❌ Ошибка получения элемента по FN коду {fn_code}: {e}")
@@ -574,23 +674,10 @@ class ChordManager:
         try:
             print(f"    🔎 Поиск элемента: поле={field}, значение={value}")
 
-            for note_record in NOTE_DATA:
-                record_value = note_record.get(field)
-
-                # Обрабатываем разные типы данных
-                if record_value is None:
-                    continue
-
-                # Если в записи список - проверяем вхождение
-                if isinstance(record_value, list):
-                    if value in [str(item) for item in record_value if item is not None]:
-                        element_id = note_record.get(f"{field}_ELEM")
-                        return cls._create_element_from_template(field, element_id, value)
-
-                # Если в записи число или строка
-                elif str(record_value) == str(value):
-                    element_id = note_record.get(f"{field}_ELEM")
-                    return cls._create_element_from_template(field, element_id, value)
+            key = (field, str(value))
+            if key in cls._note_index:
+                element_id = cls._note_index[key]
+                return cls._create_element_from_template(field, element_id, value)
 
             print(f"    ⚠️  Элемент не найден в NOTE_DATA для {field}={value}")
             return None
@@ -680,35 +767,67 @@ class ChordManager:
         return None
 
     @classmethod
-    def _create_temp_resources(cls):
-        """Создание временных файлов для ресурсов"""
-        try:
-            # Создаем временный файл для изображения грифа
-            cls._create_template_image_file()
-        except Exception as e:
-            print(f"❌ Ошибка создания временных ресурсов: {e}")
+    def get_template_image(cls) -> Optional[QImage]:
+        """Изображение грифа, декодированное из ресурсов один раз"""
+        if cls._template_image is None:
+            try:
+                image_data = _resource_bytes(GUITAR_IMAGE_DATA) if GUITAR_IMAGE_DATA else b""
+                if not image_data:
+                    print("⚠️ Нет данных для создания изображения грифа")
+                    return None
+
+                image = QImage.fromData(image_data, "PNG")
+                if image.isNull():
+                    print("❌ Не удалось декодировать изображение грифа")
+                    return None
+
+                cls._template_image = image
+                print(f"✅ Изображение грифа загружено в память: {image.width()}x{image.height()}")
+            except Exception as e:
+                print(f"❌ Ошибка декодирования изображения грифа: {e}")
+                return None
+
+        return cls._template_image
 
     @classmethod
-    def _create_template_image_file(cls):
-        """Создание временного файла для изображения грифа"""
-        try:
-            if GUITAR_IMAGE_DATA and GUITAR_IMAGE_DATA.strip():
-                image_data = base64.b64decode(GUITAR_IMAGE_DATA.strip())
-                temp_dir = tempfile.gettempdir()
-                cls._template_image_path = os.path.join(temp_dir, "guitar_template.png")
+    def get_template_pixmap(cls) -> QPixmap:
+        """Общий QPixmap грифа для всех отрисовщиков"""
+        if cls._template_pixmap is None:
+            image = cls.get_template_image()
+            if image is None:
+                return QPixmap()
+            cls._template_pixmap = QPixmap.fromImage(image)
 
-                with open(cls._template_image_path, 'wb') as f:
-                    f.write(image_data)
+        return cls._template_pixmap
 
-                print(f"✅ Создан временный файл изображения: {cls._template_image_path}")
-            else:
-                print("⚠️ Нет данных для создания изображения грифа")
-        except Exception as e:
-            print(f"❌ Ошибка создания временного файла изображения: {e}")
+    @classmethod
+    def get_template_crop(cls, ram_code: str) -> Optional[QPixmap]:
+        """Область грифа для RAM кода из TEMPLATE_DATA["crop_rects"], обрезается один раз"""
+        if ram_code in cls._template_crops:
+            return cls._template_crops[ram_code]
+
+        crop_rect = cls._get_crop_rect(ram_code)
+        template_pixmap = cls.get_template_pixmap()
+        if not crop_rect or template_pixmap.isNull():
+            return None
+
+        # Те же границы, что и при обрезке в отрисовщиках
+        crop_x = max(0, min(crop_rect.get('x', 0), template_pixmap.width() - 1))
+        crop_y = max(0, min(crop_rect.get('y', 0), template_pixmap.height() - 1))
+        crop_width = max(1, min(crop_rect.get('width', 0), template_pixmap.width() - crop_x))
+        crop_height = max(1, min(crop_rect.get('height', 0), template_pixmap.height() - crop_y))
+
+        crop_pixmap = template_pixmap.copy(int(crop_x), int(crop_y), int(crop_width), int(crop_height))
+        cls._template_crops[ram_code] = crop_pixmap
+        return crop_pixmap
 
     @classmethod
     def _is_valid_sound_data(cls, sound_data) -> bool:
         """Проверка валидности звуковых данных"""
+        if isinstance(sound_data, (bytes, bytearray, memoryview)):
+            # Сырые данные из бинарного пакета
+            return len(sound_data) > 0
+
         if not sound_data:
             return False
 
@@ -745,7 +864,10 @@ class ChordManager:
 
         for name in names_to_try:
             if name in cls._chords_cache:
-                return cls._chords_cache[name]
+                chord_data = cls._chords_cache[name]
+                if cls.LAZY_VARIANTS:
+                    return {**chord_data, 'variants': cls._get_chord_variants_cached(name)}
+                return chord_data
 
         print(f"❌ Аккорд '{chord_name}' не найден. Доступные: {list(cls._chords_cache.keys())}")
         return None
@@ -755,10 +877,6 @@ class ChordManager:
         chord_data = cls.get_chord_data(chord_name)
         return chord_data.get('variants', []) if chord_data else []
 
-    @classmethod
-    def get_template_image_path(cls) -> Optional[str]:
-        return cls._template_image_path
-
     @classmethod
     def search_chords(cls, query: str) -> List[str]:
         query_lower = query.lower()
@@ -848,11 +966,11 @@ class ChordManager:
     def cleanup(cls):
         """Очистка временных ресурсов"""
         try:
-            if cls._template_image_path and os.path.exists(cls._template_image_path):
-                os.remove(cls._template_image_path)
-                print(f"✅ Удален временный файл изображения: {cls._template_image_path}")
+            cls._template_crops.clear()
+            cls._template_pixmap = None
+            cls._template_image = None
 
-            # Очищаем звуковые файлы
+            # Очищаем звуковые буферы
             ChordSoundPlayer.cleanup()
 
         except Exception as e:
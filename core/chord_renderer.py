@@ -0,0 +1,305 @@
+# core/chord_renderer.py
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap, QPainter
+
+from config.settings_chord_render import ChordRenderSettings
+from drawing_elements import DrawingElements
+
+
+class ChordRenderCache:
+    """Общий LRU кэш отрисованных аккордов для страниц и окна просмотра"""
+
+    MAX_SIZE = 128
+
+    _cache: "OrderedDict[Tuple, QPixmap]" = OrderedDict()
+
+    @staticmethod
+    def settings_hash(*settings) -> int:
+        """Хэш настроек отрисовки: классы настроек (UPPER_CASE атрибуты) или простые значения"""
+        parts = []
+        for item in settings:
+            if isinstance(item, type):
+                # dir() - с учетом настроек, унаследованных от базового класса
+                parts.append((item.__name__, tuple(
+                    (name, repr(getattr(item, name))) for name in dir(item)
+                    if name.isupper() and not callable(getattr(item, name))
+                )))
+            else:
+                parts.append(repr(item))
+        return hash(tuple(parts))
+
+    @classmethod
+    def make_key(cls, chord_name: str, variant: int, display_type: str, scale: float, *settings) -> Tuple:
+        """Ключ кэша: (аккорд, вариант, тип отображения, масштаб, хэш настроек)"""
+        return chord_name, int(variant), display_type, float(scale), cls.settings_hash(*settings)
+
+    @classmethod
+    def get(cls, key: Tuple) -> Optional[QPixmap]:
+        """Получение отрисованного аккорда из кэша"""
+        pixmap = cls._cache.get(key)
+        if pixmap is not None:
+            cls._cache.move_to_end(key)
+            print(f"⚡ Аккорд из кэша отрисовки: {key[0]} вариант {key[1]} ({key[2]})")
+        return pixmap
+
+    @classmethod
+    def put(cls, key: Tuple, pixmap: QPixmap):
+        """Сохранение отрисованного аккорда в кэш"""
+        if pixmap is None or pixmap.isNull():
+            return
+
+        cls._cache[key] = pixmap
+        cls._cache.move_to_end(key)
+        while len(cls._cache) > cls.MAX_SIZE:
+            cls._cache.popitem(last=False)
+
+    @classmethod
+    def clear(cls):
+        """Очистка кэша (например, после изменения настроек отрисовки)"""
+        cls._cache.clear()
+
+
+class ChordRenderer:
+    """Отрисовка аккордов для страницы песен, страницы аккордов и окна просмотра.
+
+    Аккорд рисуется поверх области грифа из ChordManager: координаты элементов
+    переводятся в координаты области и умножаются на масштаб, обводка и стили
+    берутся из класса настроек (ChordRenderSettings или его наследника).
+    Готовые изображения хранятся в ChordRenderCache.
+    """
+
+    # Порядок слоев: лады снизу, открытые струны поверх всего
+    DRAW_ORDER = ('fret', 'barre', 'note', 'open_note')
+
+    @classmethod
+    def render(cls, chord: str, variant: int = 1, display_type: str = "fingers", scale: float = 1.0,
+               settings=ChordRenderSettings) -> QPixmap:
+        """Изображение аккорда; пустой QPixmap, если аккорд нарисовать нельзя"""
+        cache_key = ChordRenderCache.make_key(chord, variant, display_type, scale, settings)
+        cached_pixmap = ChordRenderCache.get(cache_key)
+        if cached_pixmap is not None:
+            return cached_pixmap
+
+        try:
+            pixmap = cls._render(chord, variant, display_type, scale, settings)
+        except Exception as e:
+            print(f"❌ Ошибка отрисовки аккорда {chord} вариант {variant}: {e}")
+            import traceback
+            traceback.print_exc()
+            return QPixmap()
+
+        ChordRenderCache.put(cache_key, pixmap)
+        return pixmap
+
+    @classmethod
+    def _render(cls, chord, variant, display_type, scale, settings) -> QPixmap:
+        from core.chord_manager import ChordManager
+
+        variant_config = cls.get_variant_config(chord, variant)
+        if not variant_config:
+            print(f"❌ Конфигурация не найдена для: {chord} вариант {variant}")
+            return QPixmap()
+
+        elements = cls.get_elements(variant_config, display_type)
+        if not elements:
+            print(f"❌ Нет элементов для аккорда {chord} вариант {variant} в режиме {display_type}")
+            return QPixmap()
+
+        # Базовое изображение хранится в памяти
+        original_pixmap = ChordManager.get_template_pixmap()
+        if original_pixmap.isNull():
+            print("❌ Не удалось загрузить базовое изображение")
+            return QPixmap()
+
+        crop_rect = cls.get_crop_rect(variant_config.get('crop_rect'), original_pixmap)
+        if not crop_rect:
+            print(f"❌ Нет области обрезки для аккорда {chord} вариант {variant}")
+            return QPixmap()
+
+        crop_x, crop_y, crop_width, crop_height = crop_rect
+        width = max(1, int(crop_width * scale))
+        height = max(1, int(crop_height * scale))
+
+        # Область грифа заранее обрезана для RAM кода
+        crop_pixmap = ChordManager.get_template_crop(variant_config.get('ram'))
+        if crop_pixmap is None or crop_pixmap.isNull():
+            crop_pixmap = original_pixmap.copy(crop_x, crop_y, crop_width, crop_height)
+        if (width, height) != (crop_pixmap.width(), crop_pixmap.height()):
+            crop_pixmap = crop_pixmap.scaled(width, height, Qt.IgnoreAspectRatio, Qt.SmoothTransformation)
+
+        result_pixmap = QPixmap(width, height)
+        result_pixmap.fill(Qt.transparent)
+
+        painter = QPainter(result_pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        painter.setRenderHint(QPainter.TextAntialiasing)
+        try:
+            painter.drawPixmap(0, 0, crop_pixmap)
+            cls.draw_elements(painter, cls.apply_settings(elements, settings), crop_rect, scale, settings)
+        finally:
+            painter.end()
+
+        print(f"✅ Сгенерирован аккорд {chord} вариант {variant}: {width}x{height} (масштаб {scale})")
+        return result_pixmap
+
+    @staticmethod
+    def get_variant_config(chord: str, variant: int) -> Optional[Dict]:
+        """Вариант аккорда из ChordManager; несуществующий номер заменяется первым вариантом"""
+        from core.chord_manager import ChordManager
+
+        variants = ChordManager.get_chord_variants(chord)
+        if not variants:
+            return None
+        for variant_config in variants:
+            if variant_config.get('variant_number') == variant:
+                return variant_config
+        if 1 <= variant <= len(variants):
+            return variants[variant - 1]
+        return variants[0]
+
+    @staticmethod
+    def get_elements(variant_config: Dict, display_type: str) -> List[Dict]:
+        """Все элементы для типа отображения (пальцы/ноты) одним списком"""
+        if display_type == "fingers":
+            elements_data = variant_config.get('drawing_elements_fingers', {})
+        else:
+            elements_data = variant_config.get('drawing_elements_notes', {})
+
+        elements = []
+        for elements_list in elements_data.values():
+            elements.extend(elements_list)
+        return elements
+
+    @staticmethod
+    def get_crop_rect(crop_rect, pixmap: QPixmap) -> Optional[Tuple[int, int, int, int]]:
+        """Область обрезки (словарь или кортеж) в виде кортежа в границах изображения"""
+        if not crop_rect:
+            return None
+
+        if isinstance(crop_rect, dict):
+            crop_x = crop_rect.get('x', 0)
+            crop_y = crop_rect.get('y', 0)
+            crop_width = crop_rect.get('width', 0)
+            crop_height = crop_rect.get('height', 0)
+        elif isinstance(crop_rect, (list, tuple)) and len(crop_rect) == 4:
+            crop_x, crop_y, crop_width, crop_height = crop_rect
+        else:
+            print(f"❌ Неверный формат crop_rect: {type(crop_rect)}")
+            return None
+
+        crop_x = max(0, min(crop_x, pixmap.width() - 1))
+        crop_y = max(0, min(crop_y, pixmap.height() - 1))
+        crop_width = max(1, min(crop_width, pixmap.width() - crop_x))
+        crop_height = max(1, min(crop_height, pixmap.height() - crop_y))
+        return int(crop_x), int(crop_y), int(crop_width), int(crop_height)
+
+    @classmethod
+    def apply_settings(cls, elements: List[Dict], settings=ChordRenderSettings) -> List[Dict]:
+        """Копии элементов с обводкой и стилями из настроек"""
+        modified_elements = []
+        for element in elements:
+            if not isinstance(element, dict):
+                continue
+
+            element_type = element.get('type')
+            element_data = dict(element.get('data', {}))
+
+            if element_type == 'barre':
+                if element_data.get('style') in (None, '', 'default'):
+                    element_data['style'] = settings.BARRE_STYLE
+                cls._set_outline(element_data, settings.OUTLINE_BARRE_WIDTH, settings)
+
+            elif element_type == 'note':
+                cls._set_outline(element_data, settings.OUTLINE_NOTE_WIDTH, settings)
+                if settings.NOTE_STYLE is not None:
+                    element_data['style'] = settings.NOTE_STYLE
+                if settings.NOTE_TEXT_COLOR is not None:
+                    element_data['text_color'] = settings.NOTE_TEXT_COLOR
+
+                # Ноте нужен текст для отображения
+                if not element_data.get('finger') and not element_data.get('note_name'):
+                    element_data['finger'] = element_data.get('symbol') or '?'
+
+                if settings.ADAPTIVE_TEXT_ENABLED:
+                    symbol = element_data.get('finger') or element_data.get('note_name', '')
+                    if symbol and len(symbol) > 1:
+                        radius = element_data.get('radius', 12)
+                        element_data['radius'] = max(settings.MIN_NOTE_RADIUS,
+                                                     radius - settings.LONG_SYMBOL_RADIUS_REDUCTION)
+
+            elif element_type == 'fret':
+                cls._set_outline(element_data, settings.OUTLINE_FRET_WIDTH, settings)
+                if settings.FRET_STYLE is not None:
+                    element_data['style'] = settings.FRET_STYLE
+                if settings.FRET_TEXT_COLOR is not None:
+                    element_data['color'] = settings.FRET_TEXT_COLOR
+
+            elif element_type == 'open_note':
+                cls._set_outline(element_data, settings.OUTLINE_OPEN_NOTE_WIDTH, settings)
+
+            else:
+                print(f"❓ Неизвестный тип элемента: {element_type}")
+                continue
+
+            modified_elements.append({'type': element_type, 'data': element_data})
+
+        return modified_elements
+
+    @staticmethod
+    def _set_outline(element_data: Dict, width, settings):
+        if width is not None:
+            element_data['outline_width'] = width
+            element_data['outline_color'] = settings.OUTLINE_COLOR
+
+    @classmethod
+    def draw_elements(cls, painter: QPainter, elements: List[Dict], crop_rect, scale: float = 1.0,
+                      settings=ChordRenderSettings):
+        """Рисование элементов слоями в порядке DRAW_ORDER"""
+        for element_type in cls.DRAW_ORDER:
+            for element in elements:
+                if element['type'] != element_type:
+                    continue
+                try:
+                    data = cls.adapt_coordinates(element['data'], crop_rect, scale, settings)
+                    if element_type == 'fret':
+                        DrawingElements.draw_fret(painter, data)
+                    elif element_type == 'barre':
+                        DrawingElements.draw_barre(painter, data)
+                    else:
+                        # Открытые струны рисуются как ноты
+                        DrawingElements.draw_note(painter, data)
+                except Exception as e:
+                    print(f"❌ Ошибка рисования элемента {element_type}: {e}")
+
+    @staticmethod
+    def adapt_coordinates(element_data: Dict, crop_rect, scale: float = 1.0,
+                          settings=ChordRenderSettings) -> Dict:
+        """Координаты грифа -> координаты изображения аккорда с учетом масштаба"""
+        adapted_data = element_data.copy()
+        crop_x, crop_y, _, _ = crop_rect
+
+        x = element_data.get('x', 0) - crop_x
+        y = element_data.get('y', 0) - crop_y
+
+        # Крупные прямоугольники (баре) заданы центром - переводим в левый верхний угол
+        width = element_data.get('width')
+        height = element_data.get('height')
+        if width and height and width > 50 and height > 50:
+            x -= width // 2
+            y -= height // 2
+
+        adapted_data['x'] = int(round(x * scale))
+        adapted_data['y'] = int(round(y * scale))
+
+        if scale != 1.0:
+            for size_key in ('width', 'height', 'size'):
+                if size_key in adapted_data:
+                    adapted_data[size_key] = int(adapted_data[size_key] * scale)
+            if 'radius' in adapted_data:
+                adapted_data['radius'] = max(settings.MIN_NOTE_RADIUS, int(adapted_data['radius'] * scale))
+
+        return adapted_data
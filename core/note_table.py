@@ -0,0 +1,75 @@
+# core/note_table.py
+import math
+import re
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+NOTE_NAMES = ('C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B')
+A4_MIDI = 69
+
+_NOTE_RE = re.compile(r'^([A-G])(#|b)?(-?\d+)$')
+
+
+def note_to_midi(note: str) -> int:
+    """Номер MIDI по названию ноты ('E2', 'D#3', 'Bb1')"""
+    match = _NOTE_RE.match(note.strip())
+    if not match:
+        raise ValueError(f"Некорректное название ноты: {note}")
+    letter, accidental, octave = match.groups()
+    semitone = NOTE_NAMES.index(letter) + {'#': 1, 'b': -1}.get(accidental, 0)
+    return (int(octave) + 1) * 12 + semitone
+
+
+def midi_to_note(midi: int) -> str:
+    return f"{NOTE_NAMES[midi % 12]}{midi // 12 - 1}"
+
+
+class NoteTable:
+    """Равномерно темперированный строй: ближайшая нота за O(1).
+
+    Номер ноты - round(12 * log2(f / A4)), без перебора таблицы частот.
+    Если задан строй, ноты его струн отмечаются отдельно (in_tuning).
+    """
+
+    MIN_MIDI = 0
+    MAX_MIDI = 127
+
+    def __init__(self, a4: float = 440.0, tuning: Optional[Iterable[str]] = None):
+        self.a4 = a4
+        self.set_tuning(tuning or ())
+
+        # Предвычисленные частоты и названия всех нот MIDI
+        midi = np.arange(self.MIN_MIDI, self.MAX_MIDI + 1)
+        self.frequencies = a4 * np.power(2.0, (midi - A4_MIDI) / 12.0)
+        self.names = np.array([midi_to_note(int(m)) for m in midi])
+
+    def set_tuning(self, tuning: Iterable[str]):
+        """Ноты струн выбранного строя"""
+        self.tuning_midi = frozenset(note_to_midi(note) for note in tuning)
+
+    def frequency(self, note: str) -> float:
+        return float(self.frequencies[note_to_midi(note) - self.MIN_MIDI])
+
+    def nearest(self, frequency: float) -> Tuple[str, float, float, bool]:
+        """(нота, частота ноты, отклонение в центах, нота струны строя)"""
+        midi = A4_MIDI + round(12.0 * math.log2(frequency / self.a4))
+        midi = min(max(midi, self.MIN_MIDI), self.MAX_MIDI)
+        target = float(self.frequencies[midi - self.MIN_MIDI])
+        cents = 1200.0 * math.log2(frequency / target)
+        return str(self.names[midi - self.MIN_MIDI]), target, cents, midi in self.tuning_midi
+
+    def nearest_batch(self, frequencies) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Векторная версия nearest для массива частот (частоты <= 0 и NaN - нота '')"""
+        frequencies = np.asarray(frequencies, dtype=np.float64)
+        valid = np.isfinite(frequencies) & (frequencies > 0)
+        safe = np.where(valid, frequencies, self.a4)
+
+        midi = A4_MIDI + np.rint(12.0 * np.log2(safe / self.a4)).astype(np.int64)
+        np.clip(midi, self.MIN_MIDI, self.MAX_MIDI, out=midi)
+        targets = self.frequencies[midi - self.MIN_MIDI]
+        cents = np.where(valid, 1200.0 * np.log2(safe / targets), np.nan)
+
+        names = np.where(valid, self.names[midi - self.MIN_MIDI], '')
+        in_tuning = valid & np.isin(midi, list(self.tuning_midi))
+        return names, np.where(valid, targets, np.nan), cents, in_tuning
@@ -0,0 +1,188 @@
+# core/pitch_detector.py
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+
+@dataclass
+class PitchResult:
+    """Результат анализа одного кадра"""
+    frequency: Optional[float]  # None - основная частота не найдена в диапазоне
+    magnitudes: np.ndarray  # амплитудный спектр кадра (для визуализации)
+
+
+class PitchDetector:
+    """Определение основной частоты по кадрам фиксированного размера.
+
+    Окно, частоты бинов и буферы вычисляются один раз при создании.
+    Методы:
+        fft  - пик спектра с параболической интерполяцией
+        hps  - произведение гармонических спектров (устойчив к захвату гармоник)
+        yin  - алгоритм YIN во временной области (точнее на низких частотах)
+    Не зависит от Qt и PyAudio - подходит для анализа файлов и тестов.
+    """
+
+    METHODS = ('fft', 'hps', 'yin')
+    HPS_MIN_RELATIVE_PEAK = 0.1
+
+    def __init__(self, sample_rate=44100, frame_size=2048, method='yin',
+                 min_freq=60.0, max_freq=1200.0, harmonics=4, yin_threshold=0.15):
+        if method not in self.METHODS:
+            raise ValueError(f"Неизвестный метод определения высоты тона: {method}")
+
+        self.sample_rate = sample_rate
+        self.frame_size = frame_size
+        self.method = method
+        self.min_freq = min_freq
+        self.max_freq = max_freq
+        self.harmonics = harmonics
+        self.yin_threshold = yin_threshold
+
+        # Предвычисленные окно и частоты бинов
+        self.window = np.hanning(frame_size).astype(np.float32)
+        self.frequencies = np.fft.rfftfreq(frame_size, 1.0 / sample_rate)
+        self.bin_width = sample_rate / frame_size
+        self.min_bin = max(1, int(np.floor(min_freq / self.bin_width)))
+        self.max_bin = min(len(self.frequencies) - 2, int(np.ceil(max_freq / self.bin_width)))
+
+        # Буферы, переиспользуемые между кадрами
+        self._frame = np.zeros(frame_size, dtype=np.float32)
+        self._windowed = np.zeros(frame_size, dtype=np.float32)
+        self._magnitudes = np.zeros(len(self.frequencies), dtype=np.float64)
+        self._hps = np.zeros(len(self.frequencies), dtype=np.float64)
+
+        # Диапазон задержек YIN (в отсчетах). Период min_freq должен помещаться
+        # в половину кадра: иначе низкие ноты "прилипают" к границе диапазона
+        # и определяются с ошибкой (E1 41.2 Гц при кадре 2048 дает ~43 Гц)
+        self.min_tau = max(2, int(sample_rate / max_freq))
+        self.max_tau = int(np.ceil(sample_rate / min_freq))
+        if method == 'yin' and self.max_tau > frame_size // 2:
+            min_frame = 1 << int(np.ceil(np.log2(2 * self.max_tau)))
+            raise ValueError(f"Кадр {frame_size} слишком мал для {min_freq} Гц (нужно не меньше {min_frame})")
+
+    def _load_frame(self, samples):
+        """Копирование кадра в буфер (короткий кадр дополняется нулями)"""
+        samples = np.asarray(samples)
+        count = min(len(samples), self.frame_size)
+        self._frame[:count] = samples[:count]
+        self._frame[count:] = 0.0
+        return self._frame
+
+    def _spectrum(self, frame):
+        np.multiply(frame, self.window, out=self._windowed)
+        np.abs(np.fft.rfft(self._windowed), out=self._magnitudes)
+        return self._magnitudes
+
+    @staticmethod
+    def _parabolic_offset(left, center, right):
+        """Смещение вершины параболы через три точки (в долях шага, -0.5..0.5)"""
+        denominator = left - 2.0 * center + right
+        if denominator == 0:
+            return 0.0
+        return float(np.clip(0.5 * (left - right) / denominator, -0.5, 0.5))
+
+    def _interpolated_frequency(self, magnitudes, peak_bin):
+        """Частота пика с параболической интерполяцией по логарифму амплитуды"""
+        if not 0 < peak_bin < len(magnitudes) - 1:
+            return float(self.frequencies[peak_bin])
+        left, center, right = np.log(magnitudes[peak_bin - 1:peak_bin + 2] + 1e-12)
+        return (peak_bin + self._parabolic_offset(left, center, right)) * self.bin_width
+
+    def _detect_fft(self, magnitudes):
+        band = magnitudes[self.min_bin:self.max_bin + 1]
+        if not band.any():
+            return None
+        peak_bin = self.min_bin + int(np.argmax(band))
+        return self._interpolated_frequency(magnitudes, peak_bin)
+
+    def _detect_hps(self, magnitudes):
+        hps = self._hps
+        hps[:] = magnitudes
+        for harmonic in range(2, self.harmonics + 1):
+            decimated = magnitudes[::harmonic]
+            hps[:len(decimated)] *= decimated
+            hps[len(decimated):] = 0.0
+
+        band = hps[self.min_bin:self.max_bin + 1]
+        if not band.any():
+            return None
+        peak_bin = self.min_bin + int(np.argmax(band))
+
+        # Уточнение по исходному спектру: подъем к ближайшему локальному максимуму
+        # (на низких частотах бин HPS может попасть на склон пика)
+        for _ in range(2):
+            if peak_bin + 1 < len(magnitudes) and magnitudes[peak_bin + 1] > magnitudes[peak_bin]:
+                peak_bin += 1
+            elif peak_bin > 1 and magnitudes[peak_bin - 1] > magnitudes[peak_bin]:
+                peak_bin -= 1
+            else:
+                break
+
+        # Почти чистый тон (без гармоник): в исходном спектре на найденной частоте
+        # энергии нет - берем обычный пик спектра
+        spectrum_peak = self.min_bin + int(np.argmax(magnitudes[self.min_bin:self.max_bin + 1]))
+        if magnitudes[peak_bin] < self.HPS_MIN_RELATIVE_PEAK * magnitudes[spectrum_peak]:
+            peak_bin = spectrum_peak
+        return self._interpolated_frequency(magnitudes, peak_bin)
+
+    def _detect_yin(self, frame):
+        max_tau = self.max_tau
+        window = self.frame_size - max_tau
+        if window <= 0 or max_tau <= self.min_tau:
+            return None
+
+        # Разностная функция через автокорреляцию (FFT)
+        x = frame.astype(np.float64)
+        size = 1 << int(np.ceil(np.log2(self.frame_size + window)))
+        spectrum = np.fft.rfft(x, size)
+        kernel = np.fft.rfft(x[:window][::-1], size)
+        correlation = np.fft.irfft(spectrum * kernel, size)[window - 1:window - 1 + max_tau + 1]
+
+        energy = np.cumsum(x * x)
+        energy_head = energy[window - 1]
+        taus = np.arange(max_tau + 1)
+        energy_shift = energy[taus + window - 1] - np.concatenate(([0.0], energy[:max_tau]))
+        difference = energy_head + energy_shift - 2.0 * correlation
+
+        # Кумулятивная нормированная разностная функция
+        cmnd = np.ones(max_tau + 1)
+        cumulative = np.cumsum(difference[1:])
+        cmnd[1:] = difference[1:] * taus[1:] / np.where(cumulative == 0, 1.0, cumulative)
+
+        candidates = np.nonzero(cmnd[self.min_tau:max_tau] < self.yin_threshold)[0]
+        if len(candidates):
+            tau = self.min_tau + int(candidates[0])
+            # Спуск до локального минимума
+            while tau + 1 < max_tau and cmnd[tau + 1] < cmnd[tau]:
+                tau += 1
+        else:
+            tau = self.min_tau + int(np.argmin(cmnd[self.min_tau:max_tau]))
+            if cmnd[tau] > 0.5:
+                return None
+
+        offset = self._parabolic_offset(cmnd[tau - 1], cmnd[tau], cmnd[tau + 1]) if tau + 1 <= max_tau else 0.0
+        return self.sample_rate / (tau + offset)
+
+    def detect(self, samples) -> PitchResult:
+        """Основная частота кадра (int16/float отсчеты одного канала)"""
+        frame = self._load_frame(samples)
+        magnitudes = self._spectrum(frame)
+
+        if self.method == 'yin':
+            frequency = self._detect_yin(frame)
+        elif self.method == 'hps':
+            frequency = self._detect_hps(magnitudes)
+        else:
+            frequency = self._detect_fft(magnitudes)
+
+        if frequency is not None and not self.min_freq < frequency < self.max_freq:
+            frequency = None
+        return PitchResult(frequency, magnitudes.copy())
+
+    def iter_detect(self, samples, hop=None):
+        """Анализ длинного сигнала кадрами: (время начала кадра в секундах, частота или None)"""
+        samples = np.asarray(samples)
+        hop = hop or self.frame_size
+        for start in range(0, max(len(samples) - self.frame_size, 0) + 1, hop):
+            yield start / self.sample_rate, self.detect(samples[start:start + self.frame_size]).frequency
@@ -0,0 +1,76 @@
+# core/search_controller.py
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from core.workers import start_task
+
+
+class SearchController(QObject):
+    """Поиск вне главного потока: задержка ввода и отмена устаревших запросов.
+
+    search_fn(token, report, query) выполняется в пуле потоков и возвращает список
+    (сигнатура start_task; report поиском не используется).
+    """
+
+    # (запрос, результаты)
+    results_ready = pyqtSignal(str, list)
+    search_failed = pyqtSignal(str, str)
+
+    DEBOUNCE_MS = 250
+
+    def __init__(self, search_fn, parent=None, debounce_ms=None):
+        super().__init__(parent)
+        self.search_fn = search_fn
+        self._task = None
+        self._query = ""
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS if debounce_ms is None else debounce_ms)
+        self._timer.timeout.connect(self._start)
+
+    def request(self, query):
+        """Поиск при вводе: запускается после паузы в наборе"""
+        self._query = query.strip()
+        self._cancel_task()
+        if self._query:
+            self._timer.start()
+        else:
+            self._timer.stop()
+
+    def search_now(self, query):
+        """Поиск без задержки (Enter, кнопка «Найти»)"""
+        self._timer.stop()
+        self._query = query.strip()
+        self._cancel_task()
+        if self._query:
+            self._start()
+
+    def cancel(self):
+        self._timer.stop()
+        self._cancel_task()
+
+    def _cancel_task(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _start(self):
+        self._cancel_task()
+        self._task = start_task(
+            self.search_fn, self._query,
+            on_finished=self._on_finished,
+            on_failed=self._on_failed
+        )
+
+    def _is_current(self, token):
+        return self._task is not None and token is self._task.token
+
+    def _on_finished(self, token, results):
+        if self._is_current(token):
+            self._task = None
+            self.results_ready.emit(self._query, list(results or []))
+
+    def _on_failed(self, token, error):
+        if self._is_current(token):
+            self._task = None
+            self.search_failed.emit(self._query, error)
@@ -0,0 +1,222 @@
+# core/song_loader.py
+import hashlib
+import html
+import marshal
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from database.queries import SongQueries
+from config.settings import AppSettings
+from utils.chord_parser import ChordParser, CHORD_LINK_CSS
+
+SONG_HTML_TEMPLATE = """
+            <style>{css}</style>
+            <div style="font-family: 'Segoe UI', Arial, sans-serif; font-size: 11pt; line-height: 1.4; color: #ecf0f1; white-space: pre-wrap;">
+                {text}
+            </div>
+            """
+
+
+class SongLoadCancelled(Exception):
+    """Загрузка песни отменена (пользователь выбрал другую песню)"""
+
+
+def parse_chords(chords_raw: Optional[str]) -> List[str]:
+    """Список аккордов песни из поля song_chord"""
+    if not chords_raw:
+        return []
+    return [ch.strip() for ch in chords_raw.split(',') if ch.strip()]
+
+
+def process_song_text(raw_text: str, chords_list: List[str]) -> str:
+    """Текст песни с аккордами-ссылками (без обертки)"""
+    if chords_list:
+        return ChordParser.word_by_word_processing(raw_text, chords_list)
+
+    lines_clean = [line for line in raw_text.split('\n') if line.strip()]
+    return '<br>'.join(html.escape(line) for line in lines_clean)
+
+
+def build_song_html(raw_text: str, chords_list: List[str]) -> str:
+    """HTML текста песни с аккордами-ссылками"""
+    return wrap_song_html(process_song_text(raw_text, chords_list))
+
+
+def wrap_song_html(processed_text: str) -> str:
+    return SONG_HTML_TEMPLATE.format(css=CHORD_LINK_CSS, text=processed_text)
+
+
+def iter_song_blocks(song_link: str, chords_list: List[str], block_lines: int = None):
+    """Чтение большого файла песни блоками строк: каждый блок сразу обрабатывается,
+    весь файл в памяти не собирается"""
+    block_lines = block_lines or AppSettings.SONG_STREAM_BLOCK_LINES
+    block = []
+    with open(song_link, 'r', encoding='utf-8-sig') as f:
+        # Первые три строки - заголовок песни
+        for line_number, line in enumerate(f):
+            if line_number < 3 or not line.strip():
+                continue
+            block.append(line)
+            if len(block) >= block_lines:
+                yield process_song_text(''.join(block), chords_list)
+                block = []
+
+    if block:
+        yield process_song_text(''.join(block), chords_list)
+
+
+class ProcessedSongCache:
+    """LRU кэш обработанных песен в памяти и (необязательно) на диске.
+
+    Ключ - (путь к файлу, время изменения файла, хэш списка аккордов), поэтому
+    правка файла или аккордов песни в базе делает запись недействительной.
+    """
+
+    MAX_SIZE = AppSettings.SONG_CACHE_SIZE
+    DISK_DIR = AppSettings.SONG_CACHE_DIR
+    # Меняется вместе с форматом HTML, чтобы не использовать старые записи с диска
+    VERSION = 2
+
+    _cache: "OrderedDict[Tuple, dict]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def make_key(song_link: str, chords_list: List[str]) -> Tuple:
+        """Ключ кэша; os.stat выбрасывает исключение, если файла нет"""
+        mtime = os.stat(song_link).st_mtime_ns
+        chords_hash = hashlib.sha1(','.join(chords_list).encode('utf-8')).hexdigest()
+        return song_link, mtime, chords_hash
+
+    @classmethod
+    def _disk_path(cls, song_link: str) -> Optional[str]:
+        if not cls.DISK_DIR:
+            return None
+        # Один файл на песню: новая версия перезаписывает старую
+        name = hashlib.sha1(song_link.encode('utf-8')).hexdigest()
+        return os.path.join(cls.DISK_DIR, f"{name}.cache")
+
+    @classmethod
+    def get(cls, key: Tuple) -> Optional[dict]:
+        """Обработанная песня {'chords': [...], 'blocks': [html, ...]} или None"""
+        with cls._lock:
+            song = cls._cache.get(key)
+            if song is not None:
+                cls._cache.move_to_end(key)
+                return song
+
+        song = cls._read_disk(key)
+        if song is not None:
+            cls._remember(key, song)
+        return song
+
+    @classmethod
+    def put(cls, key: Tuple, song: dict):
+        cls._remember(key, song)
+        cls._write_disk(key, song)
+
+    @classmethod
+    def _remember(cls, key: Tuple, song: dict):
+        with cls._lock:
+            cls._cache[key] = song
+            cls._cache.move_to_end(key)
+            while len(cls._cache) > cls.MAX_SIZE:
+                cls._cache.popitem(last=False)
+
+    @classmethod
+    def _read_disk(cls, key: Tuple) -> Optional[dict]:
+        path = cls._disk_path(key[0])
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                entry = marshal.load(f)
+            if entry.get('version') != cls.VERSION or tuple(entry.get('key', ())) != key:
+                return None
+            return {'chords': list(entry['chords']), 'blocks': list(entry['blocks'])}
+        except Exception as e:
+            print(f"❌ Ошибка чтения кэша песни {path}: {e}")
+            return None
+
+    @classmethod
+    def _write_disk(cls, key: Tuple, song: dict):
+        path = cls._disk_path(key[0])
+        if path is None:
+            return
+        try:
+            os.makedirs(cls.DISK_DIR, exist_ok=True)
+            entry = {'version': cls.VERSION, 'key': key, 'chords': song['chords'], 'blocks': song['blocks']}
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                marshal.dump(entry, f)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"❌ Ошибка записи кэша песни {path}: {e}")
+
+    @classmethod
+    def clear(cls):
+        """Очистка кэша в памяти"""
+        with cls._lock:
+            cls._cache.clear()
+
+
+def load_song(token, report, song_title: str) -> dict:
+    """Загрузка песни для фонового потока: данные из базы, чтение файла и сборка HTML.
+
+    Между шагами проверяется token.cancelled, чтобы не делать лишнюю работу
+    для песни, которую пользователь уже сменил. Большие файлы отдаются блоками
+    через report({'index', 'chords', 'html'}) - первый экран появляется сразу,
+    а в итоговом результате 'streamed' = True и 'html' = None.
+    """
+    def check_cancelled():
+        if token is not None and token.cancelled:
+            raise SongLoadCancelled(song_title)
+
+    song_info = SongQueries.get_song_info(song_title)
+    if not song_info:
+        raise LookupError(f"Песня не найдена: {song_title}")
+    check_cancelled()
+
+    song_link = f'{song_info[4]}'
+    chords_list = parse_chords(song_info[3])
+
+    # Повторное открытие песни - без чтения файла и разбора аккордов
+    cache_key = ProcessedSongCache.make_key(song_link, chords_list)
+    cached = ProcessedSongCache.get(cache_key)
+    stream = report is not None and (
+        len(cached['blocks']) > 1 if cached is not None
+        else os.path.getsize(song_link) > AppSettings.SONG_STREAM_THRESHOLD
+    )
+
+    if cached is not None:
+        blocks = cached['blocks']
+    elif stream:
+        blocks = []
+        for block in iter_song_blocks(song_link, chords_list):
+            check_cancelled()
+            report({'index': len(blocks), 'chords': list(chords_list), 'html': wrap_song_html(block)})
+            blocks.append(block)
+    else:
+        with open(song_link, 'r', encoding='utf-8-sig') as f:
+            lines = f.readlines()
+        check_cancelled()
+
+        if len(lines) >= 3:
+            lines = lines[3:]
+
+        blocks = [process_song_text(''.join(lines), chords_list)]
+
+    if cached is None:
+        ProcessedSongCache.put(cache_key, {'chords': chords_list, 'blocks': blocks})
+    elif stream:
+        for index, block in enumerate(blocks):
+            check_cancelled()
+            report({'index': index, 'chords': list(chords_list), 'html': wrap_song_html(block)})
+    check_cancelled()
+
+    if stream and blocks:
+        return {'title': song_title, 'chords': list(chords_list), 'html': None, 'streamed': True}
+    # Строки внутри блока соединены <br> - между блоками тоже нужен перевод строки
+    return {'title': song_title, 'chords': list(chords_list),
+            'html': wrap_song_html('<br>'.join(blocks)), 'streamed': False}
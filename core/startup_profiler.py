@@ -0,0 +1,201 @@
+# core/startup_profiler.py
+"""
+Профилирование запуска приложения (main.py --profile-startup).
+
+Модуль импортируется до остального приложения и сам ничего тяжелого не импортирует:
+время этапов запуска и стоимость каждого импорта записываются в отчет,
+превышение бюджета из AppSettings считается регрессией.
+"""
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+
+from config.settings import AppSettings
+
+
+class _ImportTimer(MetaPathFinder):
+    """Finder в начале sys.meta_path: сам модули не ищет, а оборачивает загрузчик,
+    найденный остальными finder'ами, замером create_module/exec_module."""
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self._searching = set()
+
+    def find_spec(self, name, path, target=None):
+        if name in self._searching:
+            return None
+        self._searching.add(name)
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, 'find_spec'):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._searching.discard(name)
+
+        loader = spec.loader
+        # Встроенные и замороженные модули грузятся классом-загрузчиком - его не трогаем
+        if loader is None or isinstance(loader, type) or not hasattr(loader, 'exec_module'):
+            return spec
+        self._wrap(loader, 'create_module', name)
+        self._wrap(loader, 'exec_module', name)
+        return spec
+
+    def _wrap(self, loader, method_name, name):
+        method = getattr(loader, method_name, None)
+        if method is None:
+            return
+        profiler = self.profiler
+
+        def timed(*args):
+            with profiler.measure_import(name):
+                return method(*args)
+
+        # Атрибут экземпляра: isinstance-проверки загрузчика продолжают работать
+        setattr(loader, method_name, timed)
+
+
+class StartupProfiler:
+    """Замер этапов запуска и импортов.
+
+    Для каждого модуля хранится полное время (вместе с вложенными импортами)
+    и собственное время (без них) - по собственному времени видно, какой
+    именно модуль тормозит (например, выполняет работу при импорте).
+    """
+
+    REPORT_PATH = AppSettings.STARTUP_PROFILE_PATH
+    PHASE_BUDGETS_MS = AppSettings.STARTUP_PHASE_BUDGETS_MS
+    MODULE_BUDGET_MS = AppSettings.STARTUP_MODULE_BUDGET_MS
+    TOP_MODULES = 25
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []  # [(название, мс)]
+        self.imports = {}  # модуль -> {'total', 'self', 'parent', 'order'}
+        self._stack = []  # [(модуль, начало, время вложенных импортов)]
+        self._finder = _ImportTimer(self)
+
+    def start(self):
+        if self._finder not in sys.meta_path:
+            sys.meta_path.insert(0, self._finder)
+        return self
+
+    def stop(self):
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+
+    @contextmanager
+    def measure_import(self, name):
+        start = time.perf_counter()
+        self._stack.append([name, start, 0.0])
+        try:
+            yield
+        finally:
+            _, _, children = self._stack.pop()
+            elapsed = time.perf_counter() - start
+            entry = self.imports.setdefault(name, {
+                'total': 0.0, 'self': 0.0,
+                'parent': self._stack[-1][0] if self._stack else None,
+                'order': len(self.imports),
+            })
+            # create_module и exec_module одного модуля складываются
+            entry['total'] += elapsed * 1000
+            entry['self'] += (elapsed - children) * 1000
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    @contextmanager
+    def phase(self, name):
+        """Замер этапа запуска: with profiler.phase('imports'): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, (time.perf_counter() - start) * 1000))
+
+    def mark(self, name):
+        """Этап от конца предыдущего этапа (или от старта) до текущего момента"""
+        elapsed = (time.perf_counter() - self.started) * 1000
+        self.phases.append((name, elapsed - sum(ms for _, ms in self.phases)))
+
+    def total_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def packages(self):
+        """Собственное время импорта, сгруппированное по пакету верхнего уровня"""
+        totals = {}
+        for name, entry in self.imports.items():
+            package = name.split('.', 1)[0]
+            totals[package] = totals.get(package, 0.0) + entry['self']
+        return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+    def check_budget(self):
+        """Список превышений бюджета (пустой - запуск в норме)"""
+        violations = []
+        for name, ms in self.phases:
+            budget = self.PHASE_BUDGETS_MS.get(name)
+            if budget is not None and ms > budget:
+                violations.append(f"этап '{name}': {ms:.0f} мс > {budget} мс")
+
+        total_budget = self.PHASE_BUDGETS_MS.get('total')
+        total = sum(ms for _, ms in self.phases)
+        if total_budget is not None and total > total_budget:
+            violations.append(f"запуск целиком: {total:.0f} мс > {total_budget} мс")
+
+        for name, entry in self.imports.items():
+            if entry['self'] > self.MODULE_BUDGET_MS:
+                violations.append(f"импорт {name}: {entry['self']:.0f} мс > {self.MODULE_BUDGET_MS} мс")
+        return violations
+
+    def report(self):
+        modules = sorted(self.imports.items(), key=lambda item: item[1]['self'], reverse=True)
+        return {
+            'python': sys.version.split()[0],
+            'total_ms': round(sum(ms for _, ms in self.phases), 2),
+            'phases': [{'name': name, 'ms': round(ms, 2)} for name, ms in self.phases],
+            'packages': [{'name': name, 'self_ms': round(ms, 2)} for name, ms in self.packages()],
+            'modules': [
+                {'name': name, 'self_ms': round(entry['self'], 2), 'total_ms': round(entry['total'], 2),
+                 'parent': entry['parent']}
+                for name, entry in modules
+            ],
+            'budget_violations': self.check_budget(),
+        }
+
+    def write_report(self, path=None):
+        """Отчет в JSON и краткая сводка в консоль; возвращает список превышений бюджета"""
+        path = path or self.REPORT_PATH
+        report = self.report()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        print(f"\n⏱️ Профиль запуска: {report['total_ms']:.0f} мс")
+        for phase in report['phases']:
+            print(f"   {phase['name']:<20} {phase['ms']:>9.1f} мс")
+
+        print("📦 Импорты по пакетам (собственное время):")
+        for package in report['packages'][:10]:
+            print(f"   {package['name']:<20} {package['self_ms']:>9.1f} мс")
+
+        print(f"🐢 Самые медленные модули (топ {self.TOP_MODULES}):")
+        for module in report['modules'][:self.TOP_MODULES]:
+            print(f"   {module['name']:<40} {module['self_ms']:>9.1f} мс (всего {module['total_ms']:.1f})")
+
+        violations = report['budget_violations']
+        if violations:
+            print("❌ Превышен бюджет запуска:")
+            for violation in violations:
+                print(f"   - {violation}")
+        else:
+            print("✅ Запуск укладывается в бюджет")
+        print(f"📄 Отчет: {path}")
+        return violations
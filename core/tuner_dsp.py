@@ -0,0 +1,133 @@
+# core/tuner_dsp.py
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+
+from core.pitch_detector import PitchDetector
+
+
+class SampleRingBuffer:
+    """Кольцевой буфер отсчетов: один писатель (аудио-callback), один читатель (DSP-поток).
+
+    Без блокировок: писатель сначала копирует данные, затем сдвигает счетчик
+    записанных отсчетов; читатель берет последние отсчеты по этому счетчику.
+    При переполнении старые данные перезаписываются - тюнеру нужен только свежий звук.
+    """
+
+    def __init__(self, capacity: int, dtype=np.int16):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=dtype)
+        self._written = 0  # всего записано отсчетов (только растет)
+
+    @property
+    def written(self) -> int:
+        return self._written
+
+    def write(self, samples):
+        samples = np.asarray(samples)
+        total = len(samples)
+        if total > self.capacity:
+            samples = samples[-self.capacity:]
+        count = len(samples)
+
+        start = (self._written + total - count) % self.capacity
+        first = min(count, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:count - first] = samples[first:]
+        self._written += total
+
+    def latest(self, count: int, out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Последние count отсчетов в порядке записи"""
+        count = min(count, self.capacity)
+        if out is None:
+            out = np.empty(count, dtype=self._data.dtype)
+        end = self._written % self.capacity
+        start = end - count
+        if start >= 0:
+            out[:] = self._data[start:end]
+        else:
+            out[:-start] = self._data[start:]
+            out[-start:] = self._data[:end]
+        return out
+
+
+class TunerDSPWorker:
+    """Поток анализа звука тюнера.
+
+    Аудио-callback только кладет отсчеты в кольцевой буфер (feed), поток
+    анализирует последний кадр, а интерфейс с фиксированной частотой кадров
+    забирает только самый свежий результат (latest) - очередь не накапливается.
+    """
+
+    SPECTRUM_BARS = 100
+
+    def __init__(self, detector: PitchDetector, hop: Optional[int] = None, buffer_frames: int = 8):
+        self.detector = detector
+        self.hop = hop or detector.frame_size
+        self.ring = SampleRingBuffer(detector.frame_size * buffer_frames)
+
+        self._frame = np.zeros(detector.frame_size, dtype=np.int16)
+        self._data_ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # (номер результата, частота или None, спектр для визуализации)
+        self._latest: Tuple[int, Optional[float], np.ndarray] = (0, None, np.zeros(self.SPECTRUM_BARS))
+
+    def set_detector(self, detector: PitchDetector):
+        """Смена детектора (например, при смене строя) - применяется со следующего кадра"""
+        if detector.frame_size > self.ring.capacity:
+            raise ValueError(f"Кадр детектора ({detector.frame_size}) больше буфера ({self.ring.capacity})")
+        self.detector = detector
+
+    def feed(self, audio_data: bytes):
+        """Вызывается из аудио-callback: только копирование в буфер"""
+        self.ring.write(np.frombuffer(audio_data, dtype=np.int16))
+        self._data_ready.set()
+
+    def latest(self) -> Tuple[int, Optional[float], np.ndarray]:
+        return self._latest
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="TunerDSP", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._data_ready.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        analyzed = 0
+        sequence = 0
+        while not self._stop.is_set():
+            if self.ring.written - analyzed < self.hop:
+                self._data_ready.wait(0.1)
+                self._data_ready.clear()
+                continue
+
+            analyzed = self.ring.written
+            detector = self.detector
+            if self._frame.shape[0] != detector.frame_size:
+                self._frame = np.zeros(detector.frame_size, dtype=np.int16)
+
+            try:
+                self.ring.latest(detector.frame_size, out=self._frame)
+                result = detector.detect(self._frame)
+            except Exception as e:
+                print(f"Ошибка обработки аудио: {e}")
+                continue
+
+            magnitudes = result.magnitudes[:self.SPECTRUM_BARS]
+            peak = magnitudes.max() if len(magnitudes) else 0
+            spectrum = magnitudes / peak if peak > 0 else magnitudes
+
+            sequence += 1
+            # Одно присваивание кортежа - читатель видит либо старый, либо новый результат
+            self._latest = (sequence, result.frequency, spectrum)
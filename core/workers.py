@@ -0,0 +1,75 @@
+# core/workers.py
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class CancelToken:
+    """Флаг отмены фоновой задачи (проверяется самой задачей между шагами)"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+
+class TaskSignals(QObject):
+    """Сигналы фоновой задачи; обработчики выполняются в главном потоке"""
+    partial = pyqtSignal(object, object)  # (токен, промежуточный результат)
+    finished = pyqtSignal(object, object)  # (токен, результат)
+    failed = pyqtSignal(object, str)  # (токен, текст ошибки)
+
+
+class BackgroundTask(QRunnable):
+    """Задача для QThreadPool: fn(token, report, *args) выполняется в рабочем потоке.
+
+    report(value) отправляет промежуточный результат. После отмены токена
+    сигналы не отправляются - результат устаревшего запроса просто теряется.
+    """
+
+    def __init__(self, fn, *args, **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.token = CancelToken()
+        self.signals = TaskSignals()
+
+    def cancel(self):
+        self.token.cancel()
+
+    def report(self, value):
+        if not self.token.cancelled:
+            self.signals.partial.emit(self.token, value)
+
+    def run(self):
+        try:
+            result = self.fn(self.token, self.report, *self.args, **self.kwargs)
+        except Exception as e:
+            # Исключение отмененной задачи - штатное прерывание, не ошибка
+            if not self.token.cancelled:
+                traceback.print_exc()
+                self.signals.failed.emit(self.token, str(e))
+            return
+
+        if not self.token.cancelled:
+            self.signals.finished.emit(self.token, result)
+
+
+def start_task(fn, *args, on_finished=None, on_failed=None, on_partial=None, **kwargs) -> BackgroundTask:
+    """Запуск функции в общем пуле потоков Qt"""
+    task = BackgroundTask(fn, *args, **kwargs)
+    if on_finished:
+        task.signals.finished.connect(on_finished)
+    if on_failed:
+        task.signals.failed.connect(on_failed)
+    if on_partial:
+        task.signals.partial.connect(on_partial)
+    QThreadPool.globalInstance().start(task)
+    return task
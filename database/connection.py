@@ -0,0 +1,290 @@
+# database/connection.py
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeoutError(Exception):
+    """Не удалось получить соединение из пула за отведенное время"""
+
+
+class PooledConnection:
+    """Соединение из пула: close() возвращает его в пул вместо закрытия.
+
+    with get_connection() as conn: - транзакция, как у connection():
+    commit при успехе, rollback при ошибке, затем возврат соединения в пул.
+    """
+
+    def __init__(self, pool, raw_conn):
+        self._pool = pool
+        self._conn = raw_conn
+
+    def __getattr__(self, name):
+        conn = self.__dict__.get('_conn')
+        if conn is None:
+            raise AttributeError(f"Соединение уже возвращено в пул: {name}")
+        return getattr(conn, name)
+
+    @property
+    def raw(self):
+        """Исходное соединение драйвера"""
+        return self._conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # __getattr__ не подходит: with ищет __enter__/__exit__ у класса
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.close()
+        return False
+
+    def close(self):
+        """Возврат соединения в пул (повторный вызов ничего не делает)"""
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            self._pool.release(conn)
+
+    def __del__(self):
+        # Соединение, не закрытое из-за исключения, все равно возвращается в пул
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """Потокобезопасный пул соединений с проверкой работоспособности при выдаче"""
+
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30.0,
+                 health_check_query="SELECT 1", health_check_interval=30.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError(f"Некорректные размеры пула: min={min_size}, max={max_size}")
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_query = health_check_query
+        self.health_check_interval = health_check_interval
+
+        self._idle = deque()  # (соединение, время возврата в пул)
+        self._size = 0
+        self._closed = False
+        self._filled = False
+        self._cond = threading.Condition(threading.RLock())
+
+    @property
+    def size(self):
+        """Количество открытых соединений (выданных и свободных)"""
+        return self._size
+
+    @property
+    def idle_count(self):
+        return len(self._idle)
+
+    def _fill_min(self):
+        """Открытие минимального количества соединений при первом обращении"""
+        with self._cond:
+            if self._filled:
+                return
+            self._filled = True
+            missing = max(0, self.min_size - self._size)
+            self._size += missing
+
+        for _ in range(missing):
+            try:
+                conn = self._connect()
+            except Exception as e:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                print(f"Ошибка открытия соединения пула: {e}")
+                continue
+            with self._cond:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+
+    def _is_healthy(self, conn, idle_since):
+        """Проверка соединения, простоявшего в пуле дольше health_check_interval"""
+        if getattr(conn, 'closed', 0):
+            return False
+        if not self.health_check_query or time.monotonic() - idle_since < self.health_check_interval:
+            return True
+        try:
+            curs = conn.cursor()
+            curs.execute(self.health_check_query)
+            curs.fetchall()
+            curs.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, conn):
+        """Закрытие неисправного соединения и освобождение места в пуле"""
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+
+    def acquire(self):
+        """Получение соединения из пула (ждет освобождения, если пул заполнен)"""
+        self._fill_min()
+        deadline = time.monotonic() + self.timeout
+
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise PoolTimeoutError("Пул соединений закрыт")
+
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise PoolTimeoutError(
+                            f"Нет свободных соединений в пуле (max={self.max_size}) за {self.timeout} с")
+                    self._cond.wait(remaining)
+
+                if self._idle:
+                    conn, idle_since = self._idle.pop()
+                else:
+                    conn, idle_since = None, None
+                    self._size += 1
+
+            if conn is None:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+                return PooledConnection(self, conn)
+
+            if self._is_healthy(conn, idle_since):
+                return PooledConnection(self, conn)
+
+            # Соединение устарело - закрываем и пробуем следующее
+            self._discard(conn)
+
+    def release(self, conn):
+        """Возврат соединения в пул с откатом незавершенной транзакции"""
+        if getattr(conn, 'closed', 0):
+            self._discard(conn)
+            return
+
+        try:
+            conn.rollback()
+        except Exception:
+            self._discard(conn)
+            return
+
+        with self._cond:
+            if self._closed:
+                self._size -= 1
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                return
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self):
+        """Транзакция на соединении из пула: commit при успехе, rollback при ошибке"""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    def close(self):
+        """Закрытие всех свободных соединений; выданные закроются при возврате"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def _default_connect():
+    """Соединение с PostgreSQL по параметрам из const"""
+    import psycopg2
+    from const import DBNAME, USER, PASSWORD, HOST
+    return psycopg2.connect(dbname=DBNAME, user=USER, password=PASSWORD, host=HOST)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _create_pool(connect=None, min_size=None, max_size=None, **kwargs):
+    if min_size is None or max_size is None:
+        from const import DB_POOL_MIN, DB_POOL_MAX
+        min_size = DB_POOL_MIN if min_size is None else min_size
+        max_size = DB_POOL_MAX if max_size is None else max_size
+
+    return ConnectionPool(connect or _default_connect, min_size=min_size, max_size=max_size, **kwargs)
+
+
+def configure_pool(connect=None, min_size=None, max_size=None, **kwargs):
+    """Создание (или замена) общего пула. connect - фабрика соединений, например sqlite3.connect"""
+    global _pool
+
+    new_pool = _create_pool(connect, min_size, max_size, **kwargs)
+    with _pool_lock:
+        old_pool, _pool = _pool, new_pool
+
+    if old_pool is not None:
+        old_pool.close()
+    return new_pool
+
+
+def get_pool():
+    """Общий пул соединений (создается при первом обращении)"""
+    global _pool
+
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = _create_pool()
+    return _pool
+
+
+def get_connection():
+    """Соединение из общего пула; conn.close() возвращает его в пул"""
+    return get_pool().acquire()
+
+
+def connection():
+    """Контекстный менеджер транзакции на соединении из общего пула"""
+    return get_pool().connection()
+
+
+def close_pool():
+    """Закрытие общего пула (при завершении приложения)"""
+    global _pool
+    with _pool_lock:
+        old_pool, _pool = _pool, None
+    if old_pool is not None:
+        old_pool.close()
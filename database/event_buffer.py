@@ -0,0 +1,281 @@
+# database/event_buffer.py
+import atexit
+import datetime as dt
+import threading
+from collections import defaultdict
+
+from database.connection import connection
+from database.statistics import add_late_events
+
+# Столбец времени, имя которого берется из схемы базы (в clicks он известен только по позиции)
+SCHEMA_TIME_COLUMN = object()
+
+# Журналы событий: таблица -> столбцы вставки
+EVENT_TABLES = {
+    'users_statistic': ('user_id', 'content_type', 'content_name', 'time'),
+    'views_type': ('user_id', 'content_type', 'time_update'),
+    'clicks': ('telegram_id', 'user_nick', 'site_name', SCHEMA_TIME_COLUMN),
+}
+
+_time_columns = {}  # таблица -> имя столбца времени или None
+
+
+# Счетчик просмотров: атомарное увеличение, строка создается при первом просмотре.
+# Требует уникального индекса views_content_uidx (миграция 003_views_unique_index)
+VIEWS_UPSERT_SUFFIX = """
+    ON CONFLICT (content_name, content_type) DO UPDATE
+    SET count_views = views.count_views + EXCLUDED.count_views,
+        time_update = GREATEST(views.time_update, EXCLUDED.time_update)
+"""
+
+
+def insert_many(curs, table, columns, rows, suffix=""):
+    """Вставка пачки строк одним запросом: execute_values для psycopg2, иначе executemany"""
+    column_list = ", ".join(columns)
+    if hasattr(curs, 'mogrify'):
+        from psycopg2.extras import execute_values
+        execute_values(curs, f"INSERT INTO {table} ({column_list}) VALUES %s {suffix}", rows, page_size=1000)
+    else:
+        placeholders = ", ".join(["%s"] * len(columns))
+        curs.executemany(f"INSERT INTO {table} ({column_list}) VALUES ({placeholders}) {suffix}", rows)
+
+
+def time_column(curs, table):
+    """Имя первого столбца timestamp таблицы (из information_schema, кэшируется)"""
+    if table not in _time_columns:
+        curs.execute("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_name = %s AND data_type LIKE 'timestamp%%'
+            ORDER BY ordinal_position LIMIT 1
+        """, (table,))
+        row = curs.fetchone()
+        _time_columns[table] = row[0] if row else None
+    return _time_columns[table]
+
+
+def insert_events(curs, table, rows):
+    """Вставка строк журнала событий (столбцы - EVENT_TABLES[table])"""
+    columns = EVENT_TABLES[table]
+    if columns[-1] is SCHEMA_TIME_COLUMN:
+        name = time_column(curs, table)
+        if name is None:
+            # Столбца времени нет - время не передается
+            columns, rows = columns[:-1], [row[:-1] for row in rows]
+        else:
+            columns = columns[:-1] + (name,)
+    insert_many(curs, table, columns, rows)
+
+
+def upsert_views(curs, views):
+    """Увеличение счетчиков просмотров одним INSERT ... ON CONFLICT.
+
+    views: {(content_name, content_type): (количество, время последнего просмотра)}.
+    Ключи уникальны (одна строка не может обновиться дважды за запрос) и
+    отсортированы - параллельные процессы блокируют строки в одном порядке
+    и не попадают во взаимную блокировку.
+    """
+    rows = [(content_name, content_type, count, last_time)
+            for (content_name, content_type), (count, last_time) in sorted(views.items())]
+    if rows:
+        insert_many(curs, 'views', ('content_name', 'content_type', 'count_views', 'time_update'),
+                    rows, VIEWS_UPSERT_SUFFIX)
+
+
+class EventBuffer:
+    """Буфер записи статистики: события копятся в памяти и пишутся пачками -
+    по размеру (max_size), по времени (flush_interval) и при завершении
+    процесса (atexit).
+
+    Время события фиксируется при записи в буфер, а не при сбросе, поэтому
+    статистика по периодам не сдвигается. Просмотры (views) суммируются в буфере:
+    N просмотров одной песни - одно обновление счетчика.
+    Если база недоступна, события возвращаются в буфер (не больше max_pending).
+    """
+
+    def __init__(self, max_size=500, flush_interval=5.0, max_pending=50000):
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._rows = defaultdict(list)  # таблица -> [строка]
+        self._views = {}  # (content_name, content_type) -> [количество, время последнего просмотра]
+        self._pending = 0
+
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="EventBuffer", daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self):
+        """Количество событий, ожидающих записи"""
+        return self._pending
+
+    def add_event(self, table, *values):
+        """Строка журнала событий (столбцы - EVENT_TABLES[table])"""
+        with self._lock:
+            self._rows[table].append(values)
+            self._pending += 1
+            full = self._pending >= self.max_size
+        if full:
+            self._wakeup.set()
+
+    def add_statistic(self, user_id, content_type, content_name):
+        self.add_event('users_statistic', user_id, content_type, content_name, dt.datetime.now())
+
+    def add_view(self, user_id, content_type):
+        self.add_event('views_type', user_id, content_type, dt.datetime.now())
+
+    def add_click(self, telegram_id, user_nick, site_name):
+        self.add_event('clicks', telegram_id, user_nick, site_name, dt.datetime.now())
+
+    def increment_views(self, content_name, content_type, count=1):
+        """Счетчик просмотров контента (таблица views)"""
+        with self._lock:
+            entry = self._views.setdefault((content_name, content_type), [0, None])
+            entry[0] += count
+            entry[1] = dt.datetime.now()
+            self._pending += count
+            full = self._pending >= self.max_size
+        if full:
+            self._wakeup.set()
+
+    def rename_content(self, old_name, new_name):
+        """Переименование контента в ожидающих записи событиях (при переименовании песни в базе).
+
+        Ждет окончания текущего сброса: его события уже в базе и будут переименованы
+        вместе с остальными запросом UPDATE.
+        """
+        with self._flush_lock, self._lock:
+            self._replace_content(old_name, new_name)
+
+    def drop_content(self, content_name):
+        """Удаление ожидающих записи событий контента (при удалении песни из базы)"""
+        with self._flush_lock, self._lock:
+            self._replace_content(content_name, None)
+
+    def _replace_content(self, old_name, new_name):
+        name_index = EVENT_TABLES['users_statistic'].index('content_name')
+        rows = []
+        for row in self._rows['users_statistic']:
+            if row[name_index] != old_name:
+                rows.append(row)
+            elif new_name is not None:
+                rows.append(row[:name_index] + (new_name,) + row[name_index + 1:])
+            else:
+                self._pending -= 1
+        self._rows['users_statistic'] = rows
+
+        for key in [key for key in self._views if key[0] == old_name]:
+            count, last_time = self._views.pop(key)
+            if new_name is None:
+                self._pending -= count
+                continue
+            entry = self._views.setdefault((new_name, key[1]), [0, last_time])
+            entry[0] += count
+            entry[1] = max(entry[1], last_time)
+
+    def _take(self):
+        with self._lock:
+            rows, self._rows = self._rows, defaultdict(list)
+            views, self._views = self._views, {}
+            self._pending = 0
+        return rows, views
+
+    def _restore(self, rows, views):
+        """Возврат несохраненной пачки в буфер (при ошибке записи)"""
+        with self._lock:
+            restored = sum(len(table_rows) for table_rows in rows.values()) + sum(c for c, _ in views.values())
+            if self._pending + restored > self.max_pending:
+                print(f"❌ Буфер статистики переполнен, потеряно событий: {restored}")
+                return
+            for table, table_rows in rows.items():
+                self._rows[table][:0] = table_rows
+            for key, (count, last_time) in views.items():
+                entry = self._views.setdefault(key, [0, last_time])
+                entry[0] += count
+                entry[1] = max(entry[1], last_time)
+            self._pending += restored
+
+    def flush(self):
+        """Запись накопленных событий; возвращает число записанных событий.
+
+        Журналы событий и счетчики просмотров пишутся разными транзакциями:
+        ошибка обновления счетчиков не мешает записи журналов, и наоборот.
+        """
+        with self._flush_lock:
+            rows, views = self._take()
+            written = 0
+
+            if any(rows.values()):
+                try:
+                    with connection() as conn:
+                        curs = conn.cursor()
+                        for table, table_rows in rows.items():
+                            if table_rows:
+                                add_late_events(curs, table, EVENT_TABLES[table], table_rows)
+                                insert_events(curs, table, table_rows)
+                        curs.close()
+                    written += sum(len(table_rows) for table_rows in rows.values())
+                except Exception as e:
+                    print(f"Ошибка записи статистики: {e}")
+                    self._restore(rows, {})
+
+            if views:
+                try:
+                    with connection() as conn:
+                        curs = conn.cursor()
+                        upsert_views(curs, views)
+                        curs.close()
+                    written += sum(count for count, _ in views.values())
+                except Exception as e:
+                    print(f"Ошибка записи просмотров: {e}")
+                    self._restore({}, views)
+
+            return written
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._pending:
+                self.flush()
+
+    def close(self):
+        """Остановка фонового потока и запись остатка"""
+        self._stop.set()
+        self._wakeup.set()
+        self._thread.join(timeout=self.flush_interval + 1.0)
+        self.flush()
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_event_buffer():
+    """Общий буфер событий (создается при первом обращении, сбрасывается при выходе)"""
+    global _buffer
+
+    if _buffer is None:
+        with _buffer_lock:
+            if _buffer is None:
+                from const import EVENT_BUFFER_SIZE, EVENT_FLUSH_INTERVAL
+                from database.migrations import apply_migrations
+                _buffer = EventBuffer(EVENT_BUFFER_SIZE, EVENT_FLUSH_INTERVAL)
+                atexit.register(close_event_buffer)
+                # Счетчикам просмотров нужен уникальный индекс: схема проверяется
+                # в фоне, до тех пор просмотры копятся в буфере
+                threading.Thread(target=apply_migrations, name="Migrations", daemon=True).start()
+    return _buffer
+
+
+def close_event_buffer():
+    """Запись остатка и остановка буфера (при завершении приложения)"""
+    global _buffer
+    with _buffer_lock:
+        old_buffer, _buffer = _buffer, None
+    if old_buffer is not None:
+        old_buffer.close()
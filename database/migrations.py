@@ -0,0 +1,118 @@
+# database/migrations.py
+"""
+Изменения схемы основной базы (PostgreSQL), которые нужны коду, но не создаются
+вместе с таблицами: индексы поиска и статистики, уникальный индекс счетчиков просмотров,
+таблицы сводок статистики.
+
+Каждый шаг выполняется один раз и записывается в таблицу schema_migrations.
+Шаги применяются в фоновом потоке при запуске приложения и при создании
+буфера статистики (event_buffer) или вручную:
+
+    python -m database.migrations
+"""
+import sys
+import threading
+import zlib
+from contextlib import closing
+
+from database.connection import connection, get_connection
+
+
+def default_migrations():
+    """(имя, функция) - функция возвращает True при успехе.
+
+    Шаги независимы: ошибка одного (например, CREATE EXTENSION pg_trgm без прав)
+    не мешает выполнить остальные. Модули импортируются при вызове, чтобы
+    db_scripts не загружался вместе с migrations.
+    """
+    import database.db_scripts as db
+    import database.statistics as stats
+
+    return [
+        ('001_song_search_indexes', db.create_song_search_index),
+        ('002_song_folded_index', db.create_song_folded_index),
+        ('003_views_unique_index', db.create_views_unique_index),
+        ('004_statistics_schema', stats.create_statistics_schema),
+    ]
+
+MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        name TEXT PRIMARY KEY,
+        applied_at TIMESTAMP NOT NULL DEFAULT now()
+    )
+"""
+
+# Ключ pg_advisory_lock: несколько процессов не выполняют миграции одновременно
+LOCK_KEY = zlib.crc32(b'schema_migrations')
+
+_lock = threading.Lock()
+_applied = False
+
+
+def applied_migrations():
+    """Имена уже выполненных шагов"""
+    with connection() as conn:
+        curs = conn.cursor()
+        curs.execute(MIGRATIONS_TABLE)
+        curs.execute("SELECT name FROM schema_migrations")
+        names = {row[0] for row in curs.fetchall()}
+        curs.close()
+    return names
+
+
+def apply_migrations(migrations=None):
+    """Выполнение недостающих шагов; True - схема актуальна.
+
+    После успешного применения всех шагов повторный вызов в том же процессе
+    ничего не делает. Шаг с ошибкой не отмечается выполненным, остальные шаги
+    все равно выполняются; неудавшиеся будут повторены при следующем вызове.
+    """
+    global _applied
+
+    with _lock:
+        if _applied:
+            return True
+        try:
+            with closing(get_connection()) as lock_conn:
+                lock_curs = lock_conn.cursor()
+                lock_curs.execute("SELECT pg_advisory_lock(%s)", (LOCK_KEY,))
+                try:
+                    _applied = _apply(migrations or default_migrations())
+                finally:
+                    lock_curs.execute("SELECT pg_advisory_unlock(%s)", (LOCK_KEY,))
+                    lock_curs.close()
+        except Exception as e:
+            print(f"❌ Ошибка применения миграций: {e}")
+        return _applied
+
+
+def _apply(migrations):
+    done = applied_migrations()
+    results = []
+    for name, step in migrations:
+        if name in done:
+            continue
+        print(f"🛠️ Миграция {name}...")
+        try:
+            ok = bool(step())
+        except Exception as e:
+            print(f"❌ Ошибка миграции {name}: {e}")
+            ok = False
+        results.append(ok)
+        if not ok:
+            print(f"❌ Миграция {name} не выполнена")
+            continue
+        with connection() as conn:
+            curs = conn.cursor()
+            curs.execute("INSERT INTO schema_migrations (name) VALUES (%s) ON CONFLICT DO NOTHING", (name,))
+            curs.close()
+        print(f"✅ Миграция {name} выполнена")
+    return all(results)
+
+
+def main():
+    return 0 if apply_migrations() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
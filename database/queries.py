@@ -1,4 +1,4 @@
-import database.db_scripts as db
+from database.repository import get_repository
 
 
 class SongQueries:
@@ -7,12 +7,22 @@ class SongQueries:
     @staticmethod
     def search_songs(query):
         """Поиск песен по запросу"""
-        return db.select_search_text(query)
+        return get_repository().search_songs(query)
 
     @staticmethod
     def get_song_info(title):
         """Получение информации о песне"""
-        return db.select_chord_song_info(title)
+        return get_repository().get_song_info(title)
+
+    @staticmethod
+    def get_band_songs(band):
+        """Песни группы"""
+        return get_repository().list_songs(band)
+
+    @staticmethod
+    def get_bands(letter=None):
+        """Группы на букву (или все)"""
+        return get_repository().list_bands(letter)
 
 
 class ChordQueries:
@@ -21,9 +31,14 @@ class ChordQueries:
     @staticmethod
     def get_chord_info(chord_name):
         """Получение информации об аккорде"""
-        return db.select_chord_info(chord_name)
+        return get_repository().get_chord(chord_name)
+
+    @staticmethod
+    def get_chord_type(chord_name):
+        """Тип аккорда"""
+        return get_repository().chord_type(chord_name)
 
     @staticmethod
-    def get_chord_variants(chord_id):
-        """Получение вариантов аккорда"""
-        return db.select_chord_variants(chord_id)
\ No newline at end of file
+    def get_chords_by_type(type_id):
+        """Аккорды данного типа"""
+        return get_repository().chords_by_type(type_id)
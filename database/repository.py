@@ -0,0 +1,387 @@
+# database/repository.py
+"""
+Хранилище песен, групп и аккордов с подключаемым бэкендом.
+
+    PostgresBackend - основная база (через db_scripts и общий пул соединений)
+    SQLiteBackend   - встроенная база в одном файле с FTS5-индексом поиска:
+                      приложение работает без сервера, тесты - без PostgreSQL
+
+Бэкенд выбирается настройкой AppSettings.STORAGE_BACKEND ('postgres' / 'sqlite').
+Локальная база заполняется из основной: python -m database.repository import [путь]
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Tuple
+
+from config.settings import AppSettings
+from database.text_search import get_query_words, search_key, rank_search_rows
+
+# Порядок столбцов строки песни - как в таблице songs PostgreSQL (song_info[3] - аккорды, [4] - путь)
+SONG_COLUMNS = ('id', 'band', 'song_name', 'song_chord', 'song_link', 'video_link', 'content_type', 'page_song')
+SONG_EXPORT_COLUMNS = ('band', 'song_name', 'song_chord', 'song_link', 'video_link')
+BAND_EXPORT_COLUMNS = ('letter', 'band')
+CHORD_EXPORT_COLUMNS = ('chord', 'link', 'description', 'type_id')
+
+
+class StorageBackend(ABC):
+    """Интерфейс хранилища: чтение песен, групп и аккордов и выгрузка строк для копирования"""
+
+    name = "base"
+    # Данные в самом процессе: поиск идет по собственному индексу без сети,
+    # локальный каталог поиска (SongCatalog) не нужен
+    is_local = False
+
+    # Песни
+    @abstractmethod
+    def search_songs(self, query: str) -> List[str]:
+        """Названия песен по поисковому запросу (порядок - как в select_search_text)"""
+
+    @abstractmethod
+    def get_song_info(self, song_name: str) -> Optional[tuple]:
+        """Строка песни в порядке SONG_COLUMNS или None"""
+
+    @abstractmethod
+    def list_songs(self, band: str) -> List[str]:
+        """Песни группы по алфавиту"""
+
+    @abstractmethod
+    def catalog_songs(self) -> List[Tuple[str, str]]:
+        """Все пары (группа, песня) для локального каталога поиска"""
+
+    @abstractmethod
+    def catalog_checksum(self) -> Optional[str]:
+        """Контрольная сумма пар (группа, песня) - проверка актуальности снимка каталога"""
+
+    # Группы
+    @abstractmethod
+    def list_bands(self, letter: Optional[str] = None) -> List[str]:
+        """Группы на букву (или все) по алфавиту"""
+
+    # Аккорды
+    @abstractmethod
+    def get_chord(self, chord: str) -> Optional[tuple]:
+        """(link, description, chord) или None"""
+
+    @abstractmethod
+    def chord_type(self, chord: str) -> Optional[int]:
+        """Тип аккорда (type_id)"""
+
+    @abstractmethod
+    def chords_by_type(self, type_id: int) -> List[str]:
+        """Аккорды типа в порядке id"""
+
+    # Выгрузка для копирования между хранилищами
+    @abstractmethod
+    def export_rows(self, table: str) -> Iterable[tuple]:
+        """Строки таблицы 'songs' / 'bands' / 'chords' в порядке *_EXPORT_COLUMNS"""
+
+    def migrate(self) -> bool:
+        """Подготовка схемы (индексы и т.п.) при запуске приложения; True - схема актуальна"""
+        return True
+
+
+class PostgresBackend(StorageBackend):
+    """Основная база PostgreSQL: операции делегируются db_scripts"""
+
+    name = "postgres"
+
+    EXPORT_QUERIES = {
+        'songs': f"SELECT {', '.join(SONG_EXPORT_COLUMNS)} FROM songs ORDER BY id",
+        'bands': f"SELECT {', '.join(BAND_EXPORT_COLUMNS)} FROM bands",
+        'chords': f"SELECT {', '.join(CHORD_EXPORT_COLUMNS)} FROM chords ORDER BY id",
+    }
+
+    @property
+    def db(self):
+        # db_scripts читает const (переменные окружения) - импорт только при использовании
+        import database.db_scripts as db
+        return db
+
+    def search_songs(self, query):
+        return self.db.select_search_text(query)
+
+    def get_song_info(self, song_name):
+        return self.db.select_chord_song_info(song_name) or None
+
+    def list_songs(self, band):
+        return self.db.select_song(band)
+
+    def catalog_songs(self):
+        return self.db.select_catalog_songs()
+
+    def catalog_checksum(self):
+        return self.db.select_catalog_checksum()
+
+    def list_bands(self, letter=None):
+        if letter is None:
+            return sorted(self.db.select_all_band(), key=str.lower)
+        return self.db.select_band(letter)
+
+    def get_chord(self, chord):
+        return self.db.select_chord(chord)
+
+    def chord_type(self, chord):
+        return self.db.type_chord(chord)
+
+    def chords_by_type(self, type_id):
+        return self.db.select_chord_type(type_id)
+
+    def migrate(self):
+        from database.migrations import apply_migrations
+        return apply_migrations()
+
+    def export_rows(self, table):
+        from database.connection import get_connection
+
+        conn = get_connection()
+        try:
+            curs = conn.cursor()
+            curs.execute(self.EXPORT_QUERIES[table])
+            rows = curs.fetchall()
+            curs.close()
+            return rows
+        finally:
+            conn.close()
+
+
+class SQLiteBackend(StorageBackend):
+    """Встроенная база SQLite.
+
+    Поиск повторяет PostgreSQL-версию: те же ключи (нижний регистр, ё -> е, без пробелов)
+    хранятся в FTS5-таблице songs_search с триграммным токенизатором, поэтому
+    LIKE '%слово%' идет по индексу. Без FTS5 songs_search - обычная таблица.
+    Соединение - отдельное для каждого потока (поиск выполняется в фоновых потоках).
+    """
+
+    name = "sqlite"
+    is_local = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS bands (
+            id INTEGER PRIMARY KEY,
+            letter TEXT,
+            band TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS songs (
+            id INTEGER PRIMARY KEY,
+            band TEXT NOT NULL,
+            song_name TEXT NOT NULL,
+            song_chord TEXT,
+            song_link TEXT,
+            video_link TEXT,
+            content_type INTEGER DEFAULT 2,
+            page_song INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS songs_song_name_idx ON songs (song_name);
+        CREATE INDEX IF NOT EXISTS songs_band_idx ON songs (band);
+        CREATE TABLE IF NOT EXISTS chords (
+            id INTEGER PRIMARY KEY,
+            chord TEXT NOT NULL,
+            link TEXT,
+            description TEXT,
+            type_id INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS chords_chord_idx ON chords (chord);
+        CREATE INDEX IF NOT EXISTS chords_type_idx ON chords (type_id, id);
+    """
+    FTS_SCHEMA = "CREATE VIRTUAL TABLE IF NOT EXISTS songs_search USING fts5(band_key, song_key, tokenize='trigram')"
+    PLAIN_SEARCH_SCHEMA = "CREATE TABLE IF NOT EXISTS songs_search (band_key TEXT, song_key TEXT)"
+    TRIGRAM = 3
+
+    def __init__(self, path: str = None):
+        self.path = path or AppSettings.LOCAL_DB_PATH
+        self._local = threading.local()
+        self.fts_enabled = False
+
+        if self.path == ':memory:':
+            # Общая база в памяти для всех потоков; живет, пока открыто соединение _keeper
+            self._database, self._uri = f"file:guitar_chords_{id(self)}?mode=memory&cache=shared", True
+        else:
+            self._database, self._uri = self.path, False
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._keeper = self.conn
+        self._create_schema()
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self._database, uri=self._uri)
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        conn = self.conn
+        with conn:
+            conn.executescript(self.SCHEMA)
+            try:
+                conn.execute(self.FTS_SCHEMA)
+                self.fts_enabled = True
+            except sqlite3.OperationalError as e:
+                print(f"⚠️ FTS5 недоступен ({e}), поиск без полнотекстового индекса")
+                conn.execute(self.PLAIN_SEARCH_SCHEMA)
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._local.conn = None
+            if conn is not self._keeper:
+                conn.close()
+        self._keeper.close()
+
+    # Запись
+    def add_song(self, band, song_name, song_chord=None, song_link=None, video_link=None, letter=None):
+        with self.conn as conn:
+            self._insert_song(conn, (band, song_name, song_chord, song_link, video_link))
+            if letter is not None:
+                conn.execute("INSERT OR IGNORE INTO bands (letter, band) VALUES (?, ?)", (letter, band))
+
+    @staticmethod
+    def _insert_song(conn, row):
+        cursor = conn.execute(f"INSERT INTO songs ({', '.join(SONG_EXPORT_COLUMNS)}) VALUES (?, ?, ?, ?, ?)", row)
+        band, song_name = row[0], row[1]
+        conn.execute("INSERT INTO songs_search (rowid, band_key, song_key) VALUES (?, ?, ?)",
+                     (cursor.lastrowid, search_key(band), search_key(song_name)))
+
+    def delete_song(self, song_name):
+        with self.conn as conn:
+            ids = [row[0] for row in conn.execute("SELECT id FROM songs WHERE song_name = ?", (song_name,))]
+            conn.executemany("DELETE FROM songs_search WHERE rowid = ?", [(song_id,) for song_id in ids])
+            conn.execute("DELETE FROM songs WHERE song_name = ?", (song_name,))
+
+    def import_from(self, source: StorageBackend):
+        """Полная замена данных копией из другого хранилища (одна транзакция)"""
+        songs = list(source.export_rows('songs'))
+        bands = list(source.export_rows('bands'))
+        chords = list(source.export_rows('chords'))
+
+        with self.conn as conn:
+            for table in ('songs_search', 'songs', 'bands', 'chords'):
+                conn.execute(f"DELETE FROM {table}")
+            for row in songs:
+                self._insert_song(conn, tuple(row))
+            conn.executemany(f"INSERT OR IGNORE INTO bands ({', '.join(BAND_EXPORT_COLUMNS)}) VALUES (?, ?)", bands)
+            conn.executemany(f"INSERT INTO chords ({', '.join(CHORD_EXPORT_COLUMNS)}) VALUES (?, ?, ?, ?)", chords)
+        return {'songs': len(songs), 'bands': len(bands), 'chords': len(chords)}
+
+    # Чтение
+    def search_songs(self, query):
+        query_words = get_query_words(query)
+        if not query_words:
+            return []
+
+        # Как в PostgreSQL: маски совпавших слов в группе и в песне одним запросом.
+        # Триграммный индекс работает для слов от 3 символов; короткие слова - через instr
+        # (LIKE по триграммам ошибается на коротких не-ASCII шаблонах)
+        def contains(column, word):
+            if len(word) >= self.TRIGRAM:
+                return f"{column} LIKE ?", f"%{word}%"
+            return f"instr({column}, ?) > 0", word
+
+        band_tests = [contains('f.band_key', word) for word in query_words]
+        song_tests = [contains('f.song_key', word) for word in query_words]
+        band_mask = ' + '.join(f"(CASE WHEN {test} THEN {1 << i} ELSE 0 END)" for i, (test, _) in enumerate(band_tests))
+        song_mask = ' + '.join(f"(CASE WHEN {test} THEN {1 << i} ELSE 0 END)" for i, (test, _) in enumerate(song_tests))
+        conditions = [test for test, _ in band_tests + song_tests]
+        patterns = [pattern for _, pattern in band_tests + song_tests]
+
+        rows = self.conn.execute(f"""
+            SELECT s.song_name, {band_mask}, {song_mask}
+            FROM songs_search f JOIN songs s ON s.id = f.rowid
+            WHERE {' OR '.join(conditions)}
+        """, patterns * 2).fetchall()
+        return rank_search_rows(rows, query, query_words)
+
+    def get_song_info(self, song_name):
+        return self.conn.execute(f"SELECT {', '.join(SONG_COLUMNS)} FROM songs WHERE song_name = ?",
+                                 (song_name,)).fetchone()
+
+    def list_songs(self, band):
+        rows = self.conn.execute("SELECT song_name FROM songs WHERE band = ?", (band,)).fetchall()
+        return sorted((row[0] for row in rows), key=str.lower)
+
+    def catalog_songs(self):
+        return self.conn.execute("SELECT band, song_name FROM songs").fetchall()
+
+    def catalog_checksum(self):
+        rows = self.conn.execute("SELECT band, song_name FROM songs ORDER BY id").fetchall()
+        if not rows:
+            return None
+        text = '\n'.join(f"{band or ''}\t{song_name}" for band, song_name in rows)
+        return hashlib.md5(text.encode('utf-8')).hexdigest()
+
+    def list_bands(self, letter=None):
+        if letter is None:
+            rows = self.conn.execute("SELECT DISTINCT band FROM bands").fetchall()
+        else:
+            rows = self.conn.execute("SELECT band FROM bands WHERE letter = ?", (letter,)).fetchall()
+        return sorted((row[0] for row in rows), key=str.lower)
+
+    def get_chord(self, chord):
+        return self.conn.execute("SELECT link, description, chord FROM chords WHERE chord = ?",
+                                 (chord,)).fetchone()
+
+    def chord_type(self, chord):
+        row = self.conn.execute("SELECT type_id FROM chords WHERE chord = ?", (chord,)).fetchone()
+        return row[0] if row else None
+
+    def chords_by_type(self, type_id):
+        rows = self.conn.execute("SELECT chord FROM chords WHERE type_id = ? ORDER BY id", (type_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def export_rows(self, table):
+        columns = {'songs': SONG_EXPORT_COLUMNS, 'bands': BAND_EXPORT_COLUMNS, 'chords': CHORD_EXPORT_COLUMNS}[table]
+        return self.conn.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id").fetchall()
+
+
+BACKENDS = {
+    PostgresBackend.name: PostgresBackend,
+    SQLiteBackend.name: SQLiteBackend,
+}
+
+_repository = None
+_repository_lock = threading.Lock()
+
+
+def configure_repository(backend: StorageBackend):
+    """Замена общего хранилища (например, SQLiteBackend(':memory:') в тестах)"""
+    global _repository
+    with _repository_lock:
+        _repository = backend
+    return backend
+
+
+def get_repository() -> StorageBackend:
+    """Общее хранилище (создается при первом обращении по AppSettings.STORAGE_BACKEND)"""
+    global _repository
+
+    if _repository is None:
+        with _repository_lock:
+            if _repository is None:
+                backend = BACKENDS.get(AppSettings.STORAGE_BACKEND)
+                if backend is None:
+                    raise ValueError(f"Неизвестное хранилище: {AppSettings.STORAGE_BACKEND}")
+                _repository = backend()
+    return _repository
+
+
+def main(argv=None):
+    """Копирование песен, групп и аккордов из PostgreSQL в локальную базу SQLite"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] != ['import']:
+        print("Использование: python -m database.repository import [путь к базе SQLite]")
+        return 1
+
+    target = SQLiteBackend(argv[1] if len(argv) > 1 else None)
+    counts = target.import_from(PostgresBackend())
+    print(f"✅ Локальная база {target.path}: песен {counts['songs']}, групп {counts['bands']}, "
+          f"аккордов {counts['chords']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
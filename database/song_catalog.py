@@ -0,0 +1,224 @@
+# database/song_catalog.py
+import marshal
+import os
+import threading
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from database.repository import get_repository
+from database.text_search import get_query_words, search_key, rank_search_rows
+
+SNAPSHOT_VERSION = 2
+SNAPSHOT_PATH = Path(__file__).resolve().parent.parent / "data" / "song_catalog.snapshot"
+
+
+class _KeyIndex:
+    """Ключи поиска (search_key) всех песен одной строкой: поиск подстроки
+    выполняется str.find по всей строке, а не циклом по песням"""
+
+    def __init__(self, keys: List[str]):
+        self._text = '\n'.join(keys)
+        self._starts = []
+        position = 0
+        for key in keys:
+            self._starts.append(position)
+            position += len(key) + 1
+
+    def ids_containing(self, word: str) -> List[int]:
+        """Номера ключей, содержащих word (слово запроса без пробелов и переводов строки)"""
+        ids = []
+        position = self._text.find(word)
+        while position != -1:
+            song_id = bisect_right(self._starts, position) - 1
+            ids.append(song_id)
+            # Следующее вхождение ищем со следующего ключа
+            if song_id + 1 >= len(self._starts):
+                break
+            position = self._text.find(word, self._starts[song_id + 1])
+        return ids
+
+
+class SongCatalog:
+    """Локальный каталог песен для поиска без обращения к базе данных.
+
+    Поиск совпадает с select_search_text: слово запроса ищется подстрокой
+    в названии группы и в названии песни (нижний регистр, ё -> е, без пробелов),
+    результаты ранжируются общей функцией rank_search_rows.
+    Каталог строится одним запросом к базе и хранится в снимке на диске вместе
+    с контрольной суммой таблицы songs - по ней снимок проверяется при загрузке.
+    """
+
+    _lock = threading.RLock()
+    _loaded = False
+    _path = SNAPSHOT_PATH  # снимок, из которого загружен (или в который сохранен) каталог
+
+    _songs: List[Optional[Tuple[str, str]]] = []  # id -> (группа, название) или None для удаленных
+    _ids_by_name: Dict[str, List[int]] = {}
+    _band_index: Optional[_KeyIndex] = None  # строятся при первом поиске после изменения
+    _song_index: Optional[_KeyIndex] = None
+
+    @classmethod
+    def is_loaded(cls) -> bool:
+        return cls._loaded
+
+    @classmethod
+    def ensure_loaded(cls) -> bool:
+        """Загрузка каталога при первом обращении; False - если каталог недоступен"""
+        if cls._loaded:
+            return True
+        with cls._lock:
+            if not cls._loaded:
+                try:
+                    cls.load()
+                except Exception as e:
+                    print(f"❌ Ошибка загрузки каталога песен: {e}")
+            return cls._loaded
+
+    @classmethod
+    def load(cls, path=SNAPSHOT_PATH):
+        """Загрузка из снимка; если снимка нет или таблица songs изменилась - перестроение из базы"""
+        with cls._lock:
+            cls._path = path
+            checksum = get_repository().catalog_checksum()
+            if cls._load_snapshot(path, checksum):
+                print(f"✅ Каталог песен загружен из снимка: {len(cls._ids_by_name)} песен")
+                return
+            cls.rebuild(path, checksum)
+
+    @classmethod
+    def rebuild(cls, path=SNAPSHOT_PATH, checksum=None):
+        """Построение каталога одним запросом к базе и сохранение снимка"""
+        repository = get_repository()
+        # Сумма - до чтения песен: изменение между запросами приведет к лишнему
+        # перестроению при следующей загрузке, но не к устаревшему снимку
+        checksum = checksum or repository.catalog_checksum()
+        songs = repository.catalog_songs()
+        with cls._lock:
+            cls._path = path
+            cls._reset()
+            for band, song_name in songs:
+                cls._add(band, song_name)
+            cls._loaded = True
+            cls.save(path, checksum)
+        print(f"✅ Каталог песен построен из базы: {len(cls._ids_by_name)} песен")
+
+    @classmethod
+    def save(cls, path=SNAPSHOT_PATH, checksum=None):
+        """Сохранение снимка: песни и контрольная сумма таблицы songs, по которой они получены"""
+        with cls._lock:
+            songs = [song for song in cls._songs if song is not None]
+            snapshot = marshal.dumps({'version': SNAPSHOT_VERSION, 'checksum': checksum, 'songs': songs})
+
+        try:
+            path = Path(path)
+            temp_path = path.with_suffix(path.suffix + '.tmp')
+            with open(temp_path, 'wb') as f:
+                f.write(snapshot)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"❌ Ошибка сохранения снимка каталога песен: {e}")
+
+    @classmethod
+    def _load_snapshot(cls, path, checksum) -> bool:
+        try:
+            with open(path, 'rb') as f:
+                snapshot = marshal.load(f)
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"❌ Ошибка чтения снимка каталога песен: {e}")
+            return False
+
+        if not isinstance(snapshot, dict) or snapshot.get('version') != SNAPSHOT_VERSION:
+            return False
+        if checksum is None or snapshot.get('checksum') != checksum:
+            return False
+
+        cls._reset()
+        for band, song_name in snapshot['songs']:
+            cls._add(band, song_name)
+        cls._loaded = True
+        return True
+
+    @classmethod
+    def invalidate_snapshot(cls, path=None):
+        """Удаление снимка - при следующей загрузке каталог будет построен заново"""
+        try:
+            os.remove(path or cls._path)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"❌ Ошибка удаления снимка каталога песен: {e}")
+
+    @classmethod
+    def _reset(cls):
+        cls._songs = []
+        cls._ids_by_name = {}
+        cls._band_index = cls._song_index = None
+        cls._loaded = False
+
+    @classmethod
+    def _add(cls, band: str, song_name: str):
+        cls._ids_by_name.setdefault(song_name, []).append(len(cls._songs))
+        cls._songs.append((band, song_name))
+        cls._band_index = cls._song_index = None
+
+    @classmethod
+    def _remove(cls, song_name: str):
+        for song_id in cls._ids_by_name.pop(song_name, ()):
+            cls._songs[song_id] = None
+        cls._band_index = cls._song_index = None
+
+    # Точечные обновления из db_scripts. Снимок удаляется: его контрольная сумма
+    # больше не совпадает с базой, при следующем запуске каталог перестроится
+    @classmethod
+    def add_song(cls, band: str, song_name: str):
+        with cls._lock:
+            if cls._loaded:
+                cls._add(band, song_name)
+            cls.invalidate_snapshot()
+
+    @classmethod
+    def rename_song(cls, old_name: str, band: str, new_name: str):
+        with cls._lock:
+            if cls._loaded:
+                cls._remove(old_name)
+                cls._add(band, new_name)
+            cls.invalidate_snapshot()
+
+    @classmethod
+    def remove_song(cls, song_name: str):
+        with cls._lock:
+            if cls._loaded:
+                cls._remove(song_name)
+            cls.invalidate_snapshot()
+
+    @classmethod
+    def _indexes(cls) -> Tuple[_KeyIndex, _KeyIndex]:
+        if cls._band_index is None:
+            # У удаленных песен пустые ключи - в них ничего не находится
+            cls._band_index = _KeyIndex([search_key(song[0] or '') if song else '' for song in cls._songs])
+            cls._song_index = _KeyIndex([search_key(song[1]) if song else '' for song in cls._songs])
+        return cls._band_index, cls._song_index
+
+    @classmethod
+    def search(cls, query_text: str) -> List[str]:
+        """Поиск песен по запросу - тот же результат, что у select_search_text"""
+        query_words = get_query_words(query_text)
+        if not query_words:
+            return []
+
+        with cls._lock:
+            band_index, song_index = cls._indexes()
+            # Маски совпавших слов в группе и в названии, как в SQL-запросе
+            masks = {}
+            for bit, word in enumerate(query_words):
+                for song_id in band_index.ids_containing(word):
+                    masks.setdefault(song_id, [0, 0])[0] |= 1 << bit
+                for song_id in song_index.ids_containing(word):
+                    masks.setdefault(song_id, [0, 0])[1] |= 1 << bit
+            rows = [(cls._songs[song_id][1], band_mask, song_mask)
+                    for song_id, (band_mask, song_mask) in masks.items()]
+
+        return rank_search_rows(rows, query_text, query_words)
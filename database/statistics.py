@@ -0,0 +1,413 @@
+# database/statistics.py
+"""
+Общий бэкенд статистики использования.
+
+Периоды задаются полуинтервалами [начало, конец) по самому столбцу времени
+(без DATE(...)), поэтому запросы используют индексы из create_statistics_indexes.
+Уникальные посетители за период - сумма уникальных по часам/дням/месяцам,
+считается одним сгруппированным запросом.
+
+Журналы событий (views_type, users_statistic) сворачиваются в таблицы
+<журнал>_rollup_daily / <журнал>_rollup_monthly: (день или месяц, тип контента,
+пользователь) -> количество событий. Столбцы сводок имеют те же типы, что
+и в журнале, строки с NULL сворачиваются как есть. Свертка (python -m
+database.statistics compact, по расписанию) идет до отметки rolled_until -
+начала текущих суток; запрос читает сводку до отметки и сырые строки после
+нее, поэтому время ответа не растет вместе с историей. События, записанные
+позже свертки своих суток, буфер событий сразу добавляет в сводки (add_late_events).
+"""
+import datetime as dt
+import sys
+import threading
+import time
+from contextlib import closing
+
+from database.connection import get_connection, connection
+
+# Интервалы группировки для date_trunc
+BUCKETS = ('hour', 'day', 'month')
+
+# Индексы под запросы статистики: (имя, таблица, столбцы)
+STATISTICS_INDEXES = (
+    ('views_type_time_user_idx', 'views_type', 'time_update, user_id'),
+    ('views_type_type_time_idx', 'views_type', 'content_type, time_update'),
+    ('users_statistic_time_user_idx', 'users_statistic', 'time, user_id'),
+    ('users_statistic_type_time_idx', 'users_statistic', 'content_type, time'),
+    ('favorite_songs_time_idx', 'favorite_songs', 'time_update'),
+    ('users_reg_time_idx', 'users', 'reg_time'),
+)
+
+# Журналы событий со сводками: таблица -> столбец времени
+ROLLUP_SOURCES = {
+    'views_type': 'time_update',
+    'users_statistic': 'time',
+}
+
+# Сводки журнала: интервал date_trunc -> суффикс таблицы
+ROLLUP_BUCKETS = {'day': 'daily', 'month': 'monthly'}
+
+ROLLUP_STATE_TABLE = """
+    CREATE TABLE IF NOT EXISTS stats_rollup_state (
+        source TEXT PRIMARY KEY,
+        rolled_until TIMESTAMP
+    )
+"""
+
+# Отметка свертки перечитывается из базы не чаще, чем раз в столько секунд
+WATERMARK_TTL = 60
+# Повторная попытка чтения отметки после ошибки (например, таблицы сводок не созданы), сек
+ROLLUP_RETRY_INTERVAL = 300
+
+
+def rollup_table(table, bucket):
+    """Таблица сводки журнала table по интервалу bucket ('day' / 'month')"""
+    return f"{table}_rollup_{ROLLUP_BUCKETS[bucket]}"
+
+
+def day_range(day=None):
+    """Сутки: [00:00 дня, 00:00 следующего дня)"""
+    start = dt.datetime.combine(day or dt.date.today(), dt.time.min)
+    return start, start + dt.timedelta(days=1)
+
+
+def month_range(now=None):
+    """Текущий месяц: [1-е число, 1-е число следующего месяца)"""
+    now = now or dt.datetime.now()
+    start = dt.datetime(now.year, now.month, 1)
+    if now.month == 12:
+        return start, dt.datetime(now.year + 1, 1, 1)
+    return start, dt.datetime(now.year, now.month + 1, 1)
+
+
+def year_range(now=None):
+    """Текущий год по сегодняшний день включительно: [1 января, завтра)"""
+    now = now or dt.datetime.now()
+    return dt.datetime(now.year, 1, 1), day_range(now.date())[1]
+
+
+def _where(time_column, conditions):
+    return " AND ".join([f"{time_column} >= %s", f"{time_column} < %s", *conditions])
+
+
+def _fetch_value(query, params):
+    """Одно число из запроса (0 при ошибке или пустом результате)"""
+    conn = None
+    try:
+        conn = get_connection()
+        curs = conn.cursor()
+        curs.execute(query, params)
+        row = curs.fetchone()
+        curs.close()
+        return row[0] if row and row[0] else 0
+    except Exception as e:
+        print("Ошибка при подсчёте статистики:", e)
+        return 0
+    finally:
+        if conn is not None:
+            conn.close()
+
+
+class RollupManager:
+    """Свертка журналов событий в дневные и месячные сводки.
+
+    Свертка выполняется только командой compact (по расписанию) - запросы
+    статистики читают отметку rolled_until из stats_rollup_state и сами
+    ничего не сворачивают. Отметка кэшируется в процессе на WATERMARK_TTL.
+    """
+
+    _lock = threading.Lock()
+    _watermarks = {}  # таблица -> rolled_until
+    _read_at = None
+    _failed_at = None
+
+    @classmethod
+    def create_tables(cls):
+        """Таблицы сводок с типами столбцов журнала (CREATE TABLE AS ... WITH NO DATA)"""
+        try:
+            with connection() as conn:
+                curs = conn.cursor()
+                curs.execute(ROLLUP_STATE_TABLE)
+                for table, time_column in ROLLUP_SOURCES.items():
+                    for bucket in ROLLUP_BUCKETS:
+                        rollup = rollup_table(table, bucket)
+                        curs.execute(f"""
+                            CREATE TABLE IF NOT EXISTS {rollup} AS
+                            SELECT date_trunc('{bucket}', {time_column})::date AS {bucket},
+                                   content_type, user_id, COUNT(*) AS events
+                            FROM {table}
+                            GROUP BY 1, 2, 3
+                            WITH NO DATA
+                        """)
+                        curs.execute(f"CREATE INDEX IF NOT EXISTS {rollup}_{bucket}_idx ON {rollup} ({bucket})")
+                curs.close()
+            return True
+        except Exception as e:
+            print("Ошибка при создании таблиц сводок статистики:", e)
+            return False
+
+    @classmethod
+    def compact(cls, until=None):
+        """Свертка сырых строк [rolled_until, until) во всех журналах; until - граница суток.
+        Возвращает {таблица: rolled_until}."""
+        until = until or day_range()[0]
+        watermarks = {}
+        for table, time_column in ROLLUP_SOURCES.items():
+            watermarks[table] = cls._compact_source(table, time_column, until)
+
+        with cls._lock:
+            cls._watermarks = watermarks
+            cls._read_at = time.monotonic()
+        return watermarks
+
+    @classmethod
+    def _compact_source(cls, table, time_column, until):
+        """Свертка по месяцам: каждый месяц - своя транзакция, первая свертка
+        длинной истории не держит блокировки и не растет в одну огромную транзакцию"""
+        while True:
+            with connection() as conn:
+                curs = conn.cursor()
+                curs.execute("INSERT INTO stats_rollup_state (source, rolled_until) VALUES (%s, NULL) "
+                             "ON CONFLICT (source) DO NOTHING", (table,))
+                # Строка отметки блокируется: параллельная свертка ждет, буфер событий
+                # (add_late_events) видит отметку, согласованную со сводками
+                curs.execute("SELECT rolled_until FROM stats_rollup_state WHERE source = %s FOR UPDATE", (table,))
+                rolled_until = curs.fetchone()[0]
+                if rolled_until is None:
+                    curs.execute(f"SELECT date_trunc('day', MIN({time_column})) FROM {table}")
+                    rolled_until = curs.fetchone()[0] or until
+                if rolled_until >= until:
+                    curs.execute("UPDATE stats_rollup_state SET rolled_until = %s WHERE source = %s",
+                                 (rolled_until, table))
+                    curs.close()
+                    return rolled_until
+
+                chunk_end = min(until, month_range(rolled_until)[1])
+                for bucket in ROLLUP_BUCKETS:
+                    curs.execute(f"""
+                        INSERT INTO {rollup_table(table, bucket)} ({bucket}, content_type, user_id, events)
+                        SELECT date_trunc('{bucket}', {time_column})::date, content_type, user_id, COUNT(*)
+                        FROM {table}
+                        WHERE {time_column} >= %s AND {time_column} < %s
+                        GROUP BY 1, 2, 3
+                    """, (rolled_until, chunk_end))
+
+                curs.execute("UPDATE stats_rollup_state SET rolled_until = %s WHERE source = %s",
+                             (chunk_end, table))
+                curs.close()
+            print(f"📦 {table}: свернуто до {chunk_end:%Y-%m-%d}")
+
+    @classmethod
+    def watermark(cls, table):
+        """Отметка свертки журнала или None (сводки недоступны - только сырые строки)"""
+        if table not in ROLLUP_SOURCES:
+            return None
+
+        now = time.monotonic()
+        with cls._lock:
+            if cls._read_at is not None and now - cls._read_at < WATERMARK_TTL:
+                return cls._watermarks.get(table)
+            if cls._failed_at is not None and now - cls._failed_at < ROLLUP_RETRY_INTERVAL:
+                return None
+
+        try:
+            with closing(get_connection()) as conn:
+                curs = conn.cursor()
+                curs.execute("SELECT to_regclass('stats_rollup_state')")
+                watermarks = {}
+                if curs.fetchone()[0] is not None:
+                    curs.execute("SELECT source, rolled_until FROM stats_rollup_state")
+                    watermarks = dict(curs.fetchall())
+                curs.close()
+        except Exception as e:
+            print("Ошибка чтения отметки свертки статистики:", e)
+            with cls._lock:
+                cls._failed_at = now
+            return None
+
+        with cls._lock:
+            cls._watermarks = watermarks
+            cls._read_at = now
+            cls._failed_at = None
+        return watermarks.get(table)
+
+
+def add_late_events(curs, table, columns, rows):
+    """Вызывается буфером событий в транзакции записи журнала, до вставки строк:
+    события старше отметки свертки (запись задержалась) сразу добавляются в сводки -
+    иначе их не увидит ни сводка, ни чтение сырых строк после отметки."""
+    time_column = ROLLUP_SOURCES.get(table)
+    if time_column is None or not rows:
+        return
+    curs.execute("SELECT to_regclass('stats_rollup_state')")
+    if curs.fetchone()[0] is None:
+        return
+    # Разделяемая блокировка: свертка не сдвинет отметку до конца этой транзакции
+    curs.execute("SELECT rolled_until FROM stats_rollup_state WHERE source = %s FOR SHARE", (table,))
+    row = curs.fetchone()
+    if row is None or row[0] is None:
+        return
+
+    rolled_until = row[0]
+    time_index, type_index, user_index = (columns.index(name) for name in (time_column, 'content_type', 'user_id'))
+    late = [r for r in rows if r[time_index] < rolled_until]
+    if not late:
+        return
+
+    for bucket in ROLLUP_BUCKETS:
+        counts = {}
+        for r in late:
+            start = r[time_index].date()
+            start = start if bucket == 'day' else start.replace(day=1)
+            key = (start, r[type_index], r[user_index])
+            counts[key] = counts.get(key, 0) + 1
+        curs.executemany(
+            f"INSERT INTO {rollup_table(table, bucket)} ({bucket}, content_type, user_id, events) "
+            f"VALUES (%s, %s, %s, %s)",
+            [(*key, events) for key, events in counts.items()])
+
+
+def _events_source(table, time_column, period, granularity='day'):
+    """Подзапрос событий (t, user_id, content_type, events) за период:
+    сводка до отметки свертки и сырые строки после нее. period=None - вся история."""
+    raw_select = f"SELECT {time_column} AS t, user_id, content_type, 1 AS events FROM {table}"
+    start, end = period if period is not None else (None, None)
+    watermark = RollupManager.watermark(table)
+
+    # Сводку можно использовать только с начала суток (или месяца для месячной)
+    aligned = start is None or (start.time() == dt.time.min and (granularity == 'day' or start.day == 1))
+    if watermark is None or not aligned or (start is not None and start >= watermark):
+        conditions, params = [], []
+        if start is not None:
+            conditions.append(f"{time_column} >= %s")
+            params.append(start)
+        if end is not None:
+            conditions.append(f"{time_column} < %s")
+            params.append(end)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return f"{raw_select}{where}", params
+
+    rollup = rollup_table(table, granularity)
+    rolled_end = watermark if end is None else min(end, watermark)
+
+    rolled_conditions, rolled_params = [f"{granularity} < %s"], [rolled_end]
+    if start is not None:
+        rolled_conditions.append(f"{granularity} >= %s")
+        rolled_params.append(start)
+    raw_conditions, raw_params = [f"{time_column} >= %s"], [watermark]
+    if end is not None:
+        raw_conditions.append(f"{time_column} < %s")
+        raw_params.append(end)
+
+    query = (f"SELECT {granularity}::timestamp AS t, user_id, content_type, events FROM {rollup} "
+             f"WHERE {' AND '.join(rolled_conditions)} "
+             f"UNION ALL {raw_select} WHERE {' AND '.join(raw_conditions)}")
+    return query, rolled_params + raw_params
+
+
+def count_events(table, time_column, period, conditions=(), params=(), count_expr='*'):
+    """Количество записей за период: COUNT(count_expr) с дополнительными условиями.
+    Для журналов со сводками условия могут ссылаться только на user_id и content_type."""
+    if table not in ROLLUP_SOURCES:
+        start, end = period
+        query = f"SELECT COUNT({count_expr}) FROM {table} WHERE {_where(time_column, conditions)}"
+        return _fetch_value(query, (start, end, *params))
+
+    source, source_params = _events_source(table, time_column, period)
+    # В сводке строка - это несколько событий: COUNT(*) превращается в SUM(events),
+    # COUNT(столбец) - в сумму по строкам, где столбец не NULL
+    if count_expr.upper().startswith("DISTINCT"):
+        aggregate = "COUNT(DISTINCT user_id)"
+    elif count_expr == '*':
+        aggregate = "SUM(events)"
+    else:
+        aggregate = f"SUM(events) FILTER (WHERE {count_expr} IS NOT NULL)"
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"SELECT {aggregate} FROM ({source}) events{where}"
+    return _fetch_value(query, (*source_params, *params))
+
+
+def sum_unique_users(table, time_column, period, bucket, conditions=(), params=(), user_column='user_id'):
+    """Сумма уникальных пользователей по интервалам bucket (час/день/месяц) за период"""
+    if bucket not in BUCKETS:
+        raise ValueError(f"Неизвестный интервал группировки: {bucket}")
+
+    if table in ROLLUP_SOURCES and bucket != 'hour' and user_column == 'user_id':
+        source, source_params = _events_source(table, time_column, period)
+        from_clause, time_expr = f"({source}) events", "t"
+        where = " AND ".join(conditions) or "TRUE"
+        query_params = (*source_params, *params)
+    else:
+        # Почасовая группировка - только по сырым строкам (сводки дневные)
+        start, end = period
+        from_clause, time_expr = table, time_column
+        where = _where(time_column, conditions)
+        query_params = (start, end, *params)
+
+    query = f"""
+        SELECT COALESCE(SUM(bucket_unique), 0) FROM (
+            SELECT COUNT(DISTINCT {user_column}) AS bucket_unique
+            FROM {from_clause}
+            WHERE {where}
+            GROUP BY date_trunc('{bucket}', {time_expr})
+        ) sub
+    """
+    return _fetch_value(query, query_params)
+
+
+def top_users(table, limit=10):
+    """Пользователи с наибольшим количеством событий за всю историю: [(user_name, количество)]"""
+    time_column = ROLLUP_SOURCES[table]
+    source, params = _events_source(table, time_column, None, granularity='month')
+    query = f"""
+        SELECT u.user_name, SUM(events.events) AS events_count
+        FROM ({source}) events
+        JOIN users u ON events.user_id = u.telegram_id
+        GROUP BY u.id, u.user_name
+        ORDER BY events_count DESC
+        LIMIT %s
+    """
+    conn = get_connection()
+    try:
+        curs = conn.cursor()
+        curs.execute(query, (*params, limit))
+        rows = curs.fetchall()
+        curs.close()
+        return rows
+    finally:
+        conn.close()
+
+
+# Создание индексов статистики (миграция 004_statistics_schema)
+def create_statistics_indexes():
+    try:
+        with connection() as conn:
+            curs = conn.cursor()
+            for name, table, columns in STATISTICS_INDEXES:
+                curs.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+            curs.close()
+        return True
+    except Exception as e:
+        print("Ошибка при создании индексов статистики:", e)
+        return False
+
+
+# Индексы и таблицы сводок (миграция 004_statistics_schema)
+def create_statistics_schema():
+    return create_statistics_indexes() and RollupManager.create_tables()
+
+
+def main(argv=None):
+    """Периодическая свертка для планировщика: python -m database.statistics compact"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] != ['compact']:
+        print("Использование: python -m database.statistics compact")
+        return 1
+
+    create_statistics_schema()
+    for table, rolled_until in RollupManager.compact().items():
+        print(f"✅ {table}: свернуто до {rolled_until}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
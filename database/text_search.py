@@ -0,0 +1,148 @@
+# database/text_search.py
+"""
+Нормализация текста и ранжирование результатов поиска песен.
+Общие для всех хранилищ (PostgreSQL, SQLite): хранилище находит строки
+(название песни, маска слов в группе, маска слов в песне), порядок выдачи - здесь.
+"""
+
+
+# Функция для нормализации строки: заменяет 'ё' на 'е', переводит в нижний регистр и убирает знаки препинания
+
+def normalize_string(s):
+    s = s.lower().replace('ё', 'е')
+    words = s.split()
+    result_words = []
+
+    for word in words:
+        # Проверяем, есть ли внутри дефис
+        if '-' in word:
+            cleaned = ''.join(c for c in word if c.isalnum() or c == '-')
+            cleaned = cleaned.strip('-')
+            if cleaned:  # если после очистки осталась непустая строка
+                result_words.append(cleaned)
+        else:
+            cleaned = ''.join(c for c in word if c.isalnum())
+            if cleaned:
+                result_words.append(cleaned)
+
+    return ' '.join(result_words)
+
+
+# Функция для получения списка слов из строки
+def get_words(s):
+    words = s.split()
+    return words
+
+
+# Слов в запросе не больше MAX_SEARCH_WORDS: маска совпавших слов - целое число
+# в SQL-запросе, лишние слова длинного запроса отбрасываются
+MAX_SEARCH_WORDS = 16
+
+
+def get_query_words(query_text):
+    """Нормализованные слова поискового запроса"""
+    return get_words(normalize_string(query_text.strip()))[:MAX_SEARCH_WORDS]
+
+
+# Ключ поиска по подстроке - то же, что BAND_SEARCH_EXPR / SONG_SEARCH_EXPR в PostgreSQL
+def search_key(text):
+    return text.replace('ё', 'е').replace(' ', '').lower()
+
+
+def rank_search_rows(rows, query_text, query_words):
+    """Результат поиска по строкам (song_name, band_mask, song_mask): бит i маски -
+    i-е слово запроса найдено в названии группы / песни."""
+    def sort_song(results):
+        matched_partial = []
+        matched_full = []
+
+        for result in results:
+            words = get_words(result)
+            # Проверка на полное совпадение (все слова из query_words есть в words)
+            full_match = True
+            for word in query_words:
+                # Проверяем, есть ли слово или его часть в списке слов результата
+                if not any(
+                        song_word.lower() == word.lower() or song_word.lower().split('_')[0] == word.lower()
+                        for song_word in words
+                ):
+                    full_match = False
+                    break  # Если хоть одно слово не найдено, полный матч невозможен
+
+            if full_match:
+                matched_full.append(result)
+
+            # Проверка на частичное совпадение (хотя бы одно слово)
+            for word in query_words:
+                if any(
+                        song_word.lower() == word.lower() or song_word.lower().split('_')[0] == word.lower()
+                        for song_word in words
+                ):
+                    matched_partial.append(result)
+                    break  # переходим к следующему результату после первого совпадения
+
+        if matched_full:
+            return matched_full
+        else:
+            return matched_partial
+
+    def remove_duplicates(lst):
+        seen = set()
+        result = []
+        for item in lst:
+            if item not in seen:
+                seen.add(item)
+                result.append(item)
+        return result
+
+    def filter_and_sort(items, term):
+        term_lower = term.lower()
+        # списки для совпадений и остальных
+        exact_matches = []
+        others = []
+
+        for item in items:
+            if ' - ' in item:
+                prefix, rest = item.split(' - ', 1)
+                prefix_lower = prefix.lower()
+
+                # Полное совпадение первой части с поисковым термином
+                if prefix_lower == term_lower:
+                    exact_matches.append(item)
+                else:
+                    others.append(item)
+            else:
+                others.append(item)
+
+        # Сортируем только список точных совпадений по алфавиту без учёта регистра
+        exact_matches_sorted = sorted(exact_matches, key=lambda x: x.lower())
+
+        # Остальные оставляем в исходном порядке или сортируем по желанию
+        # Например, отсортировать их тоже по алфавиту:
+        others_sorted = sorted(others, key=lambda x: x.lower())
+
+        return exact_matches_sorted + others_sorted
+
+    def execute_search(word_indexes):
+        """Песни, где все указанные слова есть в названии группы или в названии песни."""
+        required = sum(1 << i for i in word_indexes)
+        return {song_name for song_name, band_hits, song_hits in rows
+                if band_hits & required == required or song_hits & required == required}
+
+    # 1. Поиск по всем словам
+    results = execute_search(range(len(query_words)))
+
+    # 2. Удаление слов по одному с начала и с конца и повторный поиск
+    if not results:
+        for i in range(len(query_words) - 1, 0, -1):
+            # Удаляем i слов с начала
+            results = execute_search(range(i, len(query_words)))
+            if results:
+                break
+            # Удаляем i слов с конца
+            results = execute_search(range(len(query_words) - i))
+            if results:
+                break
+
+    results = remove_duplicates(sort_song(list(results)))
+    return filter_and_sort(results, query_text)
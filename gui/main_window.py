@@ -3,6 +3,8 @@ from PyQt5.QtWidgets import QMainWindow, QStackedWidget
 from gui.pages.songs_page import SongsPage
 from gui.pages.chords_page import ChordsPage
 from config.settings import AppSettings
+from core.workers import start_task
+from database.repository import get_repository
 
 
 class MainWindow(QMainWindow):
@@ -82,6 +84,9 @@ class MainWindow(QMainWindow):
         self.connect_menu_signals()
         self.show_songs_page()
 
+        # Индексы и прочие изменения схемы базы - в фоне, не задерживая показ окна
+        start_task(lambda token, report: get_repository().migrate())
+
     def connect_menu_signals(self):
         """Подключение сигналов кнопок меню на страницах"""
         try:
@@ -9,6 +9,9 @@ from .base_page import BasePage
 from gui.widgets.buttons import MenuButton, ChordButton, ChordVariantButton
 from gui.widgets.labels import AdaptiveChordLabel
 from config.styles import DarkTheme
+from config.settings_chord_render import ChordsPageRenderSettings
+from core.chord_renderer import ChordRenderer
+from core.search_controller import SearchController
 
 # Импортируем данные аккордов из нового файла
 try:
@@ -25,15 +28,6 @@ except ImportError as e:
     CHORDS_BY_STYLE = {'Major': ['A', 'B', 'C'], 'Minor': ['Am', 'Bm', 'Cm']}
     CHORDS_DESCRIPTIONS = {'A': 'Ля мажор', 'Am': 'Ля минор'}
 
-# Импортируем систему отображения аккордов
-try:
-    from drawing_elements import DrawingElements
-
-    print("✅ ChordsPage: DrawingElements загружен")
-except ImportError as e:
-    print(f"❌ ChordsPage: Ошибка загрузки DrawingElements: {e}")
-    DrawingElements = None
-
 
 class ChordsPage(BasePage):
     """Страница аккордов с выбором по типам и нотам"""
@@ -57,6 +51,10 @@ class ChordsPage(BasePage):
 
         # Для поиска аккордов
         self.all_chords = self.get_all_chords()
+        self.search_controller = SearchController(self.run_chord_search, self)
+        self.search_controller.results_ready.connect(self.show_search_results)
+        self.search_controller.search_failed.connect(
+            lambda query, error: print(f"Ошибка поиска аккордов: {error}"))
 
         self.initialize_page()
 
@@ -220,6 +218,7 @@ class ChordsPage(BasePage):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("🔍 Введите название аккорда...")
         self.search_input.returnPressed.connect(self.search_chords)
+        self.search_input.textEdited.connect(self.on_search_text_edited)
 
         self.search_button = QPushButton("Найти")
         self.search_button.setCursor(Qt.PointingHandCursor)
@@ -545,24 +544,44 @@ class ChordsPage(BasePage):
                 row += 1
 
     def search_chords(self):
-        """Поиск аккордов по имени или описанию"""
-        try:
-            query = self.search_input.text().strip().lower()
-            if not query:
-                self.results_list.hide()
-                return
+        """Поиск аккордов по кнопке «Найти» или Enter (без задержки)"""
+        query = self.search_input.text().strip()
+        if not query:
+            self.search_controller.cancel()
+            self.results_list.hide()
+            return
 
-            results = []
-            for chord in self.all_chords:
-                # Поиск по имени аккорда
-                if query in chord.lower():
+        self.search_controller.search_now(query)
+
+    def on_search_text_edited(self, text):
+        """Поиск при вводе"""
+        if not text.strip():
+            self.search_controller.cancel()
+            self.results_list.hide()
+            return
+
+        self.search_controller.request(text)
+
+    def run_chord_search(self, token, report, query):
+        """Поиск аккордов по имени или описанию в фоновом потоке"""
+        query = query.lower()
+        results = []
+        for chord in self.all_chords:
+            if token.cancelled:
+                break
+            # Поиск по имени аккорда
+            if query in chord.lower():
+                results.append(chord)
+            # Поиск по описанию
+            elif chord in CHORDS_DESCRIPTIONS:
+                description = CHORDS_DESCRIPTIONS[chord].lower()
+                if query in description:
                     results.append(chord)
-                # Поиск по описанию
-                elif chord in CHORDS_DESCRIPTIONS:
-                    description = CHORDS_DESCRIPTIONS[chord].lower()
-                    if query in description:
-                        results.append(chord)
+        return results
 
+    def show_search_results(self, query, results):
+        """Вывод результатов поиска аккордов"""
+        try:
             self.results_list.clear()
             for chord in results:
                 self.results_list.addItem(chord)
@@ -756,200 +775,11 @@ class ChordsPage(BasePage):
             self.show_chord_not_found()
 
     def generate_chord_from_config(self, chord_name, variant=1):
-        """Генерация изображения аккорда из конфигурации с высоким качеством"""
+        """Генерация изображения аккорда в масштабе 50%"""
         if not self.config_manager:
             return QPixmap()
 
-        try:
-            variant_key = f"{chord_name}v{variant}" if variant > 1 else chord_name
-            chord_config = self.config_manager.get_chord_config(variant_key)
-
-            if not chord_config:
-                chord_config = self.config_manager.get_chord_config(chord_name)
-                if not chord_config:
-                    return QPixmap()
-
-            # Получаем элементы для текущего типа отображения
-            if self.current_display_type == "fingers":
-                elements = chord_config.get('elements_fingers', [])
-                print(f"👆 Используем элементы пальцев: {len(elements)}")
-            else:
-                elements = chord_config.get('elements_notes', [])
-                print(f"🎵 Используем элементы нот: {len(elements)}")
-
-            if not elements:
-                return QPixmap()
-
-            # Применяем обводку
-            elements = self.apply_outline_settings(elements)
-
-            # Загружаем базовое изображение
-            base_image_path = self.config_manager.get_base_image_path()
-            if not base_image_path or not os.path.exists(base_image_path):
-                return QPixmap()
-
-            original_pixmap = QPixmap(base_image_path)
-            if original_pixmap.isNull():
-                return QPixmap()
-
-            # Получаем область обрезки
-            crop_rect = chord_config.get('crop_rect')
-            if not crop_rect:
-                return QPixmap()
-
-            crop_x, crop_y, crop_width, crop_height = crop_rect
-
-            # Проверяем границы
-            crop_x = max(0, min(crop_x, original_pixmap.width() - 1))
-            crop_y = max(0, min(crop_y, original_pixmap.height() - 1))
-            crop_width = max(1, min(crop_width, original_pixmap.width() - crop_x))
-            crop_height = max(1, min(crop_height, original_pixmap.height() - crop_y))
-
-            print(f"🎯 Оригинальное изображение: {original_pixmap.width()}x{original_pixmap.height()}")
-            print(f"🎯 Область обрезки: ({crop_x}, {crop_y}, {crop_width}, {crop_height})")
-
-            # Создаем новое изображение размером с область обрезки
-            result_pixmap = QPixmap(crop_width, crop_height)
-            result_pixmap.fill(Qt.transparent)
-
-            painter = QPainter(result_pixmap)
-
-            # ВЫСОКОЕ КАЧЕСТВО РЕНДЕРИНГА
-            painter.setRenderHint(QPainter.Antialiasing, True)
-            painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
-            painter.setRenderHint(QPainter.TextAntialiasing, True)
-
-            # Копируем область из оригинального изображения
-            painter.drawPixmap(0, 0, original_pixmap, crop_x, crop_y, crop_width, crop_height)
-
-            # Рисуем элементы
-            self.draw_elements_on_canvas(painter, elements, (crop_x, crop_y, crop_width, crop_height))
-            painter.end()
-
-            # МАСШТАБИРОВАНИЕ
-            display_width = int(crop_width * 0.5)  # 50% масштаб
-            display_height = int(crop_height * 0.5)  # 50% масштаб
-
-            print(f"📏 Масштаб (50%): {crop_width}x{crop_height} -> {display_width}x{display_height}")
-
-            scaled_pixmap = result_pixmap.scaled(
-                display_width,
-                display_height,
-                Qt.KeepAspectRatio,
-                Qt.SmoothTransformation
-            )
-
-            print(f"✅ Изображение установлено: {scaled_pixmap.width()}x{scaled_pixmap.height()}")
-            return scaled_pixmap
-
-        except Exception as e:
-            print(f"❌ ChordsPage: Ошибка генерации изображения для {chord_name} вариант {variant}: {e}")
-            import traceback
-            traceback.print_exc()
-            return QPixmap()
-
-    def apply_outline_settings(self, elements):
-        """ИСПРАВЛЕННОЕ применение настроек обводки - идентичное songs_page"""
-        modified_elements = []
-        for element in elements:
-            if not isinstance(element, dict):
-                continue
-
-            element_type = element.get('type')
-            element_data = element.get('data', {}).copy()
-
-            if element_type == 'barre':
-                element_data['style'] = 'orange_gradient'
-                element_data['outline_width'] = 2
-                element_data['outline_color'] = [0, 0, 0]
-
-            elif element_type == 'note':
-                element_data['style'] = 'red_3d'
-                element_data['outline_width'] = 2
-                element_data['outline_color'] = [0, 0, 0]
-                element_data['text_color'] = [255, 255, 255]
-
-                if 'finger' not in element_data:
-                    if 'note_name' in element_data:
-                        element_data['finger'] = element_data['note_name']
-                    else:
-                        element_data['finger'] = '1'
-
-                element_data['display_text'] = 'finger'
-
-            elif element_type == 'fret':
-                element_data['color'] = [0, 0, 0]
-                element_data['style'] = 'default'
-
-            modified_elements.append({
-                'type': element_type,
-                'data': element_data
-            })
-
-        return modified_elements
-
-    def draw_elements_on_canvas(self, painter, elements, crop_rect):
-        """ИСПРАВЛЕННОЕ рисование элементов на canvas"""
-        try:
-            if not DrawingElements:
-                print("❌ ChordsPage: DrawingElements не доступен")
-                return
-
-            painter.setRenderHint(QPainter.Antialiasing, True)
-            painter.setRenderHint(QPainter.SmoothPixmapTransform, True)
-            painter.setRenderHint(QPainter.TextAntialiasing, True)
-
-            for element in elements:
-                try:
-                    element_type = element.get('type')
-                    element_data = element.get('data', {})
-
-                    if element_type == 'fret':
-                        DrawingElements.draw_fret(painter, element_data)
-                    elif element_type == 'note':
-                        DrawingElements.draw_note(painter, element_data)
-                    elif element_type == 'barre':
-                        DrawingElements.draw_barre(painter, element_data)
-
-                except Exception as e:
-                    print(f"❌ ChordsPage: Ошибка рисования элемента {element_type}: {e}")
-
-        except Exception as e:
-            print(f"❌ ChordsPage: Ошибка рисования элементов: {e}")
-
-    def adapt_coordinates(self, element_data, crop_rect):
-        """ИСПРАВЛЕННАЯ адаптация координат элементов - идентичная songs_page"""
-        if not crop_rect:
-            return element_data.copy()
-
-        adapted_data = element_data.copy()
-        crop_x, crop_y, crop_width, crop_height = crop_rect
-
-        original_x = element_data.get('x', 0)
-        original_y = element_data.get('y', 0)
-
-        # Простое вычитание координат обрезки для ВСЕХ элементов
-        if 'x' in adapted_data:
-            adapted_data['x'] = original_x - crop_x
-        if 'y' in adapted_data:
-            adapted_data['y'] = original_y - crop_y
-
-        # Преобразуем в целые числа для Qt
-        adapted_data['x'] = int(round(adapted_data.get('x', 0)))
-        adapted_data['y'] = int(round(adapted_data.get('y', 0)))
-
-        # ОСОБАЯ КОРРЕКЦИЯ ТОЛЬКО ДЛЯ БАРЕ
-        if adapted_data.get('type') == 'barre':
-            barre_width = adapted_data.get('width', 100)
-            barre_height = adapted_data.get('height', 20)
-
-            # Для баре - координаты указывают на центр, нужно сместить в левый верхний угол
-            if 'x' in adapted_data:
-                adapted_data['x'] = adapted_data['x'] - (barre_width // 2)
-            if 'y' in adapted_data:
-                adapted_data['y'] = adapted_data['y'] - (barre_height // 2)
-
-        return adapted_data
+        return ChordRenderer.render(chord_name, variant, self.current_display_type, 0.5, ChordsPageRenderSettings)
 
     def show_chord_not_found(self):
         """Показ сообщения об отсутствии аккорда"""
@@ -1,7 +1,6 @@
 # gui/pages/songs_page.py
 import os
 import re
-import html
 import json
 import tempfile
 import pandas as pd
@@ -9,7 +8,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QLineEdit, QListWidget, QTextBrowser, QLabel,
                              QFrame, QScrollArea, QSizePolicy, QComboBox)
 from PyQt5.QtCore import QUrl, Qt, QPropertyAnimation, QEasingCurve
-from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen
+from PyQt5.QtGui import QPixmap, QImage, QPainter, QPen, QTextCursor
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
 
 from .base_page import BasePage
@@ -18,17 +17,14 @@ from gui.widgets.buttons import ModernButton, MenuButton, ChordButton, SoundButt
 from gui.widgets.labels import AdaptiveChordLabel
 from gui.widgets.media import ScrollChordButtonsWidget
 from database.queries import SongQueries
-import database.db_scripts as db
+from database.repository import get_repository
+from database.song_catalog import SongCatalog
 from config.styles import DarkTheme
-
-# Импортируем систему отображения аккордов
-try:
-    from drawing_elements import DrawingElements
-
-    print("✅ DrawingElements загружен")
-except ImportError as e:
-    print(f"❌ Ошибка загрузки DrawingElements: {e}")
-    DrawingElements = None
+from config.settings_chord_render import ChordRenderSettings
+from core.chord_renderer import ChordRenderer
+from core.workers import start_task
+from core.search_controller import SearchController
+import core.song_loader as song_loader
 
 # Импортируем данные аккордов из const
 try:
@@ -100,6 +96,11 @@ class ChordConfigManager:
                     all_chords = ChordManager.get_all_chords()
                     print(f"📊 Всего аккордов в системе: {len(all_chords)}")
 
+                    # В ленивом режиме конфигурации создаются при первом обращении к аккорду
+                    if ChordManager.LAZY_VARIANTS:
+                        print("📊 Конфигурации будут созданы по запросу")
+                        return True
+
                     # Создаем кэш конфигураций из Python данных
                     self.create_chord_configs_from_python()
                     print(f"📊 Создано конфигураций: {len(self.chord_configs_cache)}")
@@ -124,37 +125,61 @@ class ChordConfigManager:
             all_chords = ChordManager.get_all_chords()
 
             for chord_name in all_chords:
-                chord_data = ChordManager.get_chord_data(chord_name)
-                if chord_data:
-                    # Получаем варианты аккорда
-                    variants = chord_data.get('variants', [])
-
-                    for variant in variants:
-                        variant_num = variant.get('variant_number', 1)
-                        variant_key = f"{chord_name}v{variant_num}" if variant_num > 1 else chord_name
-
-                        # Используем данные из нового формата с разделением на пальцы/ноты
-                        drawing_elements_fingers = variant.get('drawing_elements_fingers', {})
-                        drawing_elements_notes = variant.get('drawing_elements_notes', {})
-
-                        self.chord_configs_cache[variant_key] = {
-                            'base_info': {
-                                'chord': chord_name,
-                                'variant': str(variant_num),
-                                'caption': variant.get('description', ''),
-                                'type': chord_data.get('type', '')
-                            },
-                            'crop_rect': variant.get('crop_rect'),
-                            'drawing_elements_fingers': drawing_elements_fingers,
-                            'drawing_elements_notes': drawing_elements_notes,
-                            'sound_files': variant.get('sound_files', [])
-                        }
+                self.add_chord_configs(chord_name, ChordManager.get_chord_data(chord_name))
 
             print(f"✅ Создано {len(self.chord_configs_cache)} конфигураций из Python данных")
 
         except Exception as e:
             print(f"❌ Ошибка создания конфигураций из Python данных: {e}")
 
+    def add_chord_configs(self, chord_name, chord_data):
+        """Добавление конфигураций всех вариантов аккорда в кэш"""
+        if not chord_data:
+            return
+
+        # Получаем варианты аккорда
+        variants = chord_data.get('variants', [])
+
+        for variant in variants:
+            variant_num = variant.get('variant_number', 1)
+            variant_key = f"{chord_name}v{variant_num}" if variant_num > 1 else chord_name
+
+            # Используем данные из нового формата с разделением на пальцы/ноты
+            drawing_elements_fingers = variant.get('drawing_elements_fingers', {})
+            drawing_elements_notes = variant.get('drawing_elements_notes', {})
+
+            self.chord_configs_cache[variant_key] = {
+                'base_info': {
+                    'chord': chord_name,
+                    'variant': str(variant_num),
+                    'caption': variant.get('description', ''),
+                    'type': chord_data.get('type', '')
+                },
+                'ram': variant.get('ram'),
+                'crop_rect': variant.get('crop_rect'),
+                'drawing_elements_fingers': drawing_elements_fingers,
+                'drawing_elements_notes': drawing_elements_notes,
+                'sound_files': variant.get('sound_files', [])
+            }
+
+    def load_chord_configs(self, chord_name):
+        """Ленивая загрузка конфигураций аккорда из ChordManager"""
+        try:
+            from core.chord_manager import ChordManager
+
+            # Ключ варианта имеет вид 'Amv2' - отделяем номер варианта
+            match = re.match(r'^(.+)v\d+$', chord_name)
+            base_names = [chord_name, match.group(1)] if match else [chord_name]
+
+            for base_name in base_names:
+                chord_data = ChordManager.get_chord_data(base_name)
+                if chord_data:
+                    self.add_chord_configs(chord_data.get('name', base_name), chord_data)
+                    return
+
+        except ImportError as e:
+            print(f"⚠️ Ошибка импорта ChordManager: {e}")
+
     def get_chord_config(self, chord_name):
         """Получение конфигурации аккорда с улучшенным поиском"""
         names_to_try = [
@@ -165,6 +190,12 @@ class ChordConfigManager:
             chord_name.upper().replace('M', 'm'),
         ]
 
+        for name in names_to_try:
+            if name in self.chord_configs_cache:
+                return self.chord_configs_cache[name]
+
+        # Конфигурации аккорда еще не созданы - собираем по запросу
+        self.load_chord_configs(chord_name)
         for name in names_to_try:
             if name in self.chord_configs_cache:
                 return self.chord_configs_cache[name]
@@ -180,17 +211,6 @@ class ChordConfigManager:
             print(f"❌ Ошибка получения количества вариантов: {e}")
             return 1
 
-    def get_base_image_path(self):
-        """Получение пути к базовому изображению"""
-        try:
-            from core.chord_manager import ChordManager
-            return ChordManager.get_template_image_path()
-        except ImportError as e:
-            print(f"⚠️ Ошибка импорта ChordManager: {e}")
-
-        # Запасной вариант
-        return os.path.join("source", "img.png")
-
 
 class SongsPage(BasePage):
     """Страница песен и аккордов"""
@@ -208,6 +228,13 @@ class SongsPage(BasePage):
         self.current_chord_name = ""
         self.current_song_title = ""
         self.current_variant = 1
+        self.song_load_task = None  # фоновая загрузка текущей песни
+
+        # Поиск песен вне главного потока с задержкой ввода
+        self.search_controller = SearchController(self.run_song_search, self)
+        self.search_controller.results_ready.connect(self.show_search_results)
+        self.search_controller.search_failed.connect(
+            lambda query, error: print(f"Ошибка поиска: {error}"))
 
         # Настройки отображения аккордов
         self.current_display_type = "fingers"  # По умолчанию пальцы
@@ -357,6 +384,7 @@ class SongsPage(BasePage):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("🔍 Введите название песни...")
         self.search_input.returnPressed.connect(self.search_songs)
+        self.search_input.textEdited.connect(self.search_controller.request)
 
         self.search_button = QPushButton("Найти")
         self.search_button.setCursor(Qt.PointingHandCursor)
@@ -615,20 +643,30 @@ class SongsPage(BasePage):
         pass
 
     def search_songs(self):
-        """Поиск песен в базе данных"""
-        try:
-            query = self.search_input.text().strip()
-            if not query:
-                return
+        """Поиск песен по кнопке «Найти» или Enter (без задержки)"""
+        query = self.search_input.text().strip()
+        if not query:
+            return
+
+        self.search_controller.search_now(query)
+        self.search_input.clear()
 
-            results = db.select_search_text(query)
+    def run_song_search(self, token, report, query):
+        """Поиск песен в фоновом потоке (без обращения к виджетам)"""
+        # Встроенная база (SQLite) ищет по своему FTS5-индексу. Для PostgreSQL -
+        # каталог в памяти с теми же результатами, без него - запрос к базе
+        if not get_repository().is_local and SongCatalog.ensure_loaded():
+            return SongCatalog.search(query)
+        return SongQueries.search_songs(query)
 
+    def show_search_results(self, query, results):
+        """Вывод результатов поиска"""
+        try:
             self.results_list.clear()
             for elem in results:
                 self.results_list.addItem(elem)
 
             self.results_list.show()
-            self.search_input.clear()
             self.adjust_results_list_height()
 
         except Exception as e:
@@ -678,55 +716,84 @@ class SongsPage(BasePage):
             self.chords_main_container.hide()
 
             self.current_chord_name = ""
+            self.chords_list = []
             self.current_song_title = item.text()
             self.current_variant = 1
 
             self.song_title_label.setText(f"🎵 {self.current_song_title}")
 
-            song_info = db.select_chord_song_info(self.current_song_title)
-
-            with open(f'{song_info[4]}', 'r', encoding='utf-8-sig') as f:
-                lines = f.readlines()
-
-            chords_raw = song_info[3]
-            if chords_raw:
-                self.chords_list = [ch.strip() for ch in chords_raw.split(',') if ch.strip()]
-            else:
-                self.chords_list = []
+            # Данные из базы, чтение файла и сборка HTML - в фоновом потоке;
+            # загрузка предыдущей песни отменяется
+            if self.song_load_task is not None:
+                self.song_load_task.cancel()
+            self.song_load_task = start_task(
+                song_loader.load_song, self.current_song_title,
+                on_partial=self.on_song_block_loaded,
+                on_finished=self.on_song_loaded,
+                on_failed=self.on_song_load_failed
+            )
 
-            self.create_chord_buttons()
+        except Exception as e:
+            print(f"Ошибка загрузки песни: {e}")
+            import traceback
+            traceback.print_exc()
 
-            if len(lines) >= 3:
-                lines = lines[3:]
+    def on_song_block_loaded(self, token, block):
+        """Очередной блок большой песни (главный поток): первый блок заменяет текст,
+        следующие дописываются в конец документа"""
+        if self.song_load_task is None or token is not self.song_load_task.token:
+            return
 
-            # Подготавливаем текст
-            raw_text = ''.join(lines)
+        try:
+            if block['index'] == 0:
+                self.apply_song(block['chords'], block['html'])
+            else:
+                cursor = QTextCursor(self.song_text.document())
+                cursor.movePosition(QTextCursor.End)
+                cursor.insertHtml(block['html'])
 
-            from utils.chord_parser import ChordParser
+        except Exception as e:
+            print(f"Ошибка загрузки песни: {e}")
+            import traceback
+            traceback.print_exc()
 
-            if self.chords_list:
-                processed_text = ChordParser.word_by_word_processing(raw_text, self.chords_list)
-            else:
-                lines_clean = [line for line in raw_text.split('\n') if line.strip()]
-                processed_text = '<br>'.join(html.escape(line) for line in lines_clean)
+    def on_song_loaded(self, token, song):
+        """Применение загруженной песни (главный поток)"""
+        if self.song_load_task is None or token is not self.song_load_task.token:
+            return
+        self.song_load_task = None
 
-            styled_text = f"""
-            <div style="font-family: 'Segoe UI', Arial, sans-serif; font-size: 11pt; line-height: 1.4; color: #ecf0f1; white-space: pre-wrap;">
-                {processed_text}
-            </div>
-            """
-            self.song_text.setHtml(styled_text)
+        # Большая песня уже выведена блоками
+        if song.get('streamed'):
+            return
 
-            if self.chords_list:
-                first_chord = self.chords_list[0]
-                chord_url = QUrl(first_chord)
-                self.chord_clicked(chord_url)
+        try:
+            self.apply_song(song['chords'], song['html'])
 
         except Exception as e:
             print(f"Ошибка загрузки песни: {e}")
             import traceback
             traceback.print_exc()
 
+    def apply_song(self, chords_list, song_html):
+        """Вывод текста песни, кнопок аккордов и первого аккорда"""
+        self.chords_list = chords_list
+        self.create_chord_buttons()
+
+        self.song_text.setHtml(song_html)
+
+        if self.chords_list:
+            first_chord = self.chords_list[0]
+            chord_url = QUrl(first_chord)
+            self.chord_clicked(chord_url)
+
+    def on_song_load_failed(self, token, error):
+        """Ошибка фоновой загрузки песни"""
+        if self.song_load_task is None or token is not self.song_load_task.token:
+            return
+        self.song_load_task = None
+        print(f"Ошибка загрузки песни: {error}")
+
     def create_chord_buttons(self):
         """Создает кнопки аккордов с пагинацией"""
         chords_layout = self.scroll_chords_widget.chords_layout
@@ -1000,360 +1067,8 @@ class SongsPage(BasePage):
         self.chord_image_label.setChordPixmap(pixmap)
 
     def generate_chord_from_config(self, chord_name, variant=1):
-        """Генерация изображения аккорда из конфигурации с УЛУЧШЕННЫМ КАЧЕСТВОМ"""
-        try:
-            # Получаем конфигурацию для конкретного варианта
-            variant_key = f"{chord_name}v{variant}" if variant > 1 else chord_name
-            chord_config = self.config_manager.get_chord_config(variant_key)
-
-            if not chord_config:
-                print(f"❌ Конфигурация не найдена для: {variant_key}")
-                return QPixmap()
-
-            # Получаем элементы для текущего типа отображения
-            if self.current_display_type == "fingers":
-                elements_data = chord_config.get('drawing_elements_fingers', {})
-                print(f"👆 Используем элементы ПАЛЬЦЕВ:")
-            else:
-                elements_data = chord_config.get('drawing_elements_notes', {})
-                print(f"🎵 Используем элементы НОТ:")
-
-            # Объединяем все элементы в один список для отрисовки
-            all_elements = []
-            for element_type, elements_list in elements_data.items():
-                all_elements.extend(elements_list)
-                print(f"   {element_type}: {len(elements_list)} элементов")
-
-            if not all_elements:
-                print(f"❌ Нет элементов для аккорда {variant_key} в режиме {self.current_display_type}")
-                return QPixmap()
-
-            # Применяем обводку
-            elements = self.apply_outline_settings(all_elements)
-
-            # Загружаем базовое изображение
-            base_image_path = self.config_manager.get_base_image_path()
-            if not base_image_path or not os.path.exists(base_image_path):
-                print(f"❌ Базовое изображение не найдено: {base_image_path}")
-                return QPixmap()
-
-            original_pixmap = QPixmap(base_image_path)
-            if original_pixmap.isNull():
-                print(f"❌ Не удалось загрузить базовое изображение: {base_image_path}")
-                return QPixmap()
-
-            # Получаем область обрезки
-            crop_rect = chord_config.get('crop_rect')
-            if not crop_rect:
-                print(f"❌ Нет области обрезки для аккорда {variant_key}")
-                return QPixmap()
-
-            try:
-                # Проверяем тип crop_rect и преобразуем в кортеж
-                if isinstance(crop_rect, dict):
-                    crop_x = crop_rect.get('x', 0)
-                    crop_y = crop_rect.get('y', 0)
-                    crop_width = crop_rect.get('width', 0)
-                    crop_height = crop_rect.get('height', 0)
-                elif isinstance(crop_rect, (list, tuple)) and len(crop_rect) == 4:
-                    crop_x, crop_y, crop_width, crop_height = crop_rect
-                else:
-                    print(f"❌ Неверный формат crop_rect: {type(crop_rect)}")
-                    return QPixmap()
-
-                # Проверяем границы
-                crop_x = max(0, min(crop_x, original_pixmap.width() - 1))
-                crop_y = max(0, min(crop_y, original_pixmap.height() - 1))
-                crop_width = max(1, min(crop_width, original_pixmap.width() - crop_x))
-                crop_height = max(1, min(crop_height, original_pixmap.height() - crop_y))
-
-                # 🔥 ИСПРАВЛЕНИЕ: СОЗДАЕМ ИЗОБРАЖЕНИЕ В ОРИГИНАЛЬНОМ РАЗМЕРЕ
-                # Используем оригинальные размеры области обрезки для максимального качества
-                result_pixmap = QPixmap(crop_width, crop_height)
-                result_pixmap.fill(Qt.transparent)
-
-                painter = QPainter(result_pixmap)
-                painter.setRenderHint(QPainter.Antialiasing)
-                painter.setRenderHint(QPainter.SmoothPixmapTransform)
-                painter.setRenderHint(QPainter.TextAntialiasing)
-
-                # Копируем область из оригинального изображения
-                painter.drawPixmap(0, 0, original_pixmap, crop_x, crop_y, crop_width, crop_height)
-
-                # Рисуем элементы
-                self.draw_elements_on_canvas(painter, elements, (crop_x, crop_y, crop_width, crop_height))
-                painter.end()
-
-                # 🔥 ИСПРАВЛЕНИЕ: НЕ МАСШТАБИРУЕМ ИЗОБРАЖЕНИЕ - сохраняем оригинальный размер
-                # Возвращаем изображение в оригинальном размере для максимального качества
-                print(f"✅ Сгенерирован аккорд в оригинальном размере: {crop_width}x{crop_height}")
-
-                return result_pixmap
-
-            except Exception as crop_error:
-                print(f"❌ Ошибка обработки crop_rect для {chord_name} вариант {variant}: {crop_error}")
-                return QPixmap()
-
-        except Exception as e:
-            print(f"❌ Ошибка генерации изображения для {chord_name} вариант {variant}: {e}")
-            return QPixmap()
-
-    def apply_outline_settings(self, elements):
-        """ИСПРАВЛЕННОЕ применение настроек обводки с расширенной отладкой"""
-        print(f"🎯 НАЧАЛО ОБРАБОТКИ ЭЛЕМЕНТОВ: {len(elements)} элементов")
-
-        modified_elements = []
-
-
-
-        for index, element in enumerate(elements):
-            if not isinstance(element, dict):
-                print(f"❌ Элемент {index} - не словарь: {element}")
-                continue
-
-            element_type = element.get('type', 'unknown')
-            original_data = element.get('data', {})
-            element_data = original_data.copy()
-
-            print(f"\n🔍 ЭЛЕМЕНТ {index}: {element_type}")
-            print(f"   Полные данные: {element}")  # ← ДОБАВИТЬ ЭТУ СТРОКУ!
-
-            # ОСОБАЯ ОТЛАДКА ДЛЯ БАРЕ
-            if element_type == 'barre':
-                print(f"🎸 БАРЕ ДО apply_outline_settings:")
-                print(f"   Координаты: x={element_data.get('x')}, y={element_data.get('y')}")
-                print(f"   Размеры: {element_data.get('width')}x{element_data.get('height')}")
-                print(f"   Полные данные: {element_data}")
-
-            if element_type == 'barre':
-                print("🎸 Обработка БАРЕ:")
-                # Сохраняем оригинальный стиль или используем оранжевый по умолчанию
-
-                original_style = element_data.get('style')
-                if not original_style or original_style == 'default':
-                    element_data['style'] = 'orange_gradient'
-                    print(f"  🎨 Стиль: установлен 'orange_gradient' (был: {original_style})")
-                else:
-                    print(f"  🎨 Стиль: сохранен оригинальный '{original_style}'")
-
-                element_data['outline_width'] = 2
-                element_data['outline_color'] = [0, 0, 0]
-                print(f"  📏 Обводка: ширина 2px, цвет черный")
-
-                print(f"🎸 БАРЕ ПОСЛЕ apply_outline_settings:")
-                print(f"   Координаты: x={element_data.get('x')}, y={element_data.get('y')}")
-                print(f"   Размеры: {element_data.get('width')}x{element_data.get('height')}")
-
-            elif element_type == 'note':
-                print("🎵 Обработка НОТЫ:")
-
-                # СОХРАНЯЕМ оригинальные данные!
-                original_style = element_data.get('style', 'default')
-                original_finger = element_data.get('finger')
-                original_note_name = element_data.get('note_name')
-                original_display_text = element_data.get('display_text', 'finger')
-
-                print(f"  🎨 Оригинальный стиль: {original_style}")
-                print(f"  👆 Оригинальный палец: {original_finger}")
-                print(f"  🎵 Оригинальное имя ноты: {original_note_name}")
-                print(f"  📝 Оригинальный текст отображения: {original_display_text}")
-
-                # Только добавляем обводку, не меняем стиль!
-                element_data['outline_width'] = 2
-                element_data['outline_color'] = [0, 0, 0]
-
-                # Определяем что отображать
-                if original_display_text == 'note_name' and original_note_name:
-                    display_symbol = original_note_name
-                    print(f"  ✅ Отображаем имя ноты: {display_symbol}")
-                elif original_display_text == 'symbol' and element_data.get('symbol'):
-                    display_symbol = element_data.get('symbol')
-                    print(f"  ✅ Отображаем символ: {display_symbol}")
-                elif original_finger:
-                    display_symbol = original_finger
-                    print(f"  ✅ Отображаем палец: {display_symbol}")
-                else:
-                    # Если ничего нет, пробуем получить из других полей
-                    display_symbol = original_note_name or original_finger or '?'
-                    print(f"  ⚠️  Не найдены данные, используем: {display_symbol}")
-
-                # Убедимся что есть данные для отображения
-                if not element_data.get('finger') and not element_data.get('note_name'):
-                    element_data['finger'] = display_symbol
-                    print(f"  🔧 Установлен finger: {display_symbol}")
-
-                element_data['display_text'] = original_display_text
-                print(f"  📝 Финальный текст отображения: {original_display_text} -> {display_symbol}")
-
-            elif element_type == 'fret':
-                print("🎻 Обработка ЛАДА:")
-                original_color = element_data.get('color', [0, 0, 0])
-                original_style = element_data.get('style', 'default')
-                print(f"  🎨 Оригинальный цвет: {original_color}")
-                print(f"  🎨 Оригинальный стиль: {original_style}")
-                # Для ладов просто сохраняем оригинальные настройки
-                element_data['color'] = original_color
-                element_data['style'] = original_style
-
-            elif element_type == 'open_note':
-                print("🔘 Обработка ОТКРЫТОЙ СТРУНЫ:")
-                original_style = element_data.get('style', 'default')
-                original_symbol = element_data.get('symbol', 'O')
-                print(f"  🎨 Стиль: {original_style}")
-                print(f"  🔤 Символ: {original_symbol}")
-                # Сохраняем оригинальные настройки
-
-            else:
-                print(f"❓ Неизвестный тип элемента: {element_type}")
-
-            print(f"✅ Финальные данные элемента {element_type}:")
-            print(f"   {json.dumps(element_data, indent=2, ensure_ascii=False)}")
-
-            modified_elements.append({
-                'type': element_type,
-                'data': element_data
-            })
-
-        print(f"\n🎉 ОБРАБОТКА ЗАВЕРШЕНА: {len(modified_elements)} элементов модифицировано")
-        return modified_elements
-
-    def draw_elements_on_canvas(self, painter, elements, crop_rect):
-        """Рисование элементов на canvas с ПРАВИЛЬНЫМ ПОРЯДКОМ"""
-        try:
-            if not DrawingElements:
-                print("❌ DrawingElements не доступен")
-                return
-
-            # 🔥 ИСПРАВЛЕНИЕ: ПРАВИЛЬНЫЙ ПОРЯДОК ОТРИСОВКИ
-            # 1. Сначала рисуем лады (самый нижний слой)
-            for element in elements:
-                if element['type'] == 'fret':
-                    self.draw_fret_on_canvas(painter, element['data'], crop_rect)
-
-            # 2. Затем рисуем баре (под нотами)
-            for element in elements:
-                if element['type'] == 'barre':
-                    self.draw_barre_on_canvas(painter, element['data'], crop_rect)
-
-            # 3. Затем рисуем ноты (поверх баре)
-            for element in elements:
-                if element['type'] == 'note':
-                    self.draw_note_on_canvas(painter, element['data'], crop_rect)
-
-            # 4. Наконец рисуем открытые ноты (самый верхний слой)
-            for element in elements:
-                if element['type'] == 'open_note':
-                    self.draw_open_note_on_canvas(painter, element['data'], crop_rect)
-
-            print(f"✅ Все элементы отрисованы в правильном порядке")
-
-        except Exception as e:
-            print(f"❌ Ошибка рисования элементов: {e}")
-            import traceback
-            traceback.print_exc()
-
-    def draw_fret_on_canvas(self, painter, fret_data, crop_rect):
-        """Рисование лада на canvas"""
-        try:
-            adapted_data = self.adapt_coordinates(fret_data, crop_rect)
-            DrawingElements.draw_fret(painter, adapted_data)
-        except Exception as e:
-            print(f"❌ Ошибка рисования лада: {e}")
-
-    def draw_note_on_canvas(self, painter, note_data, crop_rect):
-        """Рисование ноты на canvas с отладкой"""
-        try:
-            print(f"🎵 Данные ноты ДО адаптации: {note_data}")
-            adapted_data = self.adapt_coordinates(note_data, crop_rect)
-            print(f"🎵 Данные ноты ПОСЛЕ адаптации: {adapted_data}")
-            DrawingElements.draw_note(painter, adapted_data)
-        except Exception as e:
-            print(f"❌ Ошибка рисования ноты: {e}")
-
-    def draw_barre_on_canvas(self, painter, barre_data, crop_rect):
-        """Рисование баре на canvas с правильными координатами и отладкой"""
-        try:
-            print(f"🎸 РИСОВАНИЕ БАРЕ:")
-            print(f"   Данные баре ДО адаптации: {barre_data}")
-            adapted_data = self.adapt_coordinates(barre_data, crop_rect)
-            print(f"   Данные баре ПОСЛЕ адаптации: {adapted_data}")
-            print(f"   Crop rect: {crop_rect}")
-            # Проверяем, попадают ли координаты в область видимости
-            x = adapted_data.get('x', 0)
-            y = adapted_data.get('y', 0)
-            width = adapted_data.get('width', 0)
-            height = adapted_data.get('height', 0)
-            print(f"   Позиция на canvas: x={x}, y={y}, width={width}, height={height}")
-            DrawingElements.draw_barre(painter, adapted_data)
-
-        except Exception as e:
-            print(f"❌ Ошибка рисования баре: {e}")
-
-    def draw_open_note_on_canvas(self, painter, open_note_data, crop_rect):
-        """Рисование открытой ноты на canvas"""
-        try:
-            adapted_data = self.adapt_coordinates(open_note_data, crop_rect)
-            # Для открытых нот используем специальный метод или draw_note
-            DrawingElements.draw_note(painter, adapted_data)
-        except Exception as e:
-            print(f"❌ Ошибка рисования открытой ноты: {e}")
-
-    def adapt_coordinates(self, element_data, crop_rect):
-        if not crop_rect:
-            return element_data.copy()
-
-        # Копируем данные элемента
-        adapted_data = element_data.copy()
-
-        # 🔥 ДИАГНОСТИКА: какой тип элемента?
-        element_type = element_data.get('type', 'unknown')
-        print(f"🎯 Адаптация {element_type}:")
-        print(f"   Полные данные: {element_data}")
-
-        # Получаем координаты обрезки
-        crop_x, crop_y, crop_width, crop_height = crop_rect
-
-        original_x = element_data.get('x', 0)
-        original_y = element_data.get('y', 0)
-
-        print(f"   Оригинальные координаты: ({original_x}, {original_y})")
-        print(f"   Область обрезки: ({crop_x}, {crop_y}, {crop_width}, {crop_height})")
-
-        # Для ВСЕХ элементов просто вычитаем координаты обрезки
-        if 'x' in adapted_data:
-            adapted_data['x'] = original_x - crop_x
-            print(f"   x после вычитания crop: {original_x} - {crop_x} = {adapted_data['x']}")
-
-        if 'y' in adapted_data:
-            adapted_data['y'] = original_y - crop_y
-            print(f"   y после вычитания crop: {original_y} - {crop_y} = {adapted_data['y']}")
-
-        # 🔥 ИСПРАВЛЕНИЕ: определяем тип по данным
-        # Если есть width и height - вероятно это баре
-        if (adapted_data.get('width') and adapted_data.get('height') and
-                adapted_data.get('width') > 50 and adapted_data.get('height') > 50):
-            print(f"🎸 ОПРЕДЕЛЕН БАРЕ ПО ДАННЫМ: width={adapted_data.get('width')}, height={adapted_data.get('height')}")
-
-            barre_width = adapted_data.get('width', 100)
-            barre_height = adapted_data.get('height', 20)
-
-            print(f"🎸 ПРЕОБРАЗОВАНИЕ БАРЕ:")
-            print(f"   До преобразования: x={adapted_data['x']}, y={adapted_data['y']}")
-            print(f"   Размеры баре: {barre_width}x{barre_height}")
-
-            # Преобразуем ЦЕНТР в ЛЕВЫЙ ВЕРХНИЙ УГОЛ
-            adapted_data['x'] = adapted_data['x'] - (barre_width // 2)
-            adapted_data['y'] = adapted_data['y'] - (barre_height // 2)
-
-            print(f"   После преобразования: x={adapted_data['x']}, y={adapted_data['y']}")
-
-        # Преобразуем в целые числа для Qt
-        adapted_data['x'] = int(round(adapted_data.get('x', 0)))
-        adapted_data['y'] = int(round(adapted_data.get('y', 0)))
-
-        print(f"   📍 Финальные координаты: ({adapted_data.get('x', 0)}, {adapted_data.get('y', 0)})")
-
-        return adapted_data
+        """Генерация изображения аккорда в оригинальном размере (максимальное качество)"""
+        return ChordRenderer.render(chord_name, variant, self.current_display_type, 1.0, ChordRenderSettings)
 
     def toggle_display_type(self):
         """Переключение между нотами и пальцами"""
@@ -7,6 +7,10 @@ from PyQt5.QtGui import QPainter, QColor, QLinearGradient, QFont
 from scipy import signal
 import warnings
 
+from core.pitch_detector import PitchDetector
+from core.tuner_dsp import TunerDSPWorker
+from core.note_table import NoteTable
+
 warnings.filterwarnings('ignore')
 
 
@@ -144,6 +148,30 @@ class SpectrumWidget(QtWidgets.QWidget):
 
 
 class UniversalGuitarTuner(QtWidgets.QMainWindow):
+    DEFAULT_DETECTOR = {'method': 'yin', 'min_freq': 60.0, 'max_freq': 1200.0}
+    UI_FPS = 30  # частота обновления интерфейса тюнера
+    A4_REFERENCE = 440.0  # Гц
+
+    STRING_NOTE_STYLE = """
+        font-size: 18px; 
+        font-weight: bold; 
+        color: #ecf0f1;
+        background: rgba(44, 62, 80, 0.9);
+        border-radius: 15px;
+        padding: 10px;
+        margin: 2px;
+    """
+    # Струна строя, на ноту которой настраивается инструмент
+    ACTIVE_STRING_NOTE_STYLE = """
+        font-size: 18px; 
+        font-weight: bold; 
+        color: #ffffff;
+        background: rgba(46, 204, 113, 0.9);
+        border-radius: 15px;
+        padding: 10px;
+        margin: 2px;
+    """
+
     def __init__(self):
         super().__init__()
         self.tunings = {
@@ -157,25 +185,42 @@ class UniversalGuitarTuner(QtWidgets.QMainWindow):
             "Укулеле баритон": ['D3', 'G3', 'B3', 'E4']
         }
 
-        self.note_frequencies = {
-            'C0': 16.35, 'C#0': 17.32, 'D0': 18.35, 'D#0': 19.45, 'E0': 20.60, 'F0': 21.83,
-            'F#0': 23.12, 'G0': 24.50, 'G#0': 25.96, 'A0': 27.50, 'A#0': 29.14, 'B0': 30.87,
-            'C1': 32.70, 'C#1': 34.65, 'D1': 36.71, 'D#1': 38.89, 'E1': 41.20, 'F1': 43.65,
-            'F#1': 46.25, 'G1': 49.00, 'G#1': 51.91, 'A1': 55.00, 'A#1': 58.27, 'B1': 61.74,
-            'C2': 65.41, 'C#2': 69.30, 'D2': 73.42, 'D#2': 77.78, 'E2': 82.41, 'F2': 87.31,
-            'F#2': 92.50, 'G2': 98.00, 'G#2': 103.83, 'A2': 110.00, 'A#2': 116.54, 'B2': 123.47,
-            'C3': 130.81, 'C#3': 138.59, 'D3': 146.83, 'D#3': 155.56, 'E3': 164.81, 'F3': 174.61,
-            'F#3': 185.00, 'G3': 196.00, 'G#3': 207.65, 'A3': 220.00, 'A#3': 233.08, 'B3': 246.94,
-            'C4': 261.63, 'C#4': 277.18, 'D4': 293.66, 'D#4': 311.13, 'E4': 329.63, 'F4': 349.23,
-            'F#4': 369.99, 'G4': 392.00, 'G#4': 415.30, 'A4': 440.00, 'A#4': 466.16, 'B4': 493.88,
-            'C5': 523.25, 'C#5': 554.37, 'D5': 587.33, 'D#5': 622.25, 'E5': 659.25, 'F5': 698.46,
-            'F#5': 739.99, 'G5': 783.99, 'G#5': 830.61, 'A5': 880.00, 'A#5': 932.33, 'B5': 987.77
+        # Метод определения высоты тона, диапазон частот и размер кадра для строя
+        # (по умолчанию - DEFAULT_DETECTOR). В кадр YIN должно помещаться два периода
+        # самой низкой ноты: E1 (41.2 Гц) - кадр 4096, B0 (30.9 Гц) - 8192
+        self.tuning_detectors = {
+            "7-струнная": {'method': 'yin', 'min_freq': 50.0},
+            "Бас-гитара (4стр)": {'method': 'yin', 'min_freq': 35.0, 'max_freq': 400.0, 'frame_size': 4096},
+            "Бас-гитара (5стр)": {'method': 'yin', 'min_freq': 28.0, 'max_freq': 400.0, 'frame_size': 8192},
+            "Укулеле сопрано": {'method': 'hps', 'min_freq': 200.0},
         }
 
+        # Ближайшая нота вычисляется по формуле равномерного строя (эталон A4 настраивается)
+        self.note_table = NoteTable(self.A4_REFERENCE)
+
+        self.CHUNK = 2048
+        self.RATE = 44100
+
         self.current_tuning = "Стандарт (6 струн)"
+        self.note_table.set_tuning(self.tunings[self.current_tuning])
+        self.detector = self.create_detector(self.current_tuning)
+
+        # Анализ звука - в отдельном потоке, интерфейс забирает последний результат.
+        # Шаг анализа - один блок записи, буфер вмещает самый большой кадр из всех строев
+        max_frame = max(settings.get('frame_size', self.CHUNK) for settings in self.tuning_detectors.values())
+        self.dsp_worker = TunerDSPWorker(self.detector, hop=self.CHUNK,
+                                         buffer_frames=max(8, 2 * max_frame // self.CHUNK))
+        self.last_result_id = 0
+        self.is_in_tune = None
+
         self.init_ui()
         self.init_audio()
 
+        self.ui_timer = QtCore.QTimer(self)
+        self.ui_timer.setInterval(1000 // self.UI_FPS)
+        self.ui_timer.timeout.connect(self.update_from_dsp)
+        self.ui_timer.start()
+
     def init_ui(self):
         self.setWindowTitle("🎸 Универсальный гитарный тюнер")
         self.setGeometry(100, 100, 800, 700)
@@ -273,6 +318,8 @@ class UniversalGuitarTuner(QtWidgets.QMainWindow):
             self.strings_layout.itemAt(i).widget().setParent(None)
 
         # Добавляем отображения для текущих струн
+        self.string_note_labels = {}
+        self.active_string = None
         strings = self.tunings[self.current_tuning]
         for i, note in enumerate(reversed(strings)):  # reversed для правильного порядка струн
             string_widget = QtWidgets.QWidget()
@@ -291,15 +338,8 @@ class UniversalGuitarTuner(QtWidgets.QMainWindow):
 
             note_label = QtWidgets.QLabel(note)
             note_label.setAlignment(Qt.AlignCenter)
-            note_label.setStyleSheet("""
-                font-size: 18px; 
-                font-weight: bold; 
-                color: #ecf0f1;
-                background: rgba(44, 62, 80, 0.9);
-                border-radius: 15px;
-                padding: 10px;
-                margin: 2px;
-            """)
+            note_label.setStyleSheet(self.STRING_NOTE_STYLE)
+            self.string_note_labels[note] = note_label
 
             string_layout.addWidget(string_label)
             string_layout.addWidget(note_label)
@@ -309,11 +349,17 @@ class UniversalGuitarTuner(QtWidgets.QMainWindow):
     def change_tuning(self, tuning_name):
         self.current_tuning = tuning_name
         self.update_strings_display()
+        self.note_table.set_tuning(self.tunings[tuning_name])
+        self.detector = self.create_detector(tuning_name)
+        self.dsp_worker.set_detector(self.detector)
+
+    def create_detector(self, tuning_name):
+        """Детектор высоты тона с настройками выбранного строя"""
+        settings = {'frame_size': self.CHUNK, **self.DEFAULT_DETECTOR, **self.tuning_detectors.get(tuning_name, {})}
+        return PitchDetector(sample_rate=self.RATE, **settings)
 
     def init_audio(self):
         try:
-            self.CHUNK = 2048
-            self.RATE = 44100
             self.audio = pyaudio.PyAudio()
 
             self.stream = self.audio.open(
@@ -324,6 +370,7 @@ class UniversalGuitarTuner(QtWidgets.QMainWindow):
                 frames_per_buffer=self.CHUNK,
                 stream_callback=self.audio_callback
             )
+            self.dsp_worker.start()
             self.stream.start_stream()
 
         except Exception as e:
@@ -333,89 +380,96 @@ class UniversalGuitarTuner(QtWidgets.QMainWindow):
         if status:
             print(f"Audio status: {status}")
 
-        # Обработка в отдельном потоке через QTimer
-        QtCore.QTimer.singleShot(0, lambda: self.process_audio_data(in_data))
+        # Только копирование в кольцевой буфер - анализ в потоке DSP
+        self.dsp_worker.feed(in_data)
         return (in_data, pyaudio.paContinue)
 
-    def process_audio_data(self, audio_data):
-        try:
-            data = np.frombuffer(audio_data, dtype=np.int16).astype(np.float32)
-
-            # Применяем оконную функцию
-            window = np.hanning(len(data))
-            data = data * window
-
-            # FFT анализ
-            spectrum = np.fft.rfft(data)
-            frequencies = np.fft.rfftfreq(len(data), 1.0 / self.RATE)
-            magnitudes = np.abs(spectrum)
-
-            # Находим основную частоту
-            max_idx = np.argmax(magnitudes[10:]) + 10  # Игнорируем очень низкие частоты
-            frequency = frequencies[max_idx]
+    def update_from_dsp(self):
+        """Обновление интерфейса последним результатом анализа (по таймеру UI_FPS)"""
+        result_id, frequency, spectrum_vis = self.dsp_worker.latest()
+        if result_id == self.last_result_id:
+            return
+        self.last_result_id = result_id
 
-            if 60 < frequency < 1200:  # Диапазон гитарных нот
-                closest_note, target_freq, cents_diff = self.find_closest_note(frequency)
+        try:
+            if frequency is not None:  # Частота в диапазоне строя
+                closest_note, target_freq, cents_diff, in_tuning = self.find_closest_note(frequency)
 
-                # Обновляем UI в главном потоке
                 self.freq_display.setText(f"{frequency:.1f} Hz")
                 self.note_display.setText(closest_note)
+                self.highlight_string(closest_note if in_tuning else None)
                 self.tuning_meter.set_value(cents_diff)
 
-                # Анимация для точной настройки
-                if abs(cents_diff) <= 5:
-                    self.note_display.setStyleSheet("""
-                        font-size: 72px; 
-                        font-weight: bold; 
-                        color: #2ecc71;
-                        background: rgba(46, 204, 113, 0.2);
-                        border-radius: 20px;
-                        padding: 20px;
-                        margin: 20px;
-                    """)
-                    self.note_display.start_animations()
-                else:
-                    self.note_display.setStyleSheet("""
-                        font-size: 72px; 
-                        font-weight: bold; 
-                        color: #e74c3c;
-                        background: rgba(231, 76, 60, 0.2);
-                        border-radius: 20px;
-                        padding: 20px;
-                        margin: 20px;
-                    """)
-                    self.note_display.stop_animations()
+                # Стиль и анимация меняются только при смене состояния настройки
+                self.set_in_tune(abs(cents_diff) <= 5)
 
                 # Обновляем спектр
-                spectrum_vis = magnitudes[:100] / np.max(magnitudes[:100]) if np.max(
-                    magnitudes[:100]) > 0 else magnitudes[:100]
                 self.spectrum_widget.update_spectrum(spectrum_vis)
 
         except Exception as e:
             print(f"Ошибка обработки аудио: {e}")
 
+    def set_in_tune(self, in_tune):
+        if in_tune == self.is_in_tune:
+            return
+        self.is_in_tune = in_tune
+
+        # Анимация для точной настройки
+        if in_tune:
+            self.note_display.setStyleSheet("""
+                font-size: 72px; 
+                font-weight: bold; 
+                color: #2ecc71;
+                background: rgba(46, 204, 113, 0.2);
+                border-radius: 20px;
+                padding: 20px;
+                margin: 20px;
+            """)
+            self.note_display.start_animations()
+        else:
+            self.note_display.setStyleSheet("""
+                font-size: 72px; 
+                font-weight: bold; 
+                color: #e74c3c;
+                background: rgba(231, 76, 60, 0.2);
+                border-radius: 20px;
+                padding: 20px;
+                margin: 20px;
+            """)
+            self.note_display.stop_animations()
+
+    def set_a4_reference(self, a4):
+        """Смена эталонной частоты A4"""
+        self.A4_REFERENCE = a4
+        self.note_table = NoteTable(a4, self.tunings[self.current_tuning])
+
     def find_closest_note(self, frequency):
-        closest_note = None
-        min_diff = float('inf')
-        target_freq = 0
+        """(нота, частота ноты, отклонение в центах, нота струны выбранного строя)"""
+        return self.note_table.nearest(frequency)
+
+    def highlight_string(self, note):
+        """Подсветка струны строя с нотой note (None - ни одной)"""
+        if note == self.active_string:
+            return
 
-        for note, freq in self.note_frequencies.items():
-            diff = abs(frequency - freq)
-            if diff < min_diff:
-                min_diff = diff
-                closest_note = note
-                target_freq = freq
+        previous = self.string_note_labels.get(self.active_string)
+        if previous is not None:
+            previous.setStyleSheet(self.STRING_NOTE_STYLE)
 
-        # Вычисляем разницу в центах
-        cents_diff = 1200 * np.log2(frequency / target_freq) if target_freq > 0 else 0
-        return closest_note, target_freq, cents_diff
+        self.active_string = note
+        current = self.string_note_labels.get(note)
+        if current is not None:
+            current.setStyleSheet(self.ACTIVE_STRING_NOTE_STYLE)
 
     def closeEvent(self, event):
+        if hasattr(self, 'ui_timer'):
+            self.ui_timer.stop()
         if hasattr(self, 'stream'):
             self.stream.stop_stream()
             self.stream.close()
         if hasattr(self, 'audio'):
             self.audio.terminate()
+        self.dsp_worker.stop()
         event.accept()
 
 
@@ -2,12 +2,11 @@ from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QHBoxLayout, QWidget,
 from PyQt5.QtGui import QPixmap, QPainter, QPen
 from PyQt5.QtCore import Qt, QUrl
 from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
-import os
 import tempfile
 
 from gui.widgets.buttons import ModernButton, ChordVariantButton
-from drawing_elements import DrawingElements
 from config.settings_chord_viewer import ChordViewerSettings
+from core.chord_renderer import ChordRenderer
 
 
 class ChordViewerWindow(QDialog):
@@ -149,118 +148,15 @@ class ChordViewerWindow(QDialog):
                 print(f"❌ Вариант {self.current_variant} не существует для аккорда {self.chord_name}")
                 self.current_variant = 1  # Возвращаемся к первому варианту
 
-            # Получаем конкретный вариант
-            variant_config = variants[self.current_variant - 1]
-
             print(f"✅ Загружен вариант {self.current_variant} для аккорда {self.chord_name}")
 
-            # Получаем элементы для текущего типа отображения
-            if self.current_display_type == "fingers":
-                elements_data = variant_config.get('drawing_elements_fingers', {})
-                print(f"👆 Используем элементы ПАЛЬЦЕВ")
-            else:
-                elements_data = variant_config.get('drawing_elements_notes', {})
-                print(f"🎵 Используем элементы НОТ")
-
-            # Объединяем все элементы в один список для отрисовки
-            all_elements = []
-            for element_type, elements_list in elements_data.items():
-                all_elements.extend(elements_list)
-                print(f"   {element_type}: {len(elements_list)} элементов")
-
-            if not all_elements:
-                print(f"❌ Нет элементов для аккорда {self.chord_name} вариант {self.current_variant}")
-                self.show_error_image("Нет данных аккорда")
-                return
-
-            # Применяем обводку с настройками из ChordViewerSettings
-            elements = self.apply_outline_with_settings(all_elements)
-
-            # Загружаем базовое изображение
-            base_image_path = ChordManager.get_template_image_path()
-            if not base_image_path or not os.path.exists(base_image_path):
-                print(f"❌ Базовое изображение не найдено: {base_image_path}")
-                self.show_error_image("Базовое изображение не найдено")
-                return
-
-            original_pixmap = QPixmap(base_image_path)
-            if original_pixmap.isNull():
-                print(f"❌ Не удалось загрузить базовое изображение")
-                self.show_error_image("Ошибка загрузки изображения")
-                return
-
-            # Получаем область обрезки
-            crop_rect = variant_config.get('crop_rect')
-            if not crop_rect:
-                print(f"❌ Нет области обрезки для аккорда {self.chord_name} вариант {self.current_variant}")
-                self.show_error_image("Нет области обрезки")
-                return
-
-            # Преобразуем crop_rect в кортеж
-            if isinstance(crop_rect, dict):
-                crop_x = crop_rect.get('x', 0)
-                crop_y = crop_rect.get('y', 0)
-                crop_width = crop_rect.get('width', 0)
-                crop_height = crop_rect.get('height', 0)
-            elif isinstance(crop_rect, (list, tuple)) and len(crop_rect) == 4:
-                crop_x, crop_y, crop_width, crop_height = crop_rect
-            else:
-                print(f"❌ Неверный формат crop_rect: {type(crop_rect)}")
-                self.show_error_image("Ошибка формата данных")
+            pixmap = ChordRenderer.render(self.chord_name, self.current_variant, self.current_display_type,
+                                          ChordViewerSettings.SCALE_FACTOR, ChordViewerSettings)
+            if pixmap.isNull():
+                self.show_error_image("Ошибка генерации")
                 return
 
-            # Проверяем границы
-            crop_x = max(0, min(crop_x, original_pixmap.width() - 1))
-            crop_y = max(0, min(crop_y, original_pixmap.height() - 1))
-            crop_width = max(1, min(crop_width, original_pixmap.width() - crop_x))
-            crop_height = max(1, min(crop_height, original_pixmap.height() - crop_y))
-
-            print(f"🎯 ОРИГИНАЛЬНЫЕ ДАННЫЕ:")
-            print(f"   Базовое изображение: {original_pixmap.width()}x{original_pixmap.height()}")
-            print(f"   Область обрезки: ({crop_x}, {crop_y}, {crop_width}, {crop_height})")
-
-            # 🔥 ИСПОЛЬЗУЕМ НАСТРОЙКИ МАСШТАБА ИЗ ChordViewerSettings
-            scale_factor = ChordViewerSettings.SCALE_FACTOR
-            scaled_width = int(crop_width * scale_factor)
-            scaled_height = int(crop_height * scale_factor)
-
-            print(
-                f"📏 Масштабирование: {crop_width}x{crop_height} -> {scaled_width}x{scaled_height} (коэф: {scale_factor})")
-
-            # Создаем новое изображение размером с масштабированную область обрезки
-            result_pixmap = QPixmap(scaled_width, scaled_height)
-            result_pixmap.fill(Qt.transparent)
-
-            painter = QPainter(result_pixmap)
-            painter.setRenderHint(QPainter.Antialiasing)
-            painter.setRenderHint(QPainter.SmoothPixmapTransform)
-            painter.setRenderHint(QPainter.TextAntialiasing)
-
-            # Масштабируем и копируем область из оригинального изображения
-            scaled_pixmap = original_pixmap.copy(
-                int(crop_x), int(crop_y), int(crop_width), int(crop_height)
-            ).scaled(
-                scaled_width, scaled_height,
-                Qt.IgnoreAspectRatio, Qt.SmoothTransformation
-            )
-
-            painter.drawPixmap(0, 0, scaled_pixmap)
-
-            # Рисуем элементы в правильном порядке с учетом масштабирования
-            self.draw_elements_on_canvas_scaled(painter, elements, (crop_x, crop_y, crop_width, crop_height),
-                                                scale_factor)
-            painter.end()
-
-            print(f"✅ Сгенерирован аккорд: {result_pixmap.width()}x{result_pixmap.height()}")
-
-            # Устанавливаем изображение
-            self.image_label.setPixmap(result_pixmap)
-
-            # Подгоняем размер окна под изображение
-            self.adjustSize()
-
-            # Проверяем доступность звука
-            self.check_sound_availability()
+            self.show_chord_pixmap(pixmap)
 
         except Exception as e:
             print(f"❌ Ошибка генерации аккорда: {e}")
@@ -268,137 +164,16 @@ class ChordViewerWindow(QDialog):
             traceback.print_exc()
             self.show_error_image("Ошибка генерации")
 
-    def apply_outline_with_settings(self, elements):
-        """Применение настроек обводки из ChordViewerSettings"""
-        modified_elements = []
-        for element in elements:
-            modified_element = element.copy()
-            modified_element['data'] = element['data'].copy()
-
-            element_type = element['type']
-
-            if element_type == 'barre':
-                # 🔥 ИСПОЛЬЗУЕМ НАСТРОЙКИ ДЛЯ БАРЕ
-                modified_element['data']['outline_width'] = ChordViewerSettings.OUTLINE_BARRE_WIDTH
-                modified_element['data']['outline_color'] = ChordViewerSettings.OUTLINE_COLOR
-
-            elif element_type == 'note':
-                # 🔥 ИСПОЛЬЗУЕМ НАСТРОЙКИ ДЛЯ НОТ
-                modified_element['data']['outline_width'] = ChordViewerSettings.OUTLINE_NOTE_WIDTH
-                modified_element['data']['outline_color'] = ChordViewerSettings.OUTLINE_COLOR
-
-                # 🔥 АДАПТИВНЫЙ ТЕКСТ ИЗ НАСТРОЕК
-                if ChordViewerSettings.ADAPTIVE_TEXT_ENABLED:
-                    symbol = modified_element['data'].get('finger') or modified_element['data'].get('note_name', '')
-                    if symbol and len(symbol) > 1:
-                        current_radius = modified_element['data'].get('radius', 12)
-                        new_radius = max(ChordViewerSettings.MIN_NOTE_RADIUS,
-                                         current_radius - ChordViewerSettings.LONG_SYMBOL_RADIUS_REDUCTION)
-                        modified_element['data']['radius'] = new_radius
-                        print(f"  🔧 Уменьшен радиус для '{symbol}': {current_radius} -> {new_radius}")
-
-            elif element_type == 'fret':
-                # 🔥 ИСПОЛЬЗУЕМ НАСТРОЙКИ ДЛЯ ЛАДОВ
-                modified_element['data']['outline_width'] = ChordViewerSettings.OUTLINE_FRET_WIDTH
-                modified_element['data']['outline_color'] = ChordViewerSettings.OUTLINE_COLOR
-                # Устанавливаем цвет текста ладов из настроек
-                modified_element['data']['color'] = ChordViewerSettings.FRET_TEXT_COLOR
-
-            elif element_type == 'open_note':
-                # 🔥 ИСПОЛЬЗУЕМ НАСТРОЙКИ ДЛЯ ОТКРЫТЫХ СТРУН
-                modified_element['data']['outline_width'] = ChordViewerSettings.OUTLINE_OPEN_NOTE_WIDTH
-                modified_element['data']['outline_color'] = ChordViewerSettings.OUTLINE_COLOR
-
-            modified_elements.append(modified_element)
-
-        return modified_elements
-
-    def draw_elements_on_canvas_scaled(self, painter, elements, crop_rect, scale_factor):
-        """Рисование элементов с учетом масштабирования"""
-        try:
-            # Группируем элементы по типам для правильного порядка отрисовки
-            frets = [e for e in elements if e['type'] == 'fret']
-            barres = [e for e in elements if e['type'] == 'barre']
-            notes = [e for e in elements if e['type'] == 'note']
-            open_notes = [e for e in elements if e['type'] == 'open_note']
-
-            # 1. Лады (фон)
-            for element in frets:
-                self.draw_element_on_canvas_scaled(painter, element, crop_rect, scale_factor)
-
-            # 2. Баре
-            for element in barres:
-                self.draw_element_on_canvas_scaled(painter, element, crop_rect, scale_factor)
-
-            # 3. Зажатые ноты
-            for element in notes:
-                self.draw_element_on_canvas_scaled(painter, element, crop_rect, scale_factor)
-
-            # 4. Открытые ноты (поверх всего)
-            for element in open_notes:
-                self.draw_element_on_canvas_scaled(painter, element, crop_rect, scale_factor)
-
-        except Exception as e:
-            print(f"❌ Ошибка рисования элементов: {e}")
-
-    def draw_element_on_canvas_scaled(self, painter, element, crop_rect, scale_factor):
-        """Рисование одного элемента с учетом масштабирования"""
-        try:
-            adapted_data = self.adapt_coordinates_scaled(element['data'], crop_rect, scale_factor)
+    def show_chord_pixmap(self, pixmap):
+        """Отображение готового изображения аккорда"""
+        # Устанавливаем изображение
+        self.image_label.setPixmap(pixmap)
 
-            if element['type'] == 'fret':
-                DrawingElements.draw_fret(painter, adapted_data)
-            elif element['type'] == 'note':
-                DrawingElements.draw_note(painter, adapted_data)
-            elif element['type'] == 'barre':
-                DrawingElements.draw_barre(painter, adapted_data)
-            elif element['type'] == 'open_note':
-                DrawingElements.draw_note(painter, adapted_data)
+        # Подгоняем размер окна под изображение
+        self.adjustSize()
 
-        except Exception as e:
-            print(f"❌ Ошибка рисования элемента {element['type']}: {e}")
-
-    def adapt_coordinates_scaled(self, element_data, crop_rect, scale_factor):
-        """Адаптация координат с учетом масштабирования"""
-        if not crop_rect:
-            return element_data.copy()
-
-        adapted_data = element_data.copy()
-        crop_x, crop_y, crop_width, crop_height = crop_rect
-
-        original_x = element_data.get('x', 0)
-        original_y = element_data.get('y', 0)
-
-        # Адаптируем координаты с учетом crop и масштабирования
-        if 'x' in adapted_data:
-            adapted_data['x'] = (original_x - crop_x) * scale_factor
-        if 'y' in adapted_data:
-            adapted_data['y'] = (original_y - crop_y) * scale_factor
-
-        adapted_data['x'] = int(round(adapted_data.get('x', 0)))
-        adapted_data['y'] = int(round(adapted_data.get('y', 0)))
-
-        # Масштабируем размеры элементов
-        if 'width' in adapted_data:
-            adapted_data['width'] = int(adapted_data['width'] * scale_factor)
-        if 'height' in adapted_data:
-            adapted_data['height'] = int(adapted_data['height'] * scale_factor)
-        if 'radius' in adapted_data:
-            # 🔥 ИСПОЛЬЗУЕМ МИНИМАЛЬНЫЙ РАДИУС ИЗ НАСТРОЕК
-            adapted_data['radius'] = max(ChordViewerSettings.MIN_NOTE_RADIUS,
-                                         int(adapted_data['radius'] * scale_factor))
-        if 'size' in adapted_data:
-            adapted_data['size'] = int(adapted_data['size'] * scale_factor)
-
-        # Для баре - преобразуем центр в левый верхний угол
-        if (adapted_data.get('width') and adapted_data.get('height') and
-                adapted_data.get('width') > 25 and adapted_data.get('height') > 10):
-            barre_width = adapted_data.get('width', 50)
-            barre_height = adapted_data.get('height', 10)
-            adapted_data['x'] = adapted_data['x'] - (barre_width // 2)
-            adapted_data['y'] = adapted_data['y'] - (barre_height // 2)
-
-        return adapted_data
+        # Проверяем доступность звука
+        self.check_sound_availability()
 
     def show_error_image(self, message):
         """Показ сообщения об ошибке"""
@@ -2,22 +2,48 @@
 import sys
 import os
 import traceback
+from contextlib import nullcontext
 
-from core.app import GuitarApp
+PROFILE_STARTUP_FLAG = "--profile-startup"
 
 
-def main():
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
     # Добавляем путь к проекту в PYTHONPATH
     project_root = os.path.dirname(os.path.abspath(__file__))
     sys.path.insert(0, project_root)
 
+    # Профилировщик ставится до импорта приложения, чтобы замерить все импорты
+    profiler = None
+    if PROFILE_STARTUP_FLAG in argv:
+        from core.startup_profiler import StartupProfiler
+        profiler = StartupProfiler().start()
+
     try:
+        with profile_phase(profiler, 'imports'):
+            from core.app import GuitarApp
+
         # Создаем и запускаем приложение
-        app = GuitarApp()
-        app.show()
+        with profile_phase(profiler, 'create_app'):
+            app = GuitarApp()
+        with profile_phase(profiler, 'show'):
+            app.show()
 
         print("🎸 GuitarChords Pro успешно запущен!")
 
+        if profiler is not None:
+            # Режим трассировки: отчет после первой итерации цикла событий и выход
+            from PyQt5.QtCore import QTimer
+
+            def finish_profile():
+                profiler.mark('first_event_loop')
+                profiler.stop()
+                violations = profiler.write_report()
+                app.app.exit(1 if violations else 0)
+
+            QTimer.singleShot(0, finish_profile)
+
         return app.exec_()
 
     except Exception as e:
@@ -26,5 +52,12 @@ def main():
         return 1
 
 
+def profile_phase(profiler, name):
+    """Этап запуска для профилировщика (без профилировщика - пустой контекст)"""
+    if profiler is None:
+        return nullcontext()
+    return profiler.phase(name)
+
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from database.connection import ConnectionPool, PoolTimeoutError, close_pool, configure_pool, connection, \
+    get_connection
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "pool.db")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE items (name TEXT)")
+    return path
+
+
+@pytest.fixture
+def pool(db_path):
+    pool = configure_pool(lambda: sqlite3.connect(db_path, check_same_thread=False), 0, 1, timeout=0.2)
+    yield pool
+    close_pool()
+
+
+def count_items(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+
+def test_acquire_times_out_when_pool_is_full(pool):
+    conn = pool.acquire()
+    started = time.monotonic()
+    with pytest.raises(PoolTimeoutError):
+        pool.acquire()
+    assert time.monotonic() - started >= pool.timeout
+    conn.close()
+
+
+def test_acquire_waits_for_release(pool):
+    conn = pool.acquire()
+    raw = conn.raw
+    timer = threading.Timer(0.05, conn.close)
+    timer.start()
+
+    second = pool.acquire()  # ждет возврата первого соединения
+    assert second.raw is raw
+    assert pool.size == 1
+    second.close()
+    timer.join()
+
+
+def test_close_is_idempotent(pool):
+    conn = pool.acquire()
+    conn.close()
+    conn.close()
+    assert pool.idle_count == 1
+    with pytest.raises(AttributeError):
+        conn.cursor()
+
+
+def test_release_rolls_back(pool, db_path):
+    conn = pool.acquire()
+    conn.execute("INSERT INTO items VALUES ('uncommitted')")
+    conn.close()
+
+    assert count_items(db_path) == 0
+    conn = pool.acquire()
+    assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+    conn.close()
+
+
+def test_unhealthy_idle_connection_is_discarded(db_path):
+    pool = ConnectionPool(lambda: sqlite3.connect(db_path), 0, 1, health_check_interval=0)
+    conn = pool.acquire()
+    raw = conn.raw
+    conn.close()
+
+    raw.close()  # соединение "умерло", пока лежало в пуле
+    conn = pool.acquire()
+    assert conn.raw is not raw
+    assert pool.size == 1
+    conn.execute("SELECT 1")
+    conn.close()
+    pool.close()
+
+
+def test_connection_commits_on_success(pool, db_path):
+    with connection() as conn:
+        conn.execute("INSERT INTO items VALUES ('committed')")
+    assert count_items(db_path) == 1
+    assert pool.idle_count == 1
+
+
+def test_connection_rolls_back_on_error(pool, db_path):
+    with pytest.raises(RuntimeError):
+        with connection() as conn:
+            conn.execute("INSERT INTO items VALUES ('rolled back')")
+            raise RuntimeError("ошибка в транзакции")
+    assert count_items(db_path) == 0
+    assert pool.idle_count == 1
+
+
+def test_pooled_connection_context_manager(pool, db_path):
+    with get_connection() as conn:
+        conn.execute("INSERT INTO items VALUES ('committed')")
+    assert count_items(db_path) == 1
+
+    with pytest.raises(RuntimeError):
+        with get_connection() as conn:
+            conn.execute("INSERT INTO items VALUES ('rolled back')")
+            raise RuntimeError("ошибка в транзакции")
+    assert count_items(db_path) == 1
+    assert pool.idle_count == 1
@@ -0,0 +1,105 @@
+import pytest
+
+import database.migrations as migrations
+from database.connection import close_pool, configure_pool
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, query, params=()):
+        self.db.queries.append(query)
+        if query.startswith("SELECT name FROM schema_migrations"):
+            self.rows = [(name,) for name in sorted(self.db.applied)]
+        elif query.startswith("INSERT INTO schema_migrations"):
+            self.db.applied.add(params[0])
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    """Минимальная замена PostgreSQL: таблица schema_migrations и advisory lock"""
+
+    def __init__(self, applied=()):
+        self.applied = set(applied)
+        self.queries = []
+
+    def connect(self):
+        db = self
+
+        class Connection:
+            closed = 0
+
+            def cursor(self):
+                return FakeCursor(db)
+
+            def commit(self):
+                pass
+
+            def rollback(self):
+                pass
+
+            def close(self):
+                pass
+
+        return Connection()
+
+
+@pytest.fixture
+def database(monkeypatch):
+    db = FakeDatabase()
+    configure_pool(db.connect, 0, 2)
+    monkeypatch.setattr(migrations, '_applied', False)
+    yield db
+    close_pool()
+
+
+def make_steps(calls, failing=()):
+    def step(name):
+        def run():
+            calls.append(name)
+            if name in failing:
+                raise RuntimeError("permission denied to create extension \"pg_trgm\"")
+            return True
+        return run
+
+    names = ['001_song_search_indexes', '002_song_folded_index',
+             '003_views_unique_index', '004_statistics_schema']
+    return [(name, step(name)) for name in names]
+
+
+def test_apply_records_all_steps(database):
+    calls = []
+    assert migrations.apply_migrations(make_steps(calls))
+    assert calls == ['001_song_search_indexes', '002_song_folded_index',
+                     '003_views_unique_index', '004_statistics_schema']
+    assert len(database.applied) == 4
+    assert any("pg_advisory_unlock" in query for query in database.queries)
+
+    # Повторный вызов в том же процессе ничего не выполняет
+    assert migrations.apply_migrations(make_steps(calls))
+    assert len(calls) == 4
+
+
+def test_failed_step_does_not_block_others(database):
+    calls = []
+    assert not migrations.apply_migrations(make_steps(calls, failing={'001_song_search_indexes'}))
+    assert database.applied == {'002_song_folded_index', '003_views_unique_index', '004_statistics_schema'}
+
+    # Следующий вызов повторяет только неудавшийся шаг
+    calls.clear()
+    assert migrations.apply_migrations(make_steps(calls))
+    assert calls == ['001_song_search_indexes']
+    assert len(database.applied) == 4
+
+
+def test_step_returning_false_is_not_recorded(database):
+    steps = [('001_song_search_indexes', lambda: False), ('002_song_folded_index', lambda: True)]
+    assert not migrations.apply_migrations(steps)
+    assert database.applied == {'002_song_folded_index'}
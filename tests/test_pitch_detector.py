@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from core.pitch_detector import PitchDetector
+
+RATE = 44100
+
+
+def bass_tone(frequency, frame_size, harmonics=6):
+    """Кадр струнного тона: основная частота и затухающие гармоники"""
+    t = np.arange(frame_size) / RATE
+    tone = sum(np.sin(2 * np.pi * frequency * k * t) / k for k in range(1, harmonics + 1))
+    return (tone / np.abs(tone).max() * 20000).astype(np.int16)
+
+
+def cents(frequency, reference):
+    return 1200 * np.log2(frequency / reference)
+
+
+@pytest.mark.parametrize("note_frequency, frame_size, min_freq", [
+    (41.20, 4096, 35.0),  # E1 - бас-гитара (4 струны)
+    (30.87, 8192, 28.0),  # B0 - бас-гитара (5 струн)
+])
+def test_yin_detects_low_bass_strings(note_frequency, frame_size, min_freq):
+    detector = PitchDetector(sample_rate=RATE, frame_size=frame_size, method='yin',
+                             min_freq=min_freq, max_freq=400.0)
+    frequency = detector.detect(bass_tone(note_frequency, frame_size)).frequency
+    assert frequency is not None
+    assert abs(cents(frequency, note_frequency)) < 2.0
+
+
+@pytest.mark.parametrize("min_freq", [40.0, 28.0])
+def test_yin_rejects_frame_shorter_than_two_periods(min_freq):
+    with pytest.raises(ValueError):
+        PitchDetector(sample_rate=RATE, frame_size=2048, method='yin', min_freq=min_freq)
+
+
+def test_spectral_methods_keep_small_frame():
+    detector = PitchDetector(sample_rate=RATE, frame_size=2048, method='hps', min_freq=40.0)
+    assert detector.detect(bass_tone(110.0, 2048)).frequency is not None
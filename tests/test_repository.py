@@ -0,0 +1,94 @@
+import threading
+
+import pytest
+
+from database.repository import SONG_COLUMNS, SQLiteBackend
+
+SONGS = [
+    ("Кино", "Кино - Группа крови", "Am C Dm", "songs/kino_1.txt", "К"),
+    ("Кино", "Кино - Кукушка", "Am F C G", "songs/kino_2.txt", "К"),
+    ("Сплин", "Сплин - Выхода нет", "Em C G D", "songs/splin_1.txt", "С"),
+    ("Ёлка", "Ёлка - Прованс", "Dm G C", "songs/elka_1.txt", "Ё"),
+    ("ДДТ", "ДДТ - Что такое осень", "Am Dm E", "songs/ddt_1.txt", "Д"),
+    ("ДДТ", "ДДТ - Ты не один", "Em Am", "songs/ddt_2.txt", "Д"),
+]
+CHORDS = [("Am", "chords/am.png", "ля минор", 1), ("C", "chords/c.png", "до мажор", 2),
+          ("Dm", "chords/dm.png", "ре минор", 1)]
+
+
+def fill(backend):
+    for band, song_name, chords, link, letter in SONGS:
+        backend.add_song(band, song_name, chords, link, letter=letter)
+    with backend.conn as conn:
+        conn.executemany("INSERT INTO chords (chord, link, description, type_id) VALUES (?, ?, ?, ?)", CHORDS)
+
+
+@pytest.fixture
+def backend():
+    backend = SQLiteBackend(':memory:')
+    fill(backend)
+    yield backend
+    backend.close()
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("кино", ["Кино - Группа крови", "Кино - Кукушка"]),
+    ("кукушка", ["Кино - Кукушка"]),
+    ("группа крови", ["Кино - Группа крови"]),
+    ("осень ддт", ["ДДТ - Что такое осень"]),
+    ("сплин романс выхода", ["Сплин - Выхода нет"]),
+    ("не один", ["ДДТ - Ты не один"]),  # короткое слово - без триграммного индекса
+    ("прованс", ["Ёлка - Прованс"]),
+    ("неизвестно", []),
+    ("", []),
+])
+def test_search_songs(backend, query, expected):
+    assert backend.search_songs(query) == expected
+
+
+def test_song_info(backend):
+    info = backend.get_song_info("Кино - Кукушка")
+    assert dict(zip(SONG_COLUMNS, info))['song_chord'] == "Am F C G"
+    assert info[4] == "songs/kino_2.txt"
+    assert backend.get_song_info("Кино - Пачка сигарет") is None
+
+
+def test_songs_and_bands(backend):
+    assert backend.list_songs("Кино") == ["Кино - Группа крови", "Кино - Кукушка"]
+    assert backend.list_bands("К") == ["Кино"]
+    assert backend.list_bands() == ["ДДТ", "Кино", "Сплин", "Ёлка"]
+
+
+def test_chords(backend):
+    assert backend.get_chord("Am") == ("chords/am.png", "ля минор", "Am")
+    assert backend.chord_type("Dm") == 1
+    assert backend.chord_type("H7") is None
+    assert backend.chords_by_type(1) == ["Am", "Dm"]
+
+
+def test_delete_song(backend):
+    backend.delete_song("Кино - Кукушка")
+    assert backend.get_song_info("Кино - Кукушка") is None
+    assert backend.search_songs("кукушка") == []
+    assert backend.search_songs("кино") == ["Кино - Группа крови"]
+
+
+def test_import_from(backend):
+    target = SQLiteBackend(':memory:')
+    target.add_song("Старая группа", "Старая группа - Старая песня")
+
+    counts = target.import_from(backend)
+
+    assert counts == {'songs': len(SONGS), 'bands': 4, 'chords': len(CHORDS)}
+    assert target.get_song_info("Старая группа - Старая песня") is None
+    assert target.search_songs("кино") == backend.search_songs("кино")
+    assert target.export_rows('chords') == backend.export_rows('chords')
+    target.close()
+
+
+def test_memory_database_is_shared_between_threads(backend):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(backend.search_songs("сплин")))
+    thread.start()
+    thread.join()
+    assert results == [["Сплин - Выхода нет"]]
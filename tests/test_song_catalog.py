@@ -0,0 +1,71 @@
+import pytest
+
+from database.repository import SQLiteBackend, configure_repository
+from database.song_catalog import SongCatalog
+
+SONGS = [
+    ("Кино", "Кино - Группа крови"),
+    ("Кино", "Кино - Звезда по имени Солнце"),
+    ("Кино", "Кино - Кукушка"),
+    ("Сплин", "Сплин - Выхода нет"),
+    ("Сплин", "Сплин - Звезда"),
+    ("ДДТ", "ДДТ - Что такое осень"),
+    ("Чиж & Co", "Чиж & Co - Ёжик"),
+    ("Би-2", "Би-2 - Полковнику никто не пишет"),
+    ("Полина Гагарина", "Полина Гагарина - Кукушка"),
+]
+
+QUERIES = [
+    "кино", "Кино", "звезда", "кино звезда", "группа крови", "сплин звезда солнце",
+    "ёжик", "ежик", "би-2", "кукушка", "гагарина кукушка", "что такое", "осень ддт",
+    "неизвестная песня", "к", "Кино - Кукушка", "!!!",
+]
+
+
+@pytest.fixture
+def repository(tmp_path):
+    backend = SQLiteBackend(':memory:')
+    for band, song_name in SONGS:
+        backend.add_song(band, song_name)
+    configure_repository(backend)
+    SongCatalog.rebuild(tmp_path / "catalog.snapshot")
+    yield backend
+    configure_repository(None)
+    backend.close()
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_database_search(repository, query):
+    assert SongCatalog.search(query) == repository.search_songs(query)
+
+
+def test_search_finds_whole_title_words_only(repository):
+    # Как select_search_text: подстрока "звезд" находит строки, но в выдачу
+    # попадают только песни, где слово запроса - целое слово названия
+    assert SongCatalog.search("звезд") == []
+    assert SongCatalog.search("кино звезда") == ["Кино - Звезда по имени Солнце"]
+
+
+def test_point_updates(repository, tmp_path):
+    SongCatalog.add_song("Кино", "Кино - Пачка сигарет")
+    assert SongCatalog.search("пачка") == ["Кино - Пачка сигарет"]
+
+    SongCatalog.rename_song("Кино - Пачка сигарет", "Кино", "Кино - Пачка")
+    assert SongCatalog.search("сигарет") == []
+    assert SongCatalog.search("пачка") == ["Кино - Пачка"]
+
+    SongCatalog.remove_song("Кино - Пачка")
+    assert SongCatalog.search("пачка") == []
+
+
+def test_snapshot_is_rebuilt_when_songs_change(repository, tmp_path):
+    snapshot = tmp_path / "catalog.snapshot"
+    SongCatalog.load(snapshot)
+    assert SongCatalog.search("выхода") == ["Сплин - Выхода нет"]
+
+    # Переименование не меняет количество песен - проверка по контрольной сумме
+    repository.delete_song("Сплин - Выхода нет")
+    repository.add_song("Сплин", "Сплин - Романс")
+    SongCatalog.load(snapshot)
+    assert SongCatalog.search("выхода") == []
+    assert SongCatalog.search("романс") == ["Сплин - Романс"]
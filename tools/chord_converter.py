@@ -6,6 +6,9 @@ import json
 import pandas as pd
 from pathlib import Path
 
+from utils.chord_bundle import (ChordBundleWriter, BUNDLE_FILENAME, TABLE_CHORDS, TABLE_RAM, TABLE_NOTE,
+                                TABLE_TEMPLATE, IMAGE_GUITAR, sound_entry_name)
+
 
 class ResourceConverter:
     def __init__(self, source_dir="chords_config"):
@@ -13,24 +16,34 @@ class ResourceConverter:
         self.data_dir = Path("data")
         self.data_dir.mkdir(exist_ok=True)
 
-    def convert_excel_to_python(self):
-        """Конвертирует Excel файл в Python модуль"""
+    def read_excel_data(self):
+        """Читает и обрабатывает листы CHORDS, RAM и NOTE из Excel файла"""
         excel_path = self.source_dir / "chord_config.xlsx"
         if not excel_path.exists():
             print(f"❌ Excel файл не найден: {excel_path}")
-            return False
+            return None
+
+        # Читаем все листы
+        print("📊 Чтение Excel файла...")
+        chords_df = pd.read_excel(excel_path, sheet_name='CHORDS')
+        ram_df = pd.read_excel(excel_path, sheet_name='RAM')
+        note_df = pd.read_excel(excel_path, sheet_name='NOTE')
+
+        # Обрабатываем числовые колонки
+        chords_data = self.process_chords_data(chords_df.to_dict('records'))
+        ram_data = self.process_ram_data(ram_df.to_dict('records'))
+        note_data = self.process_note_data(note_df.to_dict('records'))
 
+        return chords_data, ram_data, note_data
+
+    def convert_excel_to_python(self):
+        """Конвертирует Excel файл в Python модуль"""
         try:
-            # Читаем все листы
-            print("📊 Чтение Excel файла...")
-            chords_df = pd.read_excel(excel_path, sheet_name='CHORDS')
-            ram_df = pd.read_excel(excel_path, sheet_name='RAM')
-            note_df = pd.read_excel(excel_path, sheet_name='NOTE')
+            excel_data = self.read_excel_data()
+            if excel_data is None:
+                return False
 
-            # Обрабатываем числовые колонки
-            chords_data = self.process_chords_data(chords_df.to_dict('records'))
-            ram_data = self.process_ram_data(ram_df.to_dict('records'))
-            note_data = self.process_note_data(note_df.to_dict('records'))
+            chords_data, ram_data, note_data = excel_data
 
             # Создаем Python файл
             output_file = self.data_dir / "chords_config.py"
@@ -182,16 +195,22 @@ class ResourceConverter:
         else:
             return obj
 
-    def convert_json_to_python(self):
-        """Конвертирует JSON шаблон в Python модуль"""
+    def read_template_data(self):
+        """Читает JSON шаблон элементов"""
         json_path = self.source_dir / "template.json"
         if not json_path.exists():
             print(f"❌ JSON файл не найден: {json_path}")
-            return False
+            return None
 
+        with open(json_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def convert_json_to_python(self):
+        """Конвертирует JSON шаблон в Python модуль"""
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                template_data = json.load(f)
+            template_data = self.read_template_data()
+            if template_data is None:
+                return False
 
             output_file = self.data_dir / "template.py"
             with open(output_file, 'w', encoding='utf-8') as f:
@@ -291,6 +310,55 @@ class ResourceConverter:
             print(f"❌ Ошибка конвертации звуков: {e}")
             return False
 
+    def convert_to_bundle(self):
+        """Конвертирует все ресурсы в единый бинарный пакет data/chords.bundle"""
+        print("🎸 Конвертация ресурсов в бинарный пакет...")
+        print("=" * 50)
+
+        try:
+            excel_data = self.read_excel_data()
+            template_data = self.read_template_data()
+            if excel_data is None or template_data is None:
+                return False
+
+            chords_data, ram_data, note_data = excel_data
+
+            writer = ChordBundleWriter()
+            writer.add_table(TABLE_CHORDS, chords_data)
+            writer.add_table(TABLE_RAM, ram_data)
+            writer.add_table(TABLE_NOTE, note_data)
+            writer.add_table(TABLE_TEMPLATE, template_data)
+
+            # Изображение грифа и звуки сохраняются как есть, без base64
+            image_path = self.source_dir / "img.png"
+            if image_path.exists():
+                writer.add_bytes(IMAGE_GUITAR, image_path.read_bytes())
+            else:
+                print(f"⚠️ Изображение не найдено: {image_path}")
+
+            total_sounds = 0
+            sounds_dir = self.source_dir / "sounds"
+            if sounds_dir.exists():
+                for sound_file in sorted(sounds_dir.rglob("*.mp3")):
+                    writer.add_bytes(sound_entry_name(sound_file.parent.name, sound_file.stem),
+                                     sound_file.read_bytes())
+                    total_sounds += 1
+            else:
+                print(f"⚠️ Папка со звуками не найдена: {sounds_dir}")
+
+            output_file = self.data_dir / BUNDLE_FILENAME
+            bundle_size = writer.write(output_file)
+
+            print(f"✅ Пакет сохранен в: {output_file}")
+            print(f"   - Аккордов: {len(chords_data)}")
+            print(f"   - Звуковых файлов: {total_sounds}")
+            print(f"   - Размер: {bundle_size / 1024 / 1024:.1f} MB")
+            return True
+
+        except Exception as e:
+            print(f"❌ Ошибка создания пакета: {e}")
+            return False
+
     def convert_all(self):
         """Запускает полную конвертацию"""
         print("🎸 Конвертация ресурсов в Python модули...")
@@ -329,7 +397,10 @@ def main():
         print("   - sounds/ (папка со звуками)")
         return
 
-    success = converter.convert_all()
+    if "--bundle" in sys.argv[1:]:
+        success = converter.convert_to_bundle()
+    else:
+        success = converter.convert_all()
 
     if success:
         print("\n🎯 Теперь можно запускать приложение!")
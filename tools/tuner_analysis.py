@@ -0,0 +1,232 @@
+# tools/tuner_analysis.py
+"""
+Анализ строя аудиофайлов без интерфейса: WAV/MP3 прогоняются через тот же
+детектор высоты тона, что и в тюнере, кадрами фиксированного размера.
+
+    python -m tools.tuner_analysis [пути...] [--method yin] [--workers 4] [--csv report.csv]
+
+По умолчанию анализируется папка chords_config/sounds. MP3 декодируется через ffmpeg.
+Код выхода 1 - есть файлы с отклонением больше --drift или ошибки чтения.
+"""
+import argparse
+import csv
+import os
+import shutil
+import subprocess
+import sys
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from core.note_table import NoteTable
+from core.pitch_detector import PitchDetector
+
+AUDIO_EXTENSIONS = ('.wav', '.mp3')
+DEFAULT_SOUNDS_DIR = Path("chords_config") / "sounds"
+MP3_SAMPLE_RATE = 44100
+READ_BLOCK = 8192  # отсчетов за одно чтение
+
+
+def _wav_blocks(path):
+    """Блоки отсчетов WAV (моно, float32) и частота дискретизации"""
+    wav = wave.open(str(path), 'rb')
+    channels, width, rate = wav.getnchannels(), wav.getsampwidth(), wav.getframerate()
+
+    def blocks():
+        with wav:
+            while True:
+                raw = wav.readframes(READ_BLOCK)
+                if not raw:
+                    break
+                if width == 1:
+                    samples = np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0
+                elif width == 2:
+                    samples = np.frombuffer(raw, dtype='<i2').astype(np.float32)
+                elif width == 3:
+                    data = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+                    samples = (data[:, 0].astype(np.int32) | (data[:, 1].astype(np.int32) << 8)
+                               | (data[:, 2].astype(np.int8).astype(np.int32) << 16)).astype(np.float32)
+                elif width == 4:
+                    samples = np.frombuffer(raw, dtype='<i4').astype(np.float32)
+                else:
+                    raise ValueError(f"Неподдерживаемая разрядность WAV: {width * 8} бит")
+                if channels > 1:
+                    samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+                yield samples
+
+    return blocks(), rate
+
+
+def _mp3_blocks(path):
+    """Блоки отсчетов MP3, декодированного ffmpeg в 16-битный моно поток"""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None:
+        raise RuntimeError("Для MP3 нужен ffmpeg в PATH")
+
+    def blocks():
+        process = subprocess.Popen(
+            [ffmpeg, '-v', 'error', '-i', str(path), '-f', 's16le', '-ac', '1',
+             '-ar', str(MP3_SAMPLE_RATE), '-'],
+            stdout=subprocess.PIPE
+        )
+        try:
+            while True:
+                raw = process.stdout.read(READ_BLOCK * 2)
+                if not raw:
+                    break
+                yield np.frombuffer(raw[:len(raw) - len(raw) % 2], dtype='<i2').astype(np.float32)
+        finally:
+            process.stdout.close()
+            process.wait()
+
+    return blocks(), MP3_SAMPLE_RATE
+
+
+def open_audio(path):
+    """(итератор блоков отсчетов, частота дискретизации)"""
+    suffix = Path(path).suffix.lower()
+    if suffix == '.wav':
+        return _wav_blocks(path)
+    if suffix == '.mp3':
+        return _mp3_blocks(path)
+    raise ValueError(f"Неподдерживаемый формат: {path}")
+
+
+def iter_frames(blocks, frame_size, hop):
+    """Кадры фиксированного размера с шагом hop из потока блоков"""
+    buffer = np.zeros(0, dtype=np.float32)
+    for block in blocks:
+        buffer = np.concatenate((buffer, block))
+        while len(buffer) >= frame_size:
+            yield buffer[:frame_size]
+            buffer = buffer[hop:]
+
+
+def analyze_file(path, method='yin', frame_size=2048, hop=1024, a4=440.0,
+                 min_freq=60.0, max_freq=1200.0):
+    """Высота тона и отклонение в центах по времени для одного файла"""
+    blocks, rate = open_audio(path)
+    detector = PitchDetector(sample_rate=rate, frame_size=frame_size, method=method,
+                             min_freq=min_freq, max_freq=max_freq)
+    note_table = NoteTable(a4)
+
+    times, frequencies = [], []
+    for index, frame in enumerate(iter_frames(blocks, frame_size, hop)):
+        times.append(index * hop / rate)
+        result = detector.detect(frame)
+        frequencies.append(np.nan if result.frequency is None else result.frequency)
+
+    frequencies = np.asarray(frequencies, dtype=np.float64)
+    names, _, cents, _ = note_table.nearest_batch(frequencies)
+
+    frames = [(t, f, n, c) for t, f, n, c in zip(times, frequencies, names, cents)]
+    return {'path': str(path), 'frames': frames, **summarize(frequencies, names, cents)}
+
+
+def summarize(frequencies, names, cents):
+    """Сводка по файлу: основная нота, медианное отклонение и дрейф (конец минус начало)"""
+    voiced = np.isfinite(frequencies)
+    if not voiced.any():
+        return {'note': '', 'frequency': np.nan, 'cents': np.nan, 'drift': np.nan, 'voiced': 0.0}
+
+    voiced_names = names[voiced]
+    values, counts = np.unique(voiced_names, return_counts=True)
+    note = str(values[np.argmax(counts)])
+
+    note_mask = voiced & (names == note)
+    note_cents = cents[note_mask]
+    quarter = max(1, len(note_cents) // 4)
+    drift = float(np.median(note_cents[-quarter:]) - np.median(note_cents[:quarter]))
+
+    return {
+        'note': note,
+        'frequency': float(np.median(frequencies[note_mask])),
+        'cents': float(np.median(note_cents)),
+        'drift': drift,
+        'voiced': float(voiced.mean()),
+    }
+
+
+def collect_files(paths):
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob('*') if p.suffix.lower() in AUDIO_EXTENSIONS))
+        elif path.suffix.lower() in AUDIO_EXTENSIONS:
+            files.append(path)
+    return files
+
+
+def analyze_files(files, workers=None, **options):
+    """Параллельный анализ файлов в пуле процессов; результаты в порядке завершения"""
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(analyze_file, path, **options): path for path in files}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {'path': str(futures[future]), 'error': str(e)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Анализ строя аудиофайлов без интерфейса")
+    parser.add_argument('paths', nargs='*', default=[str(DEFAULT_SOUNDS_DIR)],
+                        help="файлы или папки (по умолчанию chords_config/sounds)")
+    parser.add_argument('--method', choices=PitchDetector.METHODS, default='yin')
+    parser.add_argument('--frame-size', type=int, default=2048)
+    parser.add_argument('--hop', type=int, default=1024)
+    parser.add_argument('--a4', type=float, default=440.0)
+    parser.add_argument('--min-freq', type=float, default=60.0)
+    parser.add_argument('--max-freq', type=float, default=1200.0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--drift', type=float, default=10.0, help="порог дрейфа/отклонения в центах")
+    parser.add_argument('--csv', help="запись покадровых результатов в CSV")
+    args = parser.parse_args(argv)
+
+    files = collect_files(args.paths)
+    if not files:
+        print(f"❌ Аудиофайлы не найдены: {', '.join(args.paths)}")
+        return 1
+
+    print(f"🎸 Анализ {len(files)} файлов ({args.method}, кадр {args.frame_size}, шаг {args.hop})")
+    options = dict(method=args.method, frame_size=args.frame_size, hop=args.hop, a4=args.a4,
+                   min_freq=args.min_freq, max_freq=args.max_freq)
+
+    results = sorted(analyze_files(files, workers=args.workers, **options), key=lambda r: r['path'])
+
+    flagged = errors = 0
+    for result in results:
+        if 'error' in result:
+            errors += 1
+            print(f"❌ {result['path']}: {result['error']}")
+            continue
+        if not result['note']:
+            print(f"⚪ {result['path']}: высота тона не определена")
+            continue
+
+        out_of_tune = abs(result['cents']) > args.drift or abs(result['drift']) > args.drift
+        flagged += out_of_tune
+        print(f"{'⚠️' if out_of_tune else '✅'} {result['path']}: {result['note']} "
+              f"{result['frequency']:.2f} Hz, {result['cents']:+.1f} ц, дрейф {result['drift']:+.1f} ц, "
+              f"звук {result['voiced']:.0%} кадров")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['file', 'time', 'frequency', 'note', 'cents'])
+            for result in results:
+                for time, frequency, note, cents in result.get('frames', []):
+                    writer.writerow([result['path'], f"{time:.4f}",
+                                     '' if np.isnan(frequency) else f"{frequency:.3f}",
+                                     note, '' if np.isnan(cents) else f"{cents:.2f}"])
+        print(f"📄 Покадровые результаты: {args.csv}")
+
+    print(f"\n🎯 Готово: {len(results)} файлов, с отклонением больше {args.drift} ц: {flagged}, "
+          f"с ошибками: {errors}")
+    return 1 if flagged or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
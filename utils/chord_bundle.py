@@ -0,0 +1,140 @@
+# utils/chord_bundle.py
+import mmap
+import marshal
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Формат пакета:
+#   заголовок  - магическая строка, версия, количество записей
+#   таблица    - для каждой записи: длина имени, имя (utf-8), смещение, размер
+#   данные     - сырые PNG/MP3 и таблицы аккордов, сериализованные marshal
+BUNDLE_MAGIC = b"GCBUNDLE"
+BUNDLE_VERSION = 1
+BUNDLE_FILENAME = "chords.bundle"
+
+_HEADER = struct.Struct("<8sII")
+_NAME_LEN = struct.Struct("<H")
+_ENTRY = struct.Struct("<QQ")
+
+# Имена записей
+TABLE_CHORDS = "table/chords"
+TABLE_RAM = "table/ram"
+TABLE_NOTE = "table/note"
+TABLE_TEMPLATE = "table/template"
+IMAGE_GUITAR = "image/guitar"
+SOUND_PREFIX = "sound/"
+
+
+def sound_entry_name(chord_name: str, sound_key: str) -> str:
+    """Имя записи звука в пакете"""
+    return f"{SOUND_PREFIX}{chord_name}/{sound_key}"
+
+
+class ChordBundleWriter:
+    """Запись бинарного пакета ресурсов аккордов"""
+
+    def __init__(self):
+        self._entries: List[Tuple[str, bytes]] = []
+
+    def add_bytes(self, name: str, data: bytes):
+        """Добавление сырых данных (PNG, MP3)"""
+        self._entries.append((name, bytes(data)))
+
+    def add_table(self, name: str, value: Any):
+        """Добавление таблицы (список/словарь), сериализованной marshal"""
+        self._entries.append((name, marshal.dumps(value)))
+
+    def write(self, path) -> int:
+        """Запись пакета на диск, возвращает размер файла"""
+        encoded_names = [name.encode("utf-8") for name, _ in self._entries]
+
+        table_size = sum(_NAME_LEN.size + len(name) + _ENTRY.size for name in encoded_names)
+        offset = _HEADER.size + table_size
+
+        table = bytearray()
+        for encoded_name, (_, data) in zip(encoded_names, self._entries):
+            table += _NAME_LEN.pack(len(encoded_name))
+            table += encoded_name
+            table += _ENTRY.pack(offset, len(data))
+            offset += len(data)
+
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(self._entries)))
+            f.write(table)
+            for _, data in self._entries:
+                f.write(data)
+
+        return offset
+
+
+class ChordBundle:
+    """Чтение бинарного пакета ресурсов аккордов через mmap без копирования"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._file.close()
+            raise
+
+        self._view = memoryview(self._mmap)
+        self._entries: Dict[str, Tuple[int, int]] = {}
+        self._read_table()
+
+    def _read_table(self):
+        """Чтение заголовка и таблицы смещений"""
+        if len(self._view) < _HEADER.size:
+            raise ValueError(f"Файл {self.path} слишком мал для пакета аккордов")
+
+        magic, version, count = _HEADER.unpack_from(self._view, 0)
+        if magic != BUNDLE_MAGIC:
+            raise ValueError(f"Файл {self.path} не является пакетом аккордов")
+        if version != BUNDLE_VERSION:
+            raise ValueError(f"Неподдерживаемая версия пакета аккордов: {version}")
+
+        position = _HEADER.size
+        for _ in range(count):
+            (name_len,) = _NAME_LEN.unpack_from(self._view, position)
+            position += _NAME_LEN.size
+            name = bytes(self._view[position:position + name_len]).decode("utf-8")
+            position += name_len
+            offset, size = _ENTRY.unpack_from(self._view, position)
+            position += _ENTRY.size
+
+            if offset + size > len(self._view):
+                raise ValueError(f"Запись {name} выходит за границы пакета")
+            self._entries[name] = (offset, size)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def names(self) -> List[str]:
+        return list(self._entries.keys())
+
+    def get_bytes(self, name: str) -> Optional[memoryview]:
+        """Данные записи в виде memoryview поверх mmap (без копирования)"""
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        offset, size = entry
+        return self._view[offset:offset + size]
+
+    def load_table(self, name: str, default: Any = None) -> Any:
+        """Десериализация таблицы из пакета"""
+        data = self.get_bytes(name)
+        if data is None:
+            return default
+        return marshal.loads(data)
+
+    def load_sounds(self) -> Dict[str, Dict[str, memoryview]]:
+        """Словарь звуков {аккорд: {ключ_звука: memoryview}}"""
+        sounds = {}
+        for name in self._entries:
+            if not name.startswith(SOUND_PREFIX):
+                continue
+            chord_name, _, sound_key = name[len(SOUND_PREFIX):].rpartition("/")
+            sounds.setdefault(chord_name, {})[sound_key] = self.get_bytes(name)
+        return sounds
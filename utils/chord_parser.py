@@ -1,5 +1,25 @@
 import re
 import html
+from functools import lru_cache, partial
+
+# Ссылка на аккорд; оформление - в CHORD_LINK_CSS (класс chord)
+CHORD_LINK_TEMPLATE = '<a href="{chord}" class="chord">{chord}</a>'
+CHORD_LINK_CSS = ("a.chord { color: #3498db; font-weight: bold; text-decoration: none; "
+                  "background: rgba(52, 152, 219, 0.1); padding: 2px 6px; border-radius: 4px; }")
+
+_ALL_CHORDS = None
+
+
+def get_all_chords():
+    """Все аккорды из const.CHORDS_TYPE_LIST (множество строится один раз)"""
+    global _ALL_CHORDS
+    if _ALL_CHORDS is None:
+        try:
+            from const import CHORDS_TYPE_LIST
+        except ImportError:
+            return None
+        _ALL_CHORDS = frozenset(chord for chord_group in CHORDS_TYPE_LIST for chord in chord_group)
+    return _ALL_CHORDS
 
 
 class ChordParser:
@@ -180,46 +200,47 @@ class ChordParser:
 
     @staticmethod
     def word_by_word_processing(text, chords_list):
-        """Обработка слово-за-словом - самый надежный метод"""
+        """Обработка слово-за-словом - самый надежный метод.
+
+        Аккордом считается слово (последовательность непробельных символов),
+        целиком совпадающее с аккордом песни; весь текст обрабатывается
+        одним проходом скомпилированного регулярного выражения.
+        """
         if not text.strip():
             return ""
 
-        lines = [line for line in text.split('\n') if line.strip()]
-        if not lines:
+        # Убираем пустые строки
+        text = '\n'.join(line for line in text.split('\n') if line.strip())
+        if not text:
             return ""
 
-        if not chords_list:
-            return '<br>'.join(html.escape(line) for line in lines)
+        text = html.escape(text)
 
-        # Получаем все аккорды из таблицы
-        try:
-            from const import CHORDS_TYPE_LIST
-            chord_set = set()
-            for chord_group in CHORDS_TYPE_LIST:
-                chord_set.update(chord_group)
+        if chords_list:
+            linkify = ChordParser.compile_linkifier(tuple(chords_list))
+            if linkify is not None:
+                text = linkify(text)
 
-            valid_chords = [chord for chord in chords_list if chord in chord_set]
-        except ImportError:
-            valid_chords = chords_list
+        return text.replace('\n', '<br>')
 
-        processed_lines = []
-        for line in lines:
-            # Разбиваем строку на слова, сохраняя пробелы
-            words_and_spaces = re.split(r'(\S+)', line)
-            processed_parts = []
-
-            for part in words_and_spaces:
-                if not part.strip():  # Пробелы
-                    processed_parts.append(part)
-                else:  # Слово
-                    # Проверяем, является ли слово аккордом
-                    if part in valid_chords:
-                        safe_chord = html.escape(part)
-                        chord_html = f'<a href="{safe_chord}" style="color: #3498db; font-weight: bold; text-decoration: none; background: rgba(52, 152, 219, 0.1); padding: 2px 6px; border-radius: 4px;">{safe_chord}</a>'
-                        processed_parts.append(chord_html)
-                    else:
-                        processed_parts.append(html.escape(part))
-
-            processed_lines.append(''.join(processed_parts))
-
-        return '<br>'.join(processed_lines)
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def compile_linkifier(chords):
+        """Замена аккордов песни (из тех, что есть в таблице) ссылками за один проход re.sub"""
+        chord_set = get_all_chords()
+        if chord_set is not None:
+            chords = [chord for chord in chords if chord in chord_set]
+        if not chords:
+            return None
+
+        # Текст экранируется до замены, поэтому ищем экранированные имена аккордов
+        links = {}
+        for chord in chords:
+            safe_chord = html.escape(chord)
+            links[safe_chord] = CHORD_LINK_TEMPLATE.format(chord=safe_chord)
+
+        alternation = '|'.join(re.escape(chord) for chord in sorted(links, key=len, reverse=True))
+        first_chars = re.escape(''.join(sorted({chord[0] for chord in links})))
+        # Проверка первого символа до lookbehind позволяет быстро пропускать остальные позиции
+        chord_regex = re.compile(rf'(?=[{first_chars}])(?<!\S)(?:{alternation})(?!\S)')
+        return partial(chord_regex.sub, lambda match: links[match.group()])